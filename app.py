@@ -1,16 +1,42 @@
 # backend/app.py
 
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, Response, stream_with_context, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import (LoginManager, UserMixin, login_user, logout_user,
                          login_required, current_user)
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
-import pandas as pd
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+import numpy as np
+from recipe_catalog import RecipeCatalog
+from exercise_catalog import ExerciseCatalog
+from fitness_model import WorkoutCalorieModel
+from caching import TTLCache
+from catalog_service import CatalogService
+from catalog_snapshot import default_snapshot_path, load_snapshot, read_header, snapshot_is_current, write_snapshot
+from metrics import Registry, COUNT_BUCKETS
+from profiling import ProfileStore, StackSampler, start_profile
+from password_hashing import PasswordHasher, PasswordHasherBusy
+from storage import GroupCommitQueue, install_sqlite_pragmas, sqlite_engine_options
+from plan_jobs import PlanJobRunner, PlanJobsBusy
+from plan_generator import MEAL_CALORIE_DISTRIBUTION, generate_single_day, iter_plan_ids, pick_meal, plan_matcher
+from plan_pool import PlanPoolBusy, PlanProcessPool
+from serialization import FastJSONProvider, RowEncoder, json_text_response, plain_json_settings
 import os
 import random
+import hashlib
+from functools import wraps
+from itertools import islice
+from concurrent.futures.process import BrokenProcessPool
+import json
 from datetime import date, datetime, timedelta
 import logging
+import threading
+import time
 
 # --- App Configuration ---
 app = Flask(__name__)
@@ -19,9 +45,9 @@ app = Flask(__name__)
 CORS(app,
      resources={r"/api/*": {"origins": ["http://localhost:8000", "http://127.0.0.1:8000"]}},
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+     allow_headers=["Content-Type", "Authorization", "X-Requested-With", "X-Profile", "If-None-Match"],
      supports_credentials=True,
-     expose_headers=["Content-Length", "X-CSRFToken"])
+     expose_headers=["Content-Length", "X-CSRFToken", "X-Next-Cursor", "X-Profile-Id", "ETag"])
 app.logger.info("CORS initialized for API routes, allowing http://localhost:8000 and http://127.0.0.1:8000")
 
 app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'your_fallback_SPA_secret_key_v13_ADMIN_AUTH_FINAL') # CHANGE THIS IN PRODUCTION
@@ -31,10 +57,68 @@ try:
     os.makedirs(instance_path, exist_ok=True)
 except OSError: pass
 db_path = os.path.join(instance_path, 'app.db')
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f'sqlite:///{db_path}') # Override for benchmarks/deployments
+# SQLite tuning (storage.py): WAL so readers don't block on writers, synchronous=NORMAL (no fsync per commit in WAL mode),
+# a bigger page cache and mmap'd reads, a pooled set of connections, and optionally one writer thread that group-commits
+# single-row writes (POST /api/todos, POST /api/workout_logs) from concurrent requests.
+app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 65536))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_GROUP_COMMIT'] = os.environ.get('SQLITE_GROUP_COMMIT', '0') == '1'
+app.config['GROUP_COMMIT_MAX_BATCH'] = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', 256))
+app.config['GROUP_COMMIT_MAX_DELAY_MS'] = float(os.environ.get('GROUP_COMMIT_MAX_DELAY_MS', 2))
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'], pool_size=int(os.environ.get('DB_POOL_SIZE', 10)), max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+    pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30)), busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'])
+
+app.config['PLAN_CACHE_SIZE'] = int(os.environ.get('PLAN_CACHE_SIZE', 4096))
+app.config['PLAN_CACHE_TTL_SECONDS'] = int(os.environ.get('PLAN_CACHE_TTL_SECONDS', 6 * 3600))
+app.config['USER_SESSION_CACHE_SIZE'] = int(os.environ.get('USER_SESSION_CACHE_SIZE', 10000))
+app.config['USER_SESSION_CACHE_TTL_SECONDS'] = int(os.environ.get('USER_SESSION_CACHE_TTL_SECONDS', 60)) # Bounds staleness from writes made by other processes
+app.config['PLAN_JOB_WORKERS'] = int(os.environ.get('PLAN_JOB_WORKERS', 2)) # Threads computing POST /api/weekly_diet_plan/jobs
+app.config['PLAN_JOB_MAX_PENDING'] = int(os.environ.get('PLAN_JOB_MAX_PENDING', 100))
+app.config['PLAN_JOB_TTL_SECONDS'] = int(os.environ.get('PLAN_JOB_TTL_SECONDS', 600)) # Finished jobs stay readable this long
+app.config['PLAN_STREAM_TIMEOUT_SECONDS'] = float(os.environ.get('PLAN_STREAM_TIMEOUT_SECONDS', 60))
+# Weekly plans generated in worker processes (plan_pool.py) instead of request threads; 0 = in-process.
+# Spawned workers re-import the launching script. Under a WSGI server that is the server's own script; under
+# `python app.py` it is app.py, which then skips its catalog load (the only startup work done at import: the
+# engine, writer and thread pools it creates start nothing until used)
+app.config['PLAN_PROCESS_WORKERS'] = int(os.environ.get('PLAN_PROCESS_WORKERS', 0))
+app.config['PLAN_PROCESS_MAX_PENDING'] = int(os.environ.get('PLAN_PROCESS_MAX_PENDING', 4 * app.config['PLAN_PROCESS_WORKERS'])) # More queued plans -> 503
+app.config['PLAN_PROCESS_START_METHOD'] = os.environ.get('PLAN_PROCESS_START_METHOD', 'spawn') # Not fork: the app process already runs threads
+app.config['PLAN_PROCESS_TIMEOUT_SECONDS'] = float(os.environ.get('PLAN_PROCESS_TIMEOUT_SECONDS', 30)) # A plan still unfinished by then -> 503
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '0') == '1' # Serves /metrics; off costs one flag check per hook
+app.config['JSON_BACKEND'] = os.environ.get('JSON_BACKEND', 'auto') # auto/orjson: orjson when installed (same bytes either way); json: stdlib only
+# Profiling: admins can send "X-Profile: 1" on any request; PROFILE_ENDPOINTS (comma-separated route names) are also
+# profiled for a PROFILE_SAMPLE_RATE fraction of everyone's requests. PLAN_SAMPLER_INTERVAL_MS > 0 keeps rolling flame data for plan generation.
+app.config['PROFILE_ENDPOINTS'] = [e.strip() for e in os.environ.get('PROFILE_ENDPOINTS', '').split(',') if e.strip()]
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.01))
+app.config['PROFILE_STORE_SIZE'] = int(os.environ.get('PROFILE_STORE_SIZE', 50))
+app.config['PLAN_SAMPLER_INTERVAL_MS'] = int(os.environ.get('PLAN_SAMPLER_INTERVAL_MS', 0))
+app.config['PLAN_SAMPLER_WINDOW_SECONDS'] = int(os.environ.get('PLAN_SAMPLER_WINDOW_SECONDS', 600))
+
+# bcrypt work factor (Flask-Bcrypt reads BCRYPT_LOG_ROUNDS); stored hashes with another cost are upgraded on the next login
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 32)) # Waiting hash/verify calls beyond the workers
+app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+
+app.json = FastJSONProvider(app, backend=app.config['JSON_BACKEND'])
+if app.config['JSON_BACKEND'] == 'orjson' and app.json.backend != 'orjson': app.logger.warning("JSON_BACKEND=orjson but orjson is not installed; using the json module.")
 
 db = SQLAlchemy(app)
+# INSERT constructs with ON CONFLICT DO UPDATE for DailyNutrition's running totals; other dialects update then insert
+UPSERT_INSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+with app.app_context(): # Flask-SQLAlchemy creates the engine in init_app; no connection is opened here
+    upsert_insert = UPSERT_INSERTS.get(db.engine.dialect.name)
+    install_sqlite_pragmas(db.engine, journal_mode=app.config['SQLITE_JOURNAL_MODE'], synchronous=app.config['SQLITE_SYNCHRONOUS'],
+                           cache_size_kb=app.config['SQLITE_CACHE_SIZE_KB'], mmap_size=app.config['SQLITE_MMAP_SIZE'], busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'])
+    write_queue = GroupCommitQueue(db.engine, max_batch=app.config['GROUP_COMMIT_MAX_BATCH'], max_delay=app.config['GROUP_COMMIT_MAX_DELAY_MS'] / 1000) if app.config['SQLITE_GROUP_COMMIT'] else None
 bcrypt = Bcrypt(app)
+password_hasher = PasswordHasher(bcrypt, rounds=app.config['BCRYPT_LOG_ROUNDS'], max_workers=app.config['PASSWORD_HASH_WORKERS'],
+                                 max_queue=app.config['PASSWORD_HASH_QUEUE'], queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT'])
 login_manager = LoginManager(app)
 login_manager.init_app(app)
 login_manager.session_protection = "strong" # For session security
@@ -42,9 +126,79 @@ login_manager.session_protection = "strong" # For session security
 logging.basicConfig(level=logging.DEBUG)
 app.logger.setLevel(logging.DEBUG)
 
+# --- Metrics ---
+# Per-endpoint latency, DB queries and DB time per request, and time inside plan generation, in
+# Prometheus text format at /metrics. Nothing below is hooked up unless METRICS_ENABLED is set.
+metrics = Registry(enabled=app.config['METRICS_ENABLED'])
+REQUEST_LATENCY = metrics.histogram('http_request_duration_seconds', 'Request latency by endpoint.', ('method', 'endpoint', 'status'))
+REQUEST_DB_QUERIES = metrics.histogram('http_request_db_queries', 'DB statements executed per request.', ('endpoint',), buckets=COUNT_BUCKETS)
+REQUEST_DB_SECONDS = metrics.histogram('http_request_db_duration_seconds', 'Time spent executing DB statements per request.', ('endpoint',))
+PLAN_FUNCTION_SECONDS = metrics.histogram('diet_plan_function_duration_seconds', 'Time inside diet plan generation functions.', ('function',))
+
+if metrics.enabled:
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter(); g.db_queries = 0; g.db_seconds = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.get('metrics_start')
+        if start is not None:
+            endpoint = request.endpoint or 'unmatched' # Route names, not raw paths, keep label cardinality bounded
+            REQUEST_LATENCY.observe((request.method, endpoint, str(response.status_code)), time.perf_counter() - start)
+            REQUEST_DB_QUERIES.observe((endpoint,), g.db_queries); REQUEST_DB_SECONDS.observe((endpoint,), g.db_seconds)
+        return response
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        if has_request_context() and 'db_queries' in g: g.db_queries += 1; g.db_seconds += elapsed
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    if not metrics.enabled: return jsonify({"message": "Metrics are disabled."}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# --- Profiling ---
+# Captured request profiles are kept in memory (last PROFILE_STORE_SIZE) and downloaded from /api/admin/profiles.
+request_profiles = ProfileStore(maxsize=app.config['PROFILE_STORE_SIZE'])
+plan_sampler = StackSampler(interval=app.config['PLAN_SAMPLER_INTERVAL_MS'] / 1000, window_seconds=app.config['PLAN_SAMPLER_WINDOW_SECONDS'],
+                            enabled=app.config['PLAN_SAMPLER_INTERVAL_MS'] > 0, name='plan-sampler')
+
+@app.before_request
+def start_request_profile():
+    if request.headers.get('X-Profile') == '1':
+        if not (current_user.is_authenticated and current_user.is_admin_user): return # Header is ignored for non-admins
+        g.profile_reason = 'header'
+    elif request.endpoint in app.config['PROFILE_ENDPOINTS'] and random.random() < app.config['PROFILE_SAMPLE_RATE']:
+        g.profile_reason = 'sampled'
+    else: return
+    g.profiler = start_profile(); g.profile_start = time.perf_counter()
+
+@app.after_request
+def store_request_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        profile_id = request_profiles.add(
+            profiler, endpoint=request.endpoint, method=request.method, path=request.path, status=response.status_code, reason=g.profile_reason,
+            user_id=current_user.id if current_user.is_authenticated else None, duration_ms=round((time.perf_counter() - g.profile_start) * 1000, 2))
+        response.headers['X-Profile-Id'] = str(profile_id)
+    return response
+
+@app.teardown_request
+def stop_request_profile(exc):
+    profiler = g.pop('profiler', None) # Still set only if the request died before after_request
+    if profiler is not None: profiler.disable()
+
 # --- Middleware for logging requests ---
 @app.before_request
 def log_request_info():
+    if not app.logger.isEnabledFor(logging.DEBUG): return # Skip building the messages when DEBUG is off
     app.logger.debug(f"--- Incoming Request ---")
     app.logger.debug(f"Path: {request.path}")
     app.logger.debug(f"Method: {request.method}")
@@ -55,6 +209,7 @@ def log_request_info():
 
 @app.after_request
 def log_response_info(response):
+    if not app.logger.isEnabledFor(logging.DEBUG): return response
     app.logger.debug(f"--- Outgoing Response for {request.path} (Status: {response.status_code}) ---")
     app.logger.debug(f"Access-Control-Allow-Origin: {response.headers.get('Access-Control-Allow-Origin')}")
     app.logger.debug(f"Access-Control-Allow-Credentials: {response.headers.get('Access-Control-Allow-Credentials')}")
@@ -62,22 +217,68 @@ def log_response_info(response):
 
 # --- Dataset Loading ---
 base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-DIET_DATASET_PATH = os.path.join(base_dir, 'datasets', 'diet_dataset_1000.csv')
-FITNESS_DATASET_PATH = os.path.join(base_dir, 'datasets', 'fitness_dataset_1000.csv') # Not actively used in current logic
-diet_df = None
-# fitness_df = None # Not used, can be commented out or removed if not planned
-try:
-    diet_df = pd.read_csv(DIET_DATASET_PATH)
-    if diet_df is not None: app.logger.info(f"Diet dataset loaded. Shape: {diet_df.shape}. Columns: {diet_df.columns.tolist()}")
-    else: app.logger.warning("Diet dataset: pd.read_csv returned None. Using empty DataFrame."); diet_df = pd.DataFrame()
-except FileNotFoundError: app.logger.error(f"CRITICAL ERROR: Diet dataset not found at {DIET_DATASET_PATH}"); diet_df = pd.DataFrame()
-except Exception as e: app.logger.error(f"CRITICAL ERROR loading diet dataset from {DIET_DATASET_PATH}: {e}"); diet_df = pd.DataFrame()
-# try:
-#     fitness_df = pd.read_csv(FITNESS_DATASET_PATH)
-#     if fitness_df is not None: app.logger.info(f"Fitness dataset loaded. Shape: {fitness_df.shape}.")
-#     else: app.logger.warning("Fitness dataset: pd.read_csv returned None. Using empty DataFrame."); fitness_df = pd.DataFrame()
-# except FileNotFoundError: app.logger.error(f"ERROR: Fitness dataset not found at {FITNESS_DATASET_PATH}"); fitness_df = pd.DataFrame()
-# except Exception as e: app.logger.error(f"Error loading fitness dataset from {FITNESS_DATASET_PATH}: {e}"); fitness_df = pd.DataFrame()
+DIET_DATASET_PATH = os.environ.get('DIET_DATASET_PATH', os.path.join(base_dir, 'datasets', 'diet_dataset_1000.csv'))
+FITNESS_DATASET_PATH = os.environ.get('FITNESS_DATASET_PATH', os.path.join(base_dir, 'datasets', 'fitness_dataset_1000.csv'))
+EXERCISE_CATALOG_PATH = os.environ.get('EXERCISE_CATALOG_PATH') # Optional CSV replacing the built-in exercise list
+# Built with `python catalog_snapshot.py <diet csv>`; mapped instead of parsing the CSV while it matches it
+DIET_SNAPSHOT_PATH = os.environ.get('DIET_SNAPSHOT_PATH', default_snapshot_path(DIET_DATASET_PATH))
+
+def _load_diet_catalog_csv(pd):
+    try:
+        diet_df = pd.read_csv(DIET_DATASET_PATH)
+        if diet_df is not None: app.logger.info(f"Diet dataset loaded. Shape: {diet_df.shape}. Columns: {diet_df.columns.tolist()}")
+        else: app.logger.warning("Diet dataset: pd.read_csv returned None. Using empty DataFrame."); diet_df = pd.DataFrame()
+    except FileNotFoundError: app.logger.error(f"CRITICAL ERROR: Diet dataset not found at {DIET_DATASET_PATH}"); diet_df = pd.DataFrame()
+    except Exception as e: app.logger.error(f"CRITICAL ERROR loading diet dataset from {DIET_DATASET_PATH}: {e}"); diet_df = pd.DataFrame()
+
+    # Cleaned + indexed once here so plan requests only do an index lookup
+    diet_catalog = RecipeCatalog.from_dataframe(diet_df)
+    if diet_catalog.error: app.logger.error(f"Recipe catalog unavailable: {diet_catalog.error}")
+    else: app.logger.info(f"Recipe catalog built with {len(diet_catalog)} recipes.")
+    return diet_catalog
+
+def _load_diet_catalog_snapshot():
+    # Read-only mmap shared by every worker process; None if there is no usable snapshot
+    if not os.path.exists(DIET_SNAPSHOT_PATH): return None
+    try:
+        if not snapshot_is_current(DIET_SNAPSHOT_PATH, DIET_DATASET_PATH):
+            app.logger.warning(f"Recipe catalog snapshot {DIET_SNAPSHOT_PATH} does not match {DIET_DATASET_PATH}; reading the CSV. Rebuild it with catalog_snapshot.py.")
+            return None
+        diet_catalog = load_snapshot(DIET_SNAPSHOT_PATH)
+        app.logger.info(f"Recipe catalog mapped from {DIET_SNAPSHOT_PATH} with {len(diet_catalog)} recipes.")
+        return diet_catalog
+    except Exception as e:
+        app.logger.error(f"Error loading recipe catalog snapshot {DIET_SNAPSHOT_PATH}: {e}. Reading the CSV.")
+        return None
+
+def load_catalogs():
+    # Reads the datasets and builds everything derived from them. Runs once on the catalog service's
+    # background thread, so importing app.py (and pandas) doesn't wait for it.
+    import pandas as pd
+    diet_catalog = _load_diet_catalog_snapshot() or _load_diet_catalog_csv(pd)
+    try:
+        fitness_df = pd.read_csv(FITNESS_DATASET_PATH)
+        if fitness_df is not None: app.logger.info(f"Fitness dataset loaded. Shape: {fitness_df.shape}.")
+        else: app.logger.warning("Fitness dataset: pd.read_csv returned None. Using empty DataFrame."); fitness_df = pd.DataFrame()
+    except FileNotFoundError: app.logger.error(f"ERROR: Fitness dataset not found at {FITNESS_DATASET_PATH}"); fitness_df = pd.DataFrame()
+    except Exception as e: app.logger.error(f"Error loading fitness dataset from {FITNESS_DATASET_PATH}: {e}"); fitness_df = pd.DataFrame()
+
+    # Calorie-burn lookup tables by workout type and user segment, aggregated once from the fitness dataset
+    workout_model = WorkoutCalorieModel.from_dataframe(fitness_df)
+    if workout_model.error: app.logger.error(f"Workout calorie model unavailable: {workout_model.error}")
+    else: app.logger.info(f"Workout calorie model built for {len(workout_model.workout_types)} workout types.")
+
+    exercise_catalog = ExerciseCatalog.default()
+    if EXERCISE_CATALOG_PATH:
+        try: exercise_catalog = ExerciseCatalog.from_csv(EXERCISE_CATALOG_PATH); app.logger.info(f"Exercise catalog loaded with {len(exercise_catalog)} exercises.")
+        except Exception as e: app.logger.error(f"Error loading exercise catalog from {EXERCISE_CATALOG_PATH}: {e}. Using the built-in list.")
+    return {"diet_catalog": diet_catalog, "workout_model": workout_model, "exercise_catalog": exercise_catalog}
+
+# catalogs.diet_catalog / .workout_model / .exercise_catalog wait until loading has finished
+catalogs = CatalogService(load_catalogs)
+# Loading starts at import, except in spawned plan workers (plan_pool.py): under `python app.py` they
+# re-import this script as __mp_main__, and must map the snapshot rather than build their own catalog
+if __name__ != '__mp_main__': catalogs.start()
 
 
 # --- Database Models ---
@@ -94,9 +295,33 @@ class User(UserMixin, db.Model):
     goals = db.Column(db.String(100))
     preferred_cuisines = db.Column(db.String(200), nullable=True)
     is_admin_user = db.Column(db.Boolean, default=False, nullable=False) # New field for admin status
-
-    def set_password(self, password): self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
-    def check_password(self, password): return bcrypt.check_password_hash(self.password_hash, password)
+    # Derived from the profile; refreshed on flush whenever one of USER_METRIC_INPUTS changes
+    bmi = db.Column(db.Float, nullable=True)
+    bmi_category = db.Column(db.String(20), nullable=True)
+    bmr = db.Column(db.Integer, nullable=True)
+    tdee = db.Column(db.Integer, nullable=True)
+    target_calories = db.Column(db.Integer, nullable=True)
+    # Per-user data versions behind the ETags of GET /api/user_profile, /api/todos and /api/workout_logs
+    # and the weekly plan cache keys (NULL = 0, for rows that predate them); see bump_data_version
+    profile_version = db.Column(db.Integer, nullable=True)
+    todos_version = db.Column(db.Integer, nullable=True)
+    workout_logs_version = db.Column(db.Integer, nullable=True)
+    weekly_plan_version = db.Column(db.Integer, nullable=True)
+
+    def set_password(self, password): self.password_hash = password_hasher.hash(password)
+    def check_password(self, password): return password_hasher.verify(self.password_hash, password)
+    def upgrade_password_hash(self, password):
+        # After a successful check: re-hash at the configured cost if the stored hash used another one (caller commits)
+        if password_hasher.needs_rehash(self.password_hash): self.set_password(password); return True
+        return False
+
+    def refresh_metrics(self):
+        self.bmi = calculate_bmi(self.weight_kg, self.height_cm); self.bmi_category = get_bmi_category(self.bmi)
+        self.bmr = calculate_bmr(self.weight_kg, self.height_cm, self.age, self.gender)
+        self.tdee = calculate_tdee(self.bmr, self.activity_level); self.target_calories = get_target_calories(self.tdee, self.goals)
+    def metrics(self):
+        if self.target_calories is None: self.refresh_metrics() # Row predates the stored metrics (normally backfilled at startup)
+        return {"bmi": self.bmi, "bmi_category": self.bmi_category, "bmr": self.bmr, "tdee": self.tdee, "target_daily_calories": self.target_calories}
 
 class WorkoutLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -106,16 +331,39 @@ class WorkoutLog(db.Model):
     duration_minutes = db.Column(db.Integer, nullable=False)
     calories_burned = db.Column(db.Integer, nullable=True)
     feedback = db.Column(db.Text, nullable=True)
+    idempotency_key = db.Column(db.String(100), nullable=True) # Client-supplied, so retried syncs don't duplicate rows
     user = db.relationship('User', backref=db.backref('workout_logs', lazy='dynamic'))
+    __table_args__ = (
+        # Covers /api/workout_stats: the per-user date-range aggregates are answered from the index alone
+        db.Index('ix_workoutlog_user_date_covering', 'user_id', 'log_date', 'exercise_name', 'duration_minutes', 'calories_burned'),
+        # Keyset pages of /api/workout_logs: rows come out already in (log_date desc, id desc) order
+        db.Index('ix_workoutlog_user_date', 'user_id', 'log_date'),
+        db.Index('uq_workoutlog_user_idempotency_key', 'user_id', 'idempotency_key', unique=True),
+    )
 
 class DietLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_dietlog_user_id'), nullable=False, index=True)
     log_date = db.Column(db.Date, nullable=False, default=date.today)
     meal_type = db.Column(db.String(50))
-    food_items = db.Column(db.Text) # Consider JSON or separate table for structured items
+    food_items = db.Column(db.Text) # JSON list of {name, servings, calories, protein, carbs, fat}
     total_calories = db.Column(db.Integer)
+    total_protein = db.Column(db.Integer, nullable=True)
+    total_carbs = db.Column(db.Integer, nullable=True)
+    total_fat = db.Column(db.Integer, nullable=True)
     user = db.relationship('User', backref=db.backref('diet_logs', lazy='dynamic'))
+    __table_args__ = (db.Index('ix_dietlog_user_date', 'user_id', 'log_date'),)
+
+class DailyNutrition(db.Model):
+    # Per-user, per-day sums of DietLog totals, kept up to date in the same transaction as each diet
+    # log write, so "intake so far today" is one primary-key lookup instead of a scan of the logs.
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_dailynutrition_user_id'), primary_key=True)
+    log_date = db.Column(db.Date, primary_key=True)
+    calories = db.Column(db.Integer, nullable=False, default=0)
+    protein = db.Column(db.Integer, nullable=False, default=0)
+    carbs = db.Column(db.Integer, nullable=False, default=0)
+    fat = db.Column(db.Integer, nullable=False, default=0)
+    meal_count = db.Column(db.Integer, nullable=False, default=0)
 
 class Todo(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -125,8 +373,155 @@ class Todo(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user = db.relationship('User', backref=db.backref('todos', lazy='dynamic'))
 
+class WeeklyPlan(db.Model):
+    # One generated diet plan per user and week. recipe_ids is a packed int32 array shaped
+    # [7 days][meals][options] of recipe-catalog row ids (-1 = no recipe), valid for catalog_fingerprint.
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_weeklyplan_user_id'), nullable=False)
+    week_start = db.Column(db.Date, nullable=False) # Monday of the ISO week
+    num_options = db.Column(db.Integer, nullable=False, default=1)
+    recipe_ids = db.Column(db.LargeBinary, nullable=False)
+    inputs_fingerprint = db.Column(db.String(300), nullable=False) # Target calories, diet pref, cuisines it was built for
+    catalog_fingerprint = db.Column(db.String(32), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    user = db.relationship('User', backref=db.backref('weekly_plans', lazy='dynamic'))
+    __table_args__ = (db.UniqueConstraint('user_id', 'week_start', name='uq_weeklyplan_user_week'),)
+
+    def recipe_id_array(self):
+        return np.frombuffer(self.recipe_ids, dtype=np.int32).reshape(7, -1, self.num_options).copy()
+    def set_recipe_ids(self, plan_ids):
+        self.num_options = int(plan_ids.shape[2]); self.recipe_ids = np.ascontiguousarray(plan_ids, dtype=np.int32).tobytes()
+
+class PlanJobRecord(db.Model):
+    # State of an async weekly plan job (plan_jobs.PlanJob), written through by the process running it
+    # so a poll or stream that lands on any worker finds the job. Times are Unix timestamps.
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_planjobrecord_user_id'), nullable=False)
+    status = db.Column(db.String(10), nullable=False)
+    days = db.Column(db.Text, nullable=False, default='[]') # JSON array of the days published so far
+    result = db.Column(db.Text, nullable=True) # JSON, once done
+    error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.Float, nullable=False)
+    finished_at = db.Column(db.Float, nullable=True, index=True)
+
+USER_METRIC_INPUTS = ('weight_kg', 'height_cm', 'age', 'gender', 'activity_level', 'goals')
+
+@event.listens_for(User, 'before_insert')
+@event.listens_for(User, 'before_update')
+def _refresh_user_metrics(mapper, connection, user):
+    state = sa_inspect(user)
+    if user.target_calories is None or any(state.attrs[field].history.has_changes() for field in USER_METRIC_INPUTS): user.refresh_metrics()
+
+# --- Authenticated-user snapshots ---
+# load_user serves current_user from a per-process cache of UserSnapshot (the User columns endpoints
+# read, minus the password hash) instead of SELECTing the row on every request. Snapshots are shared
+# between requests, so they are read-only: code that changes a user loads the User row and the cache
+# entry is dropped on update/delete, profile update, login and logout.
+user_session_cache = TTLCache(maxsize=app.config['USER_SESSION_CACHE_SIZE'], ttl=app.config['USER_SESSION_CACHE_TTL_SECONDS'])
+
+class UserSnapshot:
+    FIELDS = ('id', 'username', 'is_admin_user', 'gender', 'age', 'height_cm', 'weight_kg', 'diet_preference', 'activity_level', 'goals',
+              'preferred_cuisines', 'bmi', 'bmi_category', 'bmr', 'tdee', 'target_calories', 'profile_version')
+    __slots__ = FIELDS
+    is_authenticated = True; is_active = True; is_anonymous = False # Flask-Login's user protocol (as UserMixin provides)
+
+    def __init__(self, user):
+        user.metrics() # Fills the stored metrics if the row predates them
+        for field in self.FIELDS: setattr(self, field, getattr(user, field))
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name): raise AttributeError(f"UserSnapshot is read-only; load the User row to change {name}")
+        object.__setattr__(self, name, value)
+
+    def get_id(self): return str(self.id)
+
+    def metrics(self): return {"bmi": self.bmi, "bmi_category": self.bmi_category, "bmr": self.bmr, "tdee": self.tdee, "target_daily_calories": self.target_calories}
+
 @login_manager.user_loader
-def load_user(user_id): return User.query.get(int(user_id))
+def load_user(user_id):
+    user_id = int(user_id)
+    snapshot = user_session_cache.get(user_id)
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if user is None: return None
+        snapshot = UserSnapshot(user); user_session_cache.set(user_id, snapshot)
+    return snapshot
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _drop_user_snapshot(mapper, connection, user): user_session_cache.delete(user.id)
+
+# --- Conditional GETs ---
+# Read-heavy GETs carry a strong ETag built from the user's version counter for that data. Every write
+# to the data bumps the counter in the same transaction, so an If-None-Match with the current tag is
+# answered 304 after one primary-key lookup on the user row, without the view's queries or serialization.
+# Counters live in the database rather than in process memory so every worker agrees on them.
+DATA_VERSION_RESOURCES = ('profile', 'todos', 'workout_logs', 'weekly_plan')
+
+def data_version(user_id, resource):
+    column = User.__table__.c[f'{resource}_version']
+    return db.session.execute(db.select(column).where(User.__table__.c.id == user_id)).scalar() or 0
+
+def bump_data_version(user_id, resource, connection=None):
+    # Runs in the caller's transaction: db.session by default, or a Core connection (group-commit jobs)
+    column = User.__table__.c[f'{resource}_version']
+    statement = User.__table__.update().where(User.__table__.c.id == user_id).values({column: db.func.coalesce(column, 0) + 1})
+    (connection if connection is not None else db.session).execute(statement)
+
+@event.listens_for(User, 'before_update')
+def _bump_profile_version(mapper, connection, user):
+    # Any ORM change to a column the profile shows (PUT, metric refresh, admin flag) moves its ETag on
+    state = sa_inspect(user)
+    if any(state.attrs[field].history.has_changes() for field in UserSnapshot.FIELDS if field != 'profile_version'):
+        user.profile_version = db.func.coalesce(User.profile_version, 0) + 1
+
+def _insert_with_version(table, values, user_id, resource):
+    # write_queue.insert plus the version bump, committed in the same group-commit transaction
+    def job(connection):
+        new_id = connection.execute(table.insert().values(**values)).inserted_primary_key[0]
+        bump_data_version(user_id, resource, connection); return new_id
+    return write_queue.submit(job)
+
+def conditional_get(resource, vary_on_query=False):
+    # For views behind @login_required. vary_on_query: the response depends on the query string too.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET': return view(*args, **kwargs)
+            g.data_version = data_version(current_user.id, resource) # Read first: a write racing the view can only make the tag older than the body
+            tag = f"{resource}-{current_user.id}-{g.data_version}"
+            if vary_on_query and request.query_string: tag += '-' + hashlib.blake2b(request.query_string, digest_size=8).hexdigest()
+            if request.if_none_match.contains_weak(tag):
+                response = Response(status=304)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200: return response
+            response.set_etag(tag); response.headers['Cache-Control'] = 'private, no-cache' # Always revalidate; never in shared caches
+            return response
+        return wrapper
+    return decorator
+
+metrics.callback('cache_hits_total', 'Lookups answered from an in-process cache.', ('cache',),
+                 lambda: {('user_session',): user_session_cache.hits, ('weekly_plan',): weekly_plan_cache.hits}, kind='counter')
+metrics.callback('cache_misses_total', 'Lookups an in-process cache could not answer.', ('cache',),
+                 lambda: {('user_session',): user_session_cache.misses, ('weekly_plan',): weekly_plan_cache.misses}, kind='counter')
+metrics.callback('cache_entries', 'Entries held by an in-process cache.', ('cache',),
+                 lambda: {('user_session',): len(user_session_cache), ('weekly_plan',): len(weekly_plan_cache)})
+
+def upgrade_schema():
+    # db.create_all() only creates missing tables; this adds the (nullable) columns and indexes
+    # introduced since an existing app.db was made
+    inspector = sa_inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name): continue
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                db.session.execute(db.text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+                app.logger.info(f"Added column {table.name}.{column.name}")
+        db.session.commit()
+        for index in table.indexes: index.create(bind=db.engine, checkfirst=True)
 
 # --- Helper Functions (BMI, BMR, TDEE, Target Calories) ---
 def calculate_bmi(weight_kg, height_cm):
@@ -145,201 +540,413 @@ def calculate_bmr(weight_kg, height_cm, age, gender):
     elif gender_l == 'female': bmr = (10 * weight_kg) + (6.25 * height_cm) - (5 * age) - 161
     else: bmr = (10 * weight_kg) + (6.25 * height_cm) - (5 * age) - 78 # Average for 'other'
     return round(bmr)
+ACTIVITY_MULTIPLIERS = {'sedentary': 1.2, 'light': 1.375, 'moderate': 1.55, 'active': 1.725, 'very_active': 1.9}
+GOAL_CALORIE_ADJUSTMENTS = {'weight_loss': -500, 'muscle_gain': 300}
 def calculate_tdee(bmr, activity_level):
     if bmr == 0: return 0
-    activity_multipliers = {'sedentary': 1.2, 'light': 1.375, 'moderate': 1.55, 'active': 1.725, 'very_active': 1.9}
-    multiplier = activity_multipliers.get(activity_level.lower() if activity_level else 'sedentary', 1.2)
+    multiplier = ACTIVITY_MULTIPLIERS.get(activity_level.lower() if activity_level else 'sedentary', 1.2)
     return round(bmr * multiplier)
 def get_target_calories(tdee, goal):
     if tdee == 0: return 0
     goal_lower = goal.lower() if goal else 'maintenance'
-    if goal_lower == 'weight_loss': return tdee - 500
-    elif goal_lower == 'muscle_gain': return tdee + 300
-    return tdee
+    return tdee + GOAL_CALORIE_ADJUSTMENTS.get(goal_lower, 0)
+
+def calculate_user_metrics_batch(weights_kg, heights_cm, ages, genders, activity_levels, goals):
+    # NumPy version of the whole chain (calculate_bmi, get_bmi_category, calculate_bmr, calculate_tdee,
+    # get_target_calories) over many users; same rules and the same half-to-even rounding as the scalar helpers.
+    weight = np.array([w or 0 for w in weights_kg], dtype=float)
+    height = np.array([h or 0 for h in heights_cm], dtype=float)
+    age = np.array([a or 0 for a in ages], dtype=float)
+    height_m = height / 100
+    bmi = np.round(np.divide(weight, height_m ** 2, out=np.zeros_like(weight), where=(weight != 0) & (height != 0)), 1)
+    bmi_category = np.select(
+        [bmi == 0, bmi < 18.5, (bmi >= 18.5) & (bmi < 24.9), (bmi >= 25) & (bmi < 29.9)],
+        ["N/A", "Underweight", "Normal weight", "Overweight"], "Obesity").astype(object)
+    gender_l = [g.lower() if g else "" for g in genders]
+    gender_offset = np.array([5 if g == 'male' else -161 if g == 'female' else -78 for g in gender_l], dtype=float)
+    valid = (weight != 0) & (height != 0) & (age != 0) & np.array([bool(g) for g in gender_l])
+    bmr = np.where(valid, np.round(10 * weight + 6.25 * height - 5 * age + gender_offset), 0)
+    multiplier = np.array([ACTIVITY_MULTIPLIERS.get(a.lower() if a else 'sedentary', 1.2) for a in activity_levels])
+    tdee = np.where(bmr != 0, np.round(bmr * multiplier), 0)
+    adjustment = np.array([GOAL_CALORIE_ADJUSTMENTS.get(g.lower() if g else 'maintenance', 0) for g in goals])
+    return {
+        "bmi": bmi, "bmi_category": bmi_category, "bmr": bmr.astype(np.int64), "tdee": tdee.astype(np.int64),
+        "target_calories": np.where(tdee != 0, tdee + adjustment, 0).astype(np.int64)
+    }
+
+def backfill_user_metrics(only_missing=True, chunk_size=50000):
+    # Writes the stored User metrics with one NumPy pass and one executemany UPDATE per chunk of users:
+    # rows that predate the columns (at startup) or everyone after a formula change (flask recompute-user-metrics).
+    table = User.__table__
+    query = db.select(table.c.id, *(table.c[field] for field in USER_METRIC_INPUTS)).order_by(table.c.id)
+    if only_missing: query = query.where(table.c.target_calories.is_(None))
+    last_id = 0; updated = 0
+    while True:
+        rows = db.session.execute(query.where(table.c.id > last_id).limit(chunk_size)).all()
+        if not rows: break
+        user_ids, *inputs = zip(*rows)
+        metrics = {field: values.tolist() for field, values in calculate_user_metrics_batch(*inputs).items()}
+        db.session.execute(table.update().where(table.c.id == db.bindparam('_id')).values(profile_version=db.func.coalesce(table.c.profile_version, 0) + 1), # Profiles show these
+                           [{'_id': user_id, **{field: values[i] for field, values in metrics.items()}} for i, user_id in enumerate(user_ids)])
+        db.session.commit()
+        last_id = user_ids[-1]; updated += len(user_ids)
+    return updated
+
+@app.cli.command('recompute-user-metrics')
+def recompute_user_metrics_command():
+    app.logger.warning(f"Recomputed metrics for {backfill_user_metrics(only_missing=False)} users.")
 
 # --- Diet Recommendation Logic ---
-def _generate_single_day_diet(user_profile_data, available_recipes_df, used_recipes_for_week_set, num_options_per_meal=1):
+# Plans are built, cached and persisted as int32 recipe-id arrays shaped [day][meal][option] (-1 = nothing
+# found) and only turned into dicts by render_daily_diet/render_weekly_plan, or into JSON text by
+# render_weekly_plan_json, when a response is written.
+NO_RECIPE_ENTRY = {"name": "N/A - More variety needed", "calories": 0, "protein": 0, "carbs": 0, "fat": 0, "cuisine": "N/A"}
+
+def render_daily_diet(day_ids):
+    diet_catalog = catalogs.diet_catalog; daily_meals_options = {}
+    for meal_type, option_ids in zip(MEAL_CALORIE_DISTRIBUTION, day_ids):
+        daily_meals_options[meal_type] = [diet_catalog.meal_entry(recipe_id) for recipe_id in option_ids if recipe_id >= 0] or [dict(NO_RECIPE_ENTRY)]
+    day_total_calories = sum(meal_options[0]['calories'] for meal_options in daily_meals_options.values() if meal_options and meal_options[0]['calories'] > 0)
+    return {"meals": daily_meals_options, "total_calories_for_day": day_total_calories}
+
+def render_weekly_plan(plan_ids):
+    return {"weekly_diet_plan": [{"day": day_num + 1, "daily_summary": render_daily_diet(day_ids)} for day_num, day_ids in enumerate(plan_ids)]}
+
+# The same plan straight to JSON text, concatenated from the catalog's per-recipe fragments, so a plan
+# response builds no per-meal dicts. Keys are laid out in sorted order to match jsonify byte for byte.
+NO_RECIPE_FRAGMENT = json.dumps(NO_RECIPE_ENTRY, sort_keys=True, separators=(',', ':'))
+MEAL_TYPE_KEYS = sorted((json.dumps(meal_type), meal_num) for meal_num, meal_type in enumerate(MEAL_CALORIE_DISTRIBUTION))
+
+def render_daily_diet_json(day_ids):
+    diet_catalog = catalogs.diet_catalog; meals = []; day_total_calories = 0
+    for key, meal_num in MEAL_TYPE_KEYS:
+        option_ids = [recipe_id for recipe_id in day_ids[meal_num].tolist() if recipe_id >= 0]
+        fragments = [diet_catalog.meal_fragment(recipe_id) for recipe_id in option_ids] or [NO_RECIPE_FRAGMENT]
+        if option_ids: day_total_calories += int(diet_catalog.calories[option_ids[0]])
+        meals.append(key + ':[' + ','.join(fragments) + ']')
+    return '{"meals":{' + ','.join(meals) + '},"total_calories_for_day":' + str(day_total_calories) + '}'
+
+def render_weekly_plan_json(plan_ids):
+    days = ['{"daily_summary":' + render_daily_diet_json(day_ids) + ',"day":' + str(day_num + 1) + '}' for day_num, day_ids in enumerate(plan_ids)]
+    return '{"weekly_diet_plan":[' + ','.join(days) + ']}'
+
+def weekly_plan_response(plan_ids, status=200):
+    # jsonify(render_weekly_plan(plan_ids)); falls back to it when the JSON settings differ from what
+    # the fragments were encoded with (debug-mode indentation, unsorted keys, non-ASCII output)
+    if not plain_json_settings(app): return jsonify(render_weekly_plan(plan_ids)), status
+    return json_text_response(app, render_weekly_plan_json(plan_ids)), status
+
+@metrics.timed(PLAN_FUNCTION_SECONDS, '_generate_single_day_diet')
+def _generate_single_day_diet(user_profile_data, matcher, used_names_for_week, num_options_per_meal=1, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    return generate_single_day(catalogs.diet_catalog, matcher, user_profile_data.get('target_calories', 2000), used_names_for_week, num_options_per_meal, rng)
+
+def _plan_matcher(user_profile_data):
+    # (matcher, error) for a profile's recipe pool
+    diet_catalog = catalogs.diet_catalog
+    if diet_catalog.error: app.logger.error(f"Recipe catalog unavailable for weekly plan: {diet_catalog.error}")
+    return plan_matcher(diet_catalog, user_profile_data)
+
+_plan_pool = None; _plan_pool_lock = threading.Lock()
+
+def get_plan_pool():
+    # The plan process pool, or None when it is disabled or there is no usable catalog. Built on first
+    # use (it needs the loaded catalog); workers map the diet snapshot if it holds this catalog, else a
+    # snapshot written to the instance folder.
+    global _plan_pool
+    if not app.config['PLAN_PROCESS_WORKERS']: return None
+    if _plan_pool is None:
+        with _plan_pool_lock:
+            if _plan_pool is None:
+                diet_catalog = catalogs.diet_catalog
+                if diet_catalog.error: return None
+                snapshot_path = DIET_SNAPSHOT_PATH
+                if not os.path.exists(snapshot_path) or read_header(snapshot_path)["fingerprint"] != diet_catalog.fingerprint:
+                    snapshot_path = os.path.join(instance_path, f"plan_pool_{diet_catalog.fingerprint[:16]}.rcat")
+                    if not os.path.exists(snapshot_path): write_snapshot(diet_catalog, snapshot_path)
+                _plan_pool = PlanProcessPool(snapshot_path, diet_catalog.fingerprint, max_workers=app.config['PLAN_PROCESS_WORKERS'],
+                                             max_pending=app.config['PLAN_PROCESS_MAX_PENDING'], start_method=app.config['PLAN_PROCESS_START_METHOD'],
+                                             timeout=app.config['PLAN_PROCESS_TIMEOUT_SECONDS'])
+                app.logger.info(f"Plan process pool started with {app.config['PLAN_PROCESS_WORKERS']} workers on {snapshot_path}")
+    return _plan_pool
+
+@metrics.timed(PLAN_FUNCTION_SECONDS, 'generate_weekly_plan_ids')
+@plan_sampler.track
+def generate_weekly_plan_ids(user_profile_data, num_options_per_meal_per_day=1, seed=None):
+    # (plan_ids [7][meals][options], error)
+    plan_pool = get_plan_pool()
+    if plan_pool is not None: # Same plan, computed off this process's GIL
+        try: return plan_pool.generate(user_profile_data, num_options_per_meal_per_day, seed)
+        except BrokenProcessPool: app.logger.error("A plan worker process died; generating this plan in-process (the pool has been restarted).")
+    matcher, error = _plan_matcher(user_profile_data)
+    if error: return None, error
+
+    app.logger.info(f"Generating weekly plan with {len(matcher)} recipes.")
+    rng = np.random.default_rng(seed) # Same seed + same profile -> same plan
+    plan_ids = np.full((7, len(MEAL_CALORIE_DISTRIBUTION), num_options_per_meal_per_day), -1, dtype=np.int32)
+    for day_num, day_ids in iter_weekly_plan_ids(user_profile_data, matcher, num_options_per_meal_per_day, rng): plan_ids[day_num] = day_ids
+    return plan_ids, None
+
+def iter_weekly_plan_ids(user_profile_data, matcher, num_options_per_meal_per_day, rng):
+    # Yields (day_num, [meals][options] ids) as each day is picked; names used earlier in the week stay blocked
+    return iter_plan_ids(len(catalogs.diet_catalog.name_labels),
+                         lambda used_names_for_week: _generate_single_day_diet(user_profile_data, matcher, used_names_for_week, num_options_per_meal_per_day, rng))
+
+@metrics.timed(PLAN_FUNCTION_SECONDS, 'generate_weekly_diet_plan')
+def generate_weekly_diet_plan(user_profile_data, num_options_per_meal_per_day=1, seed=None):
+    plan_ids, error = generate_weekly_plan_ids(user_profile_data, num_options_per_meal_per_day, seed)
+    if error: return {"error": error}
+    return render_weekly_plan(plan_ids)
+
+@plan_sampler.track
+def regenerate_plan_slot(user_profile_data, plan_ids, day_num, meal_type=None, seed=None):
+    # Re-pick one day (meal_type None) or one meal of plan_ids in place, keeping the rest of the week
+    # blocked the way generate_weekly_plan_ids's "used this week" set would. Returns an error or None.
+    diet_catalog = catalogs.diet_catalog
+    matcher, error = _plan_matcher(user_profile_data)
+    if error: return error
+    rng = np.random.default_rng(seed)
+    used_names_for_week = np.zeros(len(diet_catalog.name_labels), dtype=bool)
+    other_days = np.delete(plan_ids, day_num, axis=0)
+    used_names_for_week[diet_catalog.name_codes[other_days[other_days >= 0]]] = True
     target_calories_total = user_profile_data.get('target_calories', 2000)
-    calorie_dist = {'breakfast': 0.25, 'lunch': 0.40, 'dinner': 0.35}
-    daily_meals_options = {meal: [] for meal in calorie_dist}
-    recipes_used_this_day = set()
-    recipe_name_column = 'Recipe_name' # Ensure this column exists in your CSV
-
-    for meal_type, proportion in calorie_dist.items():
-        target_meal_calories = target_calories_total * proportion
-        tolerance_percentage = 0.35
-
-        # Filter candidates: not used this day AND not used recently in the week (more strictly)
-        candidates = available_recipes_df[
-            ~available_recipes_df[recipe_name_column].isin(recipes_used_this_day) &
-            ~available_recipes_df[recipe_name_column].isin(used_recipes_for_week_set)
-        ].copy()
-        if candidates.empty: # Fallback 1: Not used this day
-            candidates = available_recipes_df[~available_recipes_df[recipe_name_column].isin(recipes_used_this_day)].copy()
-        if candidates.empty: # Fallback 2: Any available (may repeat from week)
-            candidates = available_recipes_df.copy()
-
-        for _ in range(num_options_per_meal):
-            if candidates.empty: break
-
-            # Filter out already selected options for this meal type
-            current_selection_pool = candidates[~candidates[recipe_name_column].isin(
-                [opt['name'] for opt in daily_meals_options[meal_type]]
-            )].copy()
-            if current_selection_pool.empty: break
-
-            current_selection_pool['calorie_diff'] = abs(current_selection_pool['Calories'] - target_meal_calories)
-
-            # Prioritize dishes within tolerance
-            potential_dishes = current_selection_pool[current_selection_pool['calorie_diff'] <= (target_meal_calories * tolerance_percentage)]
-
-            chosen_dish_series = None
-            if not potential_dishes.empty:
-                chosen_dish_series = potential_dishes.sort_values(by='calorie_diff').sample(n=1, replace=False, random_state=random.randint(1,10000)).iloc[0]
-            elif not current_selection_pool.empty: # If no dish within tolerance, pick the closest one
-                chosen_dish_series = current_selection_pool.sort_values(by='calorie_diff').sample(n=1, replace=False, random_state=random.randint(1,10000)).iloc[0]
-
-            if chosen_dish_series is not None:
-                actual_recipe_name = chosen_dish_series[recipe_name_column]
-                recipes_used_this_day.add(actual_recipe_name)
-                daily_meals_options[meal_type].append({
-                    "name": str(actual_recipe_name),
-                    "calories": int(chosen_dish_series.get('Calories', 0)),
-                    "protein": int(chosen_dish_series.get('Protein', 0)),
-                    "carbs": int(chosen_dish_series.get('Carbs', 0)),
-                    "fat": int(chosen_dish_series.get('Fat', 0)),
-                    "cuisine": str(chosen_dish_series.get('Cuisine', 'N/A'))
-                })
-            else: break # No suitable dish found
-
-        if not daily_meals_options[meal_type]: # Fallback if no options found
-            daily_meals_options[meal_type] = [{"name": "N/A - More variety needed", "calories": 0, "protein": 0, "carbs": 0, "fat": 0, "cuisine": "N/A"}]
 
-    day_total_calories = sum(meal_options[0]['calories'] for meal_options in daily_meals_options.values() if meal_options and meal_options[0]['calories'] > 0)
-    return {"meals": daily_meals_options, "total_calories_for_day": day_total_calories}, recipes_used_this_day
-
-def generate_weekly_diet_plan(user_profile_data, num_options_per_meal_per_day=1):
-    global diet_df
-    if diet_df is None or diet_df.empty: app.logger.error("Diet DataFrame is None or empty for weekly plan."); return {"error": "Diet data not available."}
-
-    base_df = diet_df.copy()
-    recipe_name_column = 'Recipe_name'
-    required_cols = [recipe_name_column, 'Calories', 'Protein', 'Carbs', 'Fat', 'Cuisine', 'Diet_type']
-    if not all(col in base_df.columns for col in required_cols):
-        missing = [col for col in required_cols if col not in base_df.columns]
-        return {"error": f"Diet data incomplete (missing: {', '.join(missing)})."}
-
-    base_df.dropna(subset=required_cols, inplace=True)
-    for col in ['Calories', 'Protein', 'Carbs', 'Fat']:
-        base_df[col] = pd.to_numeric(base_df[col], errors='coerce').fillna(0).astype(int)
-    base_df = base_df[base_df['Calories'] > 50]
-    if base_df.empty: return {"error": "No suitable food items after cleaning."}
-
-    diet_pref = user_profile_data.get('diet_preference', 'any').lower()
-    preferred_cuisines_str = user_profile_data.get('preferred_cuisines', "")
-    preferred_cuisines_list = [c.strip().lower() for c in preferred_cuisines_str.split(',') if c.strip()] if preferred_cuisines_str else []
-
-    filtered_df = base_df.copy()
-    if diet_pref != 'any':
-        if diet_pref == 'vegetarian': filtered_df = filtered_df[filtered_df['Diet_type'].str.lower().isin(['vegetarian', 'vegan'])]
-        elif diet_pref == 'vegan': filtered_df = filtered_df[filtered_df['Diet_type'].str.lower() == 'vegan']
-        elif diet_pref == 'non-vegetarian': filtered_df = filtered_df[~filtered_df['Diet_type'].str.lower().isin(['vegetarian', 'vegan'])]
-
-    if filtered_df.empty: app.logger.warning(f"No items for diet_pref '{diet_pref}', using base pool."); filtered_df = base_df.copy()
-
-    if preferred_cuisines_list:
-        cuisine_filtered = filtered_df[filtered_df['Cuisine'].notna() & filtered_df['Cuisine'].astype(str).str.lower().isin(preferred_cuisines_list)]
-        if not cuisine_filtered.empty: available_recipes_df = cuisine_filtered.copy()
-        else: app.logger.warning("No items for preferred cuisines, using diet_pref pool."); available_recipes_df = filtered_df.copy()
-    else: available_recipes_df = filtered_df.copy()
-
-    if available_recipes_df.empty or len(available_recipes_df) < 7: # Need some variety
-        return {"error": "Not enough diverse food items for your preferences."}
-
-    app.logger.info(f"Generating weekly plan with {len(available_recipes_df)} recipes.")
-    weekly_plan = []; used_recipes_overall = set()
-    for day_num in range(7):
-        app.logger.debug(f"Generating for Day {day_num + 1}")
-        # Shuffle available recipes daily for more variety if the pool is small
-        shuffled_df = available_recipes_df.sample(frac=1, random_state=day_num).reset_index(drop=True)
-        daily_diet, recipes_this_day = _generate_single_day_diet(
-            user_profile_data, shuffled_df, used_recipes_overall, num_options_per_meal_per_day
-        )
-        weekly_plan.append({"day": day_num + 1, "daily_summary": daily_diet})
-        used_recipes_overall.update(recipes_this_day)
-
-    if not weekly_plan or all(not day_data["daily_summary"]["meals"] for day_data in weekly_plan):
-        return {"error": "Could not generate any valid daily plans."}
-    return {"weekly_diet_plan": weekly_plan}
+    if meal_type is None:
+        plan_ids[day_num], _ = _generate_single_day_diet(user_profile_data, matcher, used_names_for_week, plan_ids.shape[2], rng)
+        return None
+
+    meal_num = list(MEAL_CALORIE_DISTRIBUTION).index(meal_type)
+    # The rest of the day and the meal being swapped out both count as "used this day"
+    day_ids = plan_ids[day_num]
+    used_names_this_day = np.zeros_like(used_names_for_week)
+    used_names_this_day[diet_catalog.name_codes[day_ids[day_ids >= 0]]] = True
+    chosen_ids = pick_meal(matcher, target_calories_total * MEAL_CALORIE_DISTRIBUTION[meal_type], used_names_this_day, used_names_for_week, plan_ids.shape[2], rng)
+    plan_ids[day_num, meal_num] = -1
+    plan_ids[day_num, meal_num, :len(chosen_ids)] = chosen_ids
+    return None
+
+# --- Weekly Plan Storage & Cache ---
+# The current week's plan is persisted per user (WeeklyPlan) and plan ids are cached in memory keyed by
+# profile fingerprint and the user's weekly_plan version. Every WeeklyPlan write bumps that version, so
+# no worker serves a plan another one has replaced; local writes also drop the user's cache entries.
+weekly_plan_cache = TTLCache(maxsize=app.config['PLAN_CACHE_SIZE'], ttl=app.config['PLAN_CACHE_TTL_SECONDS'])
+
+def plan_week_start(for_date=None):
+    for_date = for_date or date.today(); return for_date - timedelta(days=for_date.weekday())
+
+def plan_week_seed(user_id, for_date=None):
+    # Stable across processes and restarts: same user + same ISO week -> same seed
+    iso_year, iso_week, _ = (for_date or date.today()).isocalendar()
+    digest = hashlib.blake2b(f"{user_id}:{iso_year}-W{iso_week:02d}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+def weekly_plan_cache_key(user_profile_data, num_options_per_meal_per_day, seed):
+    diet_pref, cuisines = RecipeCatalog.pool_key(user_profile_data.get('diet_preference'), user_profile_data.get('preferred_cuisines'))
+    return (int(user_profile_data.get('target_calories', 2000)), diet_pref, cuisines, num_options_per_meal_per_day, seed)
+
+def _plan_inputs_fingerprint(user_profile_data, num_options_per_meal_per_day):
+    target, diet_pref, cuisines, num_options, _ = weekly_plan_cache_key(user_profile_data, num_options_per_meal_per_day, None)
+    return f"{target}|{diet_pref}|{','.join(cuisines)}|{num_options}"
+
+def find_weekly_plan(user_id, user_profile_data, num_options_per_meal_per_day=1):
+    # (this week's WeeklyPlan row or None, whether that row still matches the profile and catalog)
+    row = WeeklyPlan.query.filter_by(user_id=user_id, week_start=plan_week_start()).first()
+    current = (row is not None and row.inputs_fingerprint == _plan_inputs_fingerprint(user_profile_data, num_options_per_meal_per_day)
+               and row.catalog_fingerprint == catalogs.diet_catalog.fingerprint)
+    return row, current
+
+def save_weekly_plan(user_id, user_profile_data, num_options_per_meal_per_day, plan_ids, row=None):
+    # Stores plan_ids as this week's plan (row: the existing one, if already loaded). (row, error)
+    week_start = plan_week_start()
+    if row is None: row = WeeklyPlan.query.filter_by(user_id=user_id, week_start=week_start).first()
+    if row is None:
+        row = WeeklyPlan(user_id=user_id, week_start=week_start); db.session.add(row)
+    row.set_recipe_ids(plan_ids)
+    row.inputs_fingerprint = _plan_inputs_fingerprint(user_profile_data, num_options_per_meal_per_day); row.catalog_fingerprint = catalogs.diet_catalog.fingerprint
+    row.updated_at = datetime.utcnow()
+    try: bump_data_version(user_id, 'weekly_plan'); db.session.commit() # The bump's UPDATE flushes the row, so a duplicate week fails here
+    except IntegrityError: # Another request stored this week's plan first; use theirs
+        db.session.rollback()
+        row = WeeklyPlan.query.filter_by(user_id=user_id, week_start=week_start).first()
+        if row is None: return None, "Could not store weekly plan."
+    weekly_plan_cache.invalidate_tag(user_id)
+    return row, None
+
+def load_weekly_plan(user_id, user_profile_data, num_options_per_meal_per_day=1, regenerate=False):
+    # (WeeklyPlan row for this week, error). A missing or stale row (profile or catalog changed) is
+    # regenerated from the week seed; regenerate=True always draws a fresh, unseeded plan.
+    row, current = find_weekly_plan(user_id, user_profile_data, num_options_per_meal_per_day)
+    if current and not regenerate: return row, None
+
+    plan_ids, error = generate_weekly_plan_ids(user_profile_data, num_options_per_meal_per_day, seed=None if regenerate else plan_week_seed(user_id))
+    if error: return None, error
+    return save_weekly_plan(user_id, user_profile_data, num_options_per_meal_per_day, plan_ids, row=row)
+
+def _stored_plan_cache_key(user_id, user_profile_data, num_options_per_meal_per_day):
+    # Version read first: a write racing the load can only leave a newer plan under an older key
+    return weekly_plan_cache_key(user_profile_data, num_options_per_meal_per_day, plan_week_seed(user_id)) + (data_version(user_id, 'weekly_plan'),)
+
+def get_cached_weekly_plan_ids(user_id, user_profile_data, num_options_per_meal_per_day=1):
+    # (plan_ids, error) for this week's plan. The cache holds the read-only id array, not rendered
+    # dicts, so a cached plan costs a few hundred bytes; it is rendered per response.
+    key = _stored_plan_cache_key(user_id, user_profile_data, num_options_per_meal_per_day)
+    plan_ids = weekly_plan_cache.get(key)
+    if plan_ids is None:
+        row, error = load_weekly_plan(user_id, user_profile_data, num_options_per_meal_per_day)
+        if error: return None, error
+        plan_ids = row.recipe_id_array(); plan_ids.setflags(write=False)
+        weekly_plan_cache.set(key, plan_ids, tags=(user_id,))
+    return plan_ids, None
+
+class WeeklyPlanError(Exception):
+    pass
+
+def iter_weekly_plan_days(user_id, user_profile_data, num_options_per_meal_per_day=1, regenerate=False):
+    # This week's plan one day at a time, each shaped like an entry of render_weekly_plan's list.
+    # A cached or stored plan is replayed; otherwise each day is yielded as soon as it is generated
+    # and the finished week is stored as load_weekly_plan would. Raises WeeklyPlanError.
+    seed = None if regenerate else plan_week_seed(user_id)
+    if not regenerate:
+        plan_ids = weekly_plan_cache.get(_stored_plan_cache_key(user_id, user_profile_data, num_options_per_meal_per_day))
+        if plan_ids is None:
+            row, current = find_weekly_plan(user_id, user_profile_data, num_options_per_meal_per_day)
+            if current: plan_ids = row.recipe_id_array()
+        if plan_ids is not None:
+            for day_num, day_ids in enumerate(plan_ids): yield {"day": day_num + 1, "daily_summary": render_daily_diet(day_ids)}
+            return
+    else: row = None
+
+    matcher, error = _plan_matcher(user_profile_data)
+    if error: raise WeeklyPlanError(error)
+    plan_ids = np.full((7, len(MEAL_CALORIE_DISTRIBUTION), num_options_per_meal_per_day), -1, dtype=np.int32)
+    for day_num, day_ids in iter_weekly_plan_ids(user_profile_data, matcher, num_options_per_meal_per_day, np.random.default_rng(seed)):
+        plan_ids[day_num] = day_ids
+        yield {"day": day_num + 1, "daily_summary": render_daily_diet(day_ids)}
+    _, error = save_weekly_plan(user_id, user_profile_data, num_options_per_meal_per_day, plan_ids, row=row)
+    if error: raise WeeklyPlanError(error)
+
+# Async variant: the plan is computed on these workers while the request returns a job id at once
+class PlanJobStore:
+    # PlanJobRunner's store: plan_job_record rows, in their own app context and session so a save from
+    # a request thread never commits that request's pending changes
+    def save(self, job):
+        state = job.state()
+        try:
+            with app.app_context():
+                db.session.merge(PlanJobRecord(id=state['id'], user_id=state['owner'], status=state['status'], days=json.dumps(state['days']),
+                                               result=None if state['result'] is None else json.dumps(state['result']), error=state['error'],
+                                               created_at=state['created_at'], finished_at=state['finished_at']))
+                db.session.commit()
+        except Exception as e: app.logger.error(f"Error saving plan job {state['id']}: {e}", exc_info=True)
+
+    def load(self, job_id):
+        try:
+            with app.app_context(): record = db.session.get(PlanJobRecord, job_id)
+        except Exception as e: app.logger.error(f"Error loading plan job {job_id}: {e}", exc_info=True); return None
+        if record is None: return None
+        return {"id": record.id, "owner": record.user_id, "status": record.status, "days": json.loads(record.days),
+                "result": None if record.result is None else json.loads(record.result), "error": record.error,
+                "created_at": record.created_at, "finished_at": record.finished_at}
+
+    def purge(self, before):
+        # Jobs finished before `before`, and unfinished ones created before it (their process went away)
+        try:
+            with app.app_context():
+                PlanJobRecord.query.filter(db.or_(PlanJobRecord.finished_at < before, db.and_(PlanJobRecord.finished_at.is_(None), PlanJobRecord.created_at < before))).delete(synchronize_session=False)
+                db.session.commit()
+        except Exception as e: app.logger.error(f"Error purging plan jobs: {e}", exc_info=True)
+
+plan_jobs = PlanJobRunner(max_workers=app.config['PLAN_JOB_WORKERS'], max_pending=app.config['PLAN_JOB_MAX_PENDING'], ttl=app.config['PLAN_JOB_TTL_SECONDS'],
+                          store=PlanJobStore())
+
+def submit_weekly_plan_job(user_id, user_profile_data, regenerate=False):
+    def work(job):
+        with app.app_context():
+            for day in iter_weekly_plan_days(user_id, user_profile_data, regenerate=regenerate): job.add_day(day)
+        return {"weekly_diet_plan": job.days}
+    return plan_jobs.submit(user_id, work)
+
+MAX_BATCH_PLAN_USERS = 10000
+
+@metrics.timed(PLAN_FUNCTION_SECONDS, 'generate_weekly_diet_plans_batch')
+@plan_sampler.track
+def generate_weekly_diet_plans_batch(user_profiles, num_options_per_meal_per_day=1):
+    # Plans for many users in one call. Profiles are grouped by recipe pool so each group shares
+    # one CalorieMatcher, and with one option per meal every (day, meal) step is picked for the
+    # whole group at once. Returns one result per profile, in order, shaped like generate_weekly_diet_plan's.
+    diet_catalog = catalogs.diet_catalog
+    if diet_catalog.error: app.logger.error(f"Recipe catalog unavailable for batch plans: {diet_catalog.error}"); return [{"error": diet_catalog.error} for _ in user_profiles]
+
+    groups = {}
+    for idx, profile in enumerate(user_profiles):
+        groups.setdefault(diet_catalog.pool_key(profile.get('diet_preference'), profile.get('preferred_cuisines')), []).append(idx)
+
+    results = [None] * len(user_profiles)
+    rng = np.random.default_rng()
+    for pool_key, members in groups.items():
+        matcher = diet_catalog.matcher(*pool_key)
+        if len(matcher) < 7:
+            for idx in members: results[idx] = {"error": "Not enough diverse food items for your preferences."}
+            continue
+        if num_options_per_meal_per_day != 1: # Multi-option plans go through the per-user path
+            for idx in members: results[idx] = generate_weekly_diet_plan(user_profiles[idx], num_options_per_meal_per_day)
+            continue
+
+        targets = np.array([user_profiles[idx].get('target_calories', 2000) for idx in members], dtype=float)
+        meals_per_day = len(MEAL_CALORIE_DISTRIBUTION)
+        plan_ids = np.full((len(members), 7, meals_per_day, 1), -1, dtype=np.int32)
+        used_week = np.full((len(members), 7 * meals_per_day), -1, dtype=np.int32) # Name codes, -1 padded
+        for day_num in range(7):
+            used_day = np.full((len(members), meals_per_day), -1, dtype=np.int32)
+            for meal_num, proportion in enumerate(MEAL_CALORIE_DISTRIBUTION.values()):
+                meal_targets = targets * proportion
+                chosen = matcher.pick_many(meal_targets, np.concatenate([used_week, used_day], axis=1), rng)
+                relax = np.flatnonzero(chosen < 0) # Same fallback order as pick_meal
+                if len(relax): chosen[relax] = matcher.pick_many(meal_targets[relax], used_day[relax], rng)
+                relax = np.flatnonzero(chosen < 0)
+                if len(relax): chosen[relax] = matcher.pick_many(meal_targets[relax], used_day[relax, :0], rng)
+                picked = np.flatnonzero(chosen >= 0)
+                used_day[picked, meal_num] = diet_catalog.name_codes[chosen[picked]]
+                plan_ids[:, day_num, meal_num, 0] = chosen
+            used_week[:, day_num * meals_per_day:(day_num + 1) * meals_per_day] = used_day
+        for member, idx in enumerate(members): results[idx] = render_weekly_plan(plan_ids[member])
+
+    app.logger.info(f"Generated {len(user_profiles)} weekly plans across {len(groups)} recipe pools.")
+    return results
 
 # --- Workout Recommendation Logic ---
-def recommend_workouts_logic(user_goal, bmi_category):
-    # Expanded list of workouts
-    all_workouts_full = [
-        {"name": "Push-ups", "type": "strength", "target": "Chest, Shoulders, Triceps", "duration_suggestion": "3 sets of AMRAP", "difficulty": "Intermediate"},
-        {"name": "Squats (Bodyweight)", "type": "strength", "target": "Quads, Glutes, Hamstrings", "duration_suggestion": "3 sets of 12-15 reps", "difficulty": "Beginner"},
-        {"name": "Plank", "type": "core", "target": "Core", "duration_suggestion": "3 sets, hold 30-60s", "difficulty": "Beginner"},
-        {"name": "Lunges (Bodyweight)", "type": "strength", "target": "Quads, Glutes", "duration_suggestion": "3 sets of 10-12 reps per leg", "difficulty": "Beginner"},
-        {"name": "Burpees", "type": "cardio", "target": "Full Body", "duration_suggestion": "3 sets of 8-12 reps", "difficulty": "Intermediate"},
-        {"name": "Jumping Jacks", "type": "cardio", "target": "Full Body", "duration_suggestion": "3-5 minutes", "difficulty": "Beginner"},
-        {"name": "Running/Jogging (Moderate Pace)", "type": "cardio", "target": "Cardiovascular, Legs", "duration_suggestion": "20-30 minutes", "difficulty": "Beginner-Intermediate"},
-        {"name": "Cycling (Moderate Intensity)", "type": "cardio", "target": "Legs, Cardiovascular", "duration_suggestion": "30-45 minutes", "difficulty": "Beginner-Intermediate"},
-        {"name": "Bicep Curls (Dumbbells/Resistance Band)", "type": "strength", "target": "Biceps", "duration_suggestion": "3 sets of 10-15 reps", "difficulty": "Beginner"},
-        {"name": "Overhead Press (Dumbbells/Resistance Band)", "type": "strength", "target": "Shoulders, Triceps", "duration_suggestion": "3 sets of 10-15 reps", "difficulty": "Beginner"},
-        {"name": "Bent-Over Rows (Dumbbells/Resistance Band)", "type": "strength", "target": "Back, Biceps", "duration_suggestion": "3 sets of 10-15 reps", "difficulty": "Beginner"},
-        {"name": "Crunches", "type": "core", "target": "Upper Abs", "duration_suggestion": "3 sets of 15-20 reps", "difficulty": "Beginner"},
-        {"name": "Leg Raises (Lying)", "type": "core", "target": "Lower Abs", "duration_suggestion": "3 sets of 15-20 reps", "difficulty": "Beginner"},
-        {"name": "Bird-Dog", "type": "core", "target": "Core Stability, Back", "duration_suggestion": "3 sets of 10-12 reps per side", "difficulty": "Beginner"},
-        {"name": "Glute Bridges", "type": "strength", "target": "Glutes, Hamstrings", "duration_suggestion": "3 sets of 15-20 reps", "difficulty": "Beginner"},
-        {"name": "Yoga Flow (Beginner)", "type": "flexibility", "target": "Full Body", "duration_suggestion": "20-30 minutes", "difficulty": "Beginner"},
-        {"name": "Stretching Routine", "type": "flexibility", "target": "Major Muscle Groups", "duration_suggestion": "10-15 minutes post-workout", "difficulty": "Beginner"},
-        {"name": "High-Intensity Interval Training (HIIT) - Bodyweight", "type": "cardio", "target": "Full Body, Fat Loss", "duration_suggestion": "15-20 mins (e.g., 30s work, 30s rest)", "difficulty": "Intermediate"},
-        {"name": "Walking (Brisk)", "type": "cardio", "target": "General Fitness", "duration_suggestion": "30-60 minutes", "difficulty": "Beginner"},
-    ]
-    recommendations = []; goal_lower = user_goal.lower() if user_goal else "maintenance"
-
-    # Simplified selection logic for brevity, can be made more sophisticated
-    if goal_lower == 'muscle_gain':
-        strength_workouts = [w for w in all_workouts_full if w['type'] == 'strength']
-        core_workouts = [w for w in all_workouts_full if w['type'] == 'core']
-        if strength_workouts: recommendations.extend(random.sample(strength_workouts, k=min(3, len(strength_workouts))))
-        if core_workouts: recommendations.extend(random.sample(core_workouts, k=min(2, len(core_workouts))))
-    elif goal_lower == 'weight_loss':
-        cardio_workouts = [w for w in all_workouts_full if w['type'] == 'cardio']
-        strength_core_workouts = [w for w in all_workouts_full if w['type'] in ['strength', 'core']]
-        if cardio_workouts: recommendations.extend(random.sample(cardio_workouts, k=min(2, len(cardio_workouts))))
-        if strength_core_workouts: recommendations.extend(random.sample(strength_core_workouts, k=min(3, len(strength_core_workouts))))
-    elif goal_lower == 'endurance':
-        cardio_workouts = [w for w in all_workouts_full if w['type'] == 'cardio']
-        if cardio_workouts: recommendations.extend(random.sample(cardio_workouts, k=min(4, len(cardio_workouts))))
-        # Add a core workout for endurance
-        core_w = next((w for w in all_workouts_full if w['type'] == 'core'), None)
-        if core_w and len(recommendations) < 5 : recommendations.append(core_w)
-    else: # Maintenance or other
-        if all_workouts_full: recommendations = random.sample(all_workouts_full, k=min(5, len(all_workouts_full)))
-
-    # Ensure uniqueness and limit to 5
-    seen_names = set(); unique_recs = []
+def recommend_workouts_logic(user_goal, bmi_category, gender=None, age=None, weight_kg=None):
+    # Catalog picks for the goal, each with the calorie burn the fitness dataset predicts for this
+    # user's segment (gender, age band, BMI category); weight loss lists the highest-burn picks first.
+    workout_model = catalogs.workout_model
+    recommendations = catalogs.exercise_catalog.recommend(user_goal)
+    segment = workout_model.segment(gender, age, bmi_category)
     for rec in recommendations:
-        if rec['name'] not in seen_names:
-            unique_recs.append(rec)
-            seen_names.add(rec['name'])
-
-    final_recs = unique_recs[:5] # Take up to 5 unique recommendations
-
-    # If less than 3, try to add some general ones to reach at least 3 if possible
-    if len(final_recs) < 3 and len(all_workouts_full) >=3:
-        general_fill = [w for w in all_workouts_full if w['name'] not in seen_names]
-        if general_fill:
-            final_recs.extend(random.sample(general_fill, k=min(3 - len(final_recs), len(general_fill))))
+        per_minute = workout_model.calories_per_minute(workout_model.resolve_workout_type(rec['name'], rec['type']), segment, weight_kg)
+        rec['estimated_calories_per_minute'] = round(per_minute, 1) if per_minute is not None else None
+    if (user_goal or '').lower() == 'weight_loss':
+        recommendations.sort(key=lambda rec: rec['estimated_calories_per_minute'] or 0, reverse=True)
+    return recommendations
 
-    return final_recs
+def estimate_workout_calories(user, exercise_name, duration_minutes):
+    # Calories for a logged workout the client sent without calories_burned (None if no estimate is possible)
+    workout_model = catalogs.workout_model
+    exercise = catalogs.exercise_catalog.by_name.get((exercise_name or '').strip().lower())
+    workout_type = workout_model.resolve_workout_type(exercise_name, exercise.type if exercise else None)
+    segment = workout_model.segment(user.gender, user.age, user.metrics()['bmi_category'])
+    return workout_type, workout_model.estimate_calories(workout_type, segment, user.weight_kg, duration_minutes)
 
 
 # --- API Routes ---
 @app.route('/')
 def api_root_info(): return jsonify({"message": "Welcome to the AI Gym Trainer API! Backend is running."})
 
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    # 200 once the datasets are loaded and indexed; 503 while they are still warming (or failed to load)
+    status = catalogs.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
 @app.route('/api/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -396,7 +1003,7 @@ def login():
     # Hardcoded Admin Check (should ideally be based on a flag in the DB)
     if username == "Mokshitha" and password == "123456":
         # Check if admin user exists, create if not (for first-time setup)
-        admin_user = User.query.filter_by(username="Mokshitha").first()
+        admin_user = user # Same username, so the lookup above already found it (or not)
         if not admin_user:
             admin_user = User(username="Mokshitha", is_admin_user=True)
             admin_user.set_password("123456") # Set password
@@ -424,8 +1031,9 @@ def login():
         # If admin exists and password matches the hardcoded one
         if not admin_user.is_admin_user: # Ensure the DB flag is also set
             admin_user.is_admin_user = True
-            db.session.commit()
+        if admin_user.upgrade_password_hash(password) or db.session.dirty: db.session.commit()
 
+        user_session_cache.set(admin_user.id, UserSnapshot(admin_user)) # Fresh snapshot for the session's next requests
         login_user(admin_user, remember=True, duration=timedelta(days=7))
         app.logger.info(f"Admin User '{admin_user.username}' logged in successfully.")
         return jsonify({
@@ -435,6 +1043,8 @@ def login():
 
     # Regular user login
     if user and user.check_password(password):
+        if user.upgrade_password_hash(password): db.session.commit()
+        user_session_cache.set(user.id, UserSnapshot(user)) # Fresh snapshot for the session's next requests
         login_user(user, remember=True, duration=timedelta(days=7))
         app.logger.info(f"User '{user.username}' logged in successfully.")
         return jsonify({
@@ -449,20 +1059,28 @@ def login():
 @login_required
 def logout():
     user_name = current_user.username
+    user_session_cache.delete(current_user.id)
     logout_user()
     app.logger.info(f"User '{user_name}' logged out successfully.")
     session.clear() # Explicitly clear session for good measure
     return jsonify({"message": "Logged out successfully"}), 200
 
+def _weekly_plan_inputs(user):
+    # The profile fields a cached weekly plan depends on
+    return (user.metrics()['target_daily_calories'], RecipeCatalog.pool_key(user.diet_preference, user.preferred_cuisines))
+
 @app.route('/api/user_profile', methods=['GET', 'PUT'])
 @login_required
+@conditional_get('profile')
 def user_profile():
     user = current_user
 
     if request.method == 'PUT':
+        user = db.session.get(User, current_user.id) # current_user is a read-only snapshot
         data = request.get_json()
         if not data: return jsonify({"message": "No input data provided for update"}), 400
 
+        plan_inputs_before = _weekly_plan_inputs(user)
         try:
             # Validate and update fields
             if 'age' in data:
@@ -484,13 +1102,12 @@ def user_profile():
             if 'goals' in data: user.goals = data['goals']
             if 'preferred_cuisines' in data: user.preferred_cuisines = data.get('preferred_cuisines', '').strip()
 
-            db.session.commit()
+            db.session.commit() # Stored metrics are refreshed on flush if an input changed
+            user_session_cache.delete(user.id)
             app.logger.info(f"User profile updated for {user.username}")
+            if _weekly_plan_inputs(user) != plan_inputs_before: weekly_plan_cache.invalidate_tag(user.id)
 
             # Return the full updated profile including calculated values
-            bmi = calculate_bmi(user.weight_kg, user.height_cm); bmi_category = get_bmi_category(bmi)
-            bmr = calculate_bmr(user.weight_kg, user.height_cm, user.age, user.gender); tdee = calculate_tdee(bmr, user.activity_level)
-            target_calories = get_target_calories(tdee, user.goals)
             return jsonify({
                 "message": "Profile updated successfully!",
                 "user_profile": {
@@ -498,8 +1115,7 @@ def user_profile():
                     "height_cm": user.height_cm, "weight_kg": user.weight_kg,
                     "diet_preference": user.diet_preference, "activity_level": user.activity_level,
                     "goals": user.goals, "preferred_cuisines": user.preferred_cuisines or "",
-                    "bmi": bmi, "bmi_category": bmi_category, "bmr": bmr, "tdee": tdee,
-                    "target_daily_calories": target_calories, "is_admin": user.is_admin_user
+                    **user.metrics(), "is_admin": user.is_admin_user
                 }
             }), 200
         except ValueError as e:
@@ -511,122 +1127,618 @@ def user_profile():
             return jsonify({"message": "Profile update failed due to a server error."}), 500
 
     # GET request
-    bmi = calculate_bmi(user.weight_kg, user.height_cm); bmi_category = get_bmi_category(bmi)
-    bmr = calculate_bmr(user.weight_kg, user.height_cm, user.age, user.gender); tdee = calculate_tdee(bmr, user.activity_level)
-    target_calories = get_target_calories(tdee, user.goals)
+    if (user.profile_version or 0) != g.data_version: # Changed by another process since this one cached the snapshot
+        user_session_cache.delete(user.id); user = load_user(user.id)
     return jsonify({
         "username": user.username, "age": user.age, "gender": user.gender,
         "height_cm": user.height_cm, "weight_kg": user.weight_kg,
         "diet_preference": user.diet_preference, "activity_level": user.activity_level,
-        "goals": user.goals, "bmi": bmi, "bmi_category": bmi_category,
-        "bmr": bmr, "tdee": tdee, "target_daily_calories": target_calories,
+        "goals": user.goals, **user.metrics(),
         "preferred_cuisines": user.preferred_cuisines or "",
         "is_admin": user.is_admin_user # Include admin status in profile GET
     }), 200
 
+def _diet_plan_profile(user):
+    return {'target_calories': user.metrics()['target_daily_calories'], 'diet_preference': user.diet_preference, 'preferred_cuisines': user.preferred_cuisines}
+
 @app.route('/api/weekly_diet_plan', methods=['GET'])
 @login_required
 def get_weekly_diet_plan():
     user = current_user
-    # Recalculate BMR/TDEE/Target based on current profile for diet generation
-    bmr = calculate_bmr(user.weight_kg, user.height_cm, user.age, user.gender)
-    tdee = calculate_tdee(bmr, user.activity_level)
-    target_calories = get_target_calories(tdee, user.goals)
-
-    user_profile_for_diet = {
-        'target_calories': target_calories,
-        'diet_preference': user.diet_preference,
-        'preferred_cuisines': user.preferred_cuisines
-    }
-    weekly_diet_plan_data = generate_weekly_diet_plan(user_profile_for_diet, num_options_per_meal_per_day=1) # Can increase num_options
-    if "error" in weekly_diet_plan_data: return jsonify(weekly_diet_plan_data), 400
-    return jsonify(weekly_diet_plan_data), 200
+    user_profile_for_diet = _diet_plan_profile(user)
+    if request.args.get('regenerate', '').lower() in ('1', 'true', 'yes'): # Fresh, unseeded plan replaces the stored one
+        row, error = load_weekly_plan(user.id, user_profile_for_diet, num_options_per_meal_per_day=1, regenerate=True)
+        plan_ids = None if error else row.recipe_id_array()
+    else: # This week's stored plan, served from cache on repeat loads
+        plan_ids, error = get_cached_weekly_plan_ids(user.id, user_profile_for_diet, num_options_per_meal_per_day=1) # Can increase num_options
+    if error: return jsonify({"error": error}), 400
+    return weekly_plan_response(plan_ids)
+
+# --- Streaming & async weekly plans ---
+# format=ndjson (default): one JSON object per line, each day as it is ready, then {"done": true, "days": N}
+# or {"error": ...}. format=sse: the same payloads as "day" / "done" / "error" Server-Sent Events.
+PLAN_STREAM_MIMETYPES = {'ndjson': 'application/x-ndjson', 'sse': 'text/event-stream'}
+
+def _plan_stream_response(days, fmt):
+    def encode(event, payload):
+        data = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        return f"event: {event}\ndata: {data}\n\n" if fmt == 'sse' else data + '\n'
+    def events():
+        count = 0
+        try:
+            for day in days: count += 1; yield encode('day', day)
+        except (WeeklyPlanError, TimeoutError) as e: yield encode('error', {"error": str(e)}); return
+        yield encode('done', {"done": True, "days": count})
+    return Response(stream_with_context(events()), mimetype=PLAN_STREAM_MIMETYPES[fmt], headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _plan_stream_format():
+    fmt = request.args.get('format', 'ndjson').lower()
+    return fmt if fmt in PLAN_STREAM_MIMETYPES else None
+
+def _wants_regenerate(value): return str(value).lower() in ('1', 'true', 'yes')
+
+@app.route('/api/weekly_diet_plan/stream', methods=['GET'])
+@login_required
+def stream_weekly_diet_plan():
+    fmt = _plan_stream_format()
+    if fmt is None: return jsonify({"message": f"format must be one of: {', '.join(PLAN_STREAM_MIMETYPES)}."}), 400
+    days = iter_weekly_plan_days(current_user.id, _diet_plan_profile(current_user), regenerate=_wants_regenerate(request.args.get('regenerate', '')))
+    return _plan_stream_response(days, fmt)
+
+@app.route('/api/weekly_diet_plan/jobs', methods=['POST'])
+@login_required
+def create_weekly_plan_job():
+    data = request.get_json(silent=True) or {}
+    job = submit_weekly_plan_job(current_user.id, _diet_plan_profile(current_user), regenerate=_wants_regenerate(data.get('regenerate', '')))
+    return jsonify({**job.as_dict(), "status_url": f"/api/weekly_diet_plan/jobs/{job.id}", "stream_url": f"/api/weekly_diet_plan/jobs/{job.id}/stream"}), 202
+
+@app.route('/api/weekly_diet_plan/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_weekly_plan_job(job_id):
+    job = plan_jobs.get(job_id, current_user.id)
+    if job is None: return jsonify({"message": "Plan job not found (it may have expired)."}), 404
+    return jsonify(job.as_dict()), 200
+
+@app.route('/api/weekly_diet_plan/jobs/<job_id>/stream', methods=['GET'])
+@login_required
+def stream_weekly_plan_job(job_id):
+    job = plan_jobs.get(job_id, current_user.id)
+    if job is None: return jsonify({"message": "Plan job not found (it may have expired)."}), 404
+    fmt = _plan_stream_format()
+    if fmt is None: return jsonify({"message": f"format must be one of: {', '.join(PLAN_STREAM_MIMETYPES)}."}), 400
+    def days():
+        yield from job.iter_days(timeout=app.config['PLAN_STREAM_TIMEOUT_SECONDS'])
+        if job.status == 'error': raise WeeklyPlanError(job.error)
+    return _plan_stream_response(days(), fmt)
+
+def _regenerate_stored_plan_slot(day, meal_type=None):
+    user = current_user
+    if not 1 <= day <= 7: return jsonify({"message": "Day must be between 1 and 7."}), 400
+    if meal_type is not None and meal_type not in MEAL_CALORIE_DISTRIBUTION:
+        return jsonify({"message": f"Meal type must be one of: {', '.join(MEAL_CALORIE_DISTRIBUTION)}."}), 400
+
+    user_profile_for_diet = _diet_plan_profile(user)
+    row, error = load_weekly_plan(user.id, user_profile_for_diet)
+    if error: return jsonify({"error": error}), 400
+
+    plan_ids = row.recipe_id_array()
+    error = regenerate_plan_slot(user_profile_for_diet, plan_ids, day - 1, meal_type)
+    if error: return jsonify({"error": error}), 400
+    row.set_recipe_ids(plan_ids); row.updated_at = datetime.utcnow()
+    try: bump_data_version(user.id, 'weekly_plan'); db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error saving regenerated plan for user {user.username}: {e}", exc_info=True)
+        return jsonify({"message": "Failed to save the regenerated plan due to a server error."}), 500
+    weekly_plan_cache.invalidate_tag(user.id)
+    return jsonify({"day": day, "daily_summary": render_daily_diet(plan_ids[day - 1])}), 200
+
+@app.route('/api/weekly_diet_plan/days/<int:day>/regenerate', methods=['POST'])
+@login_required
+def regenerate_weekly_plan_day(day):
+    return _regenerate_stored_plan_slot(day)
+
+@app.route('/api/weekly_diet_plan/days/<int:day>/meals/<meal_type>/regenerate', methods=['POST'])
+@login_required
+def regenerate_weekly_plan_meal(day, meal_type):
+    return _regenerate_stored_plan_slot(day, meal_type.lower())
+
+@app.route('/api/weekly_diet_plan/batch', methods=['POST'])
+@login_required
+def get_weekly_diet_plans_batch():
+    # Coach/admin endpoint: plans for a whole cohort in one call instead of one request per user
+    if not current_user.is_admin_user: return jsonify({"message": "Admin access required."}), 403
+    data = request.get_json()
+    if not data or not isinstance(data.get('user_ids'), list) or not data['user_ids']:
+        return jsonify({"message": "A non-empty 'user_ids' list is required."}), 400
+    try: user_ids = list(dict.fromkeys(int(uid) for uid in data['user_ids']))
+    except (ValueError, TypeError): return jsonify({"message": "user_ids must be integers."}), 400
+    if len(user_ids) > MAX_BATCH_PLAN_USERS: return jsonify({"message": f"At most {MAX_BATCH_PLAN_USERS} users per batch."}), 400
+
+    users = []
+    for start in range(0, len(user_ids), 900): # Stay under SQLite's bound-parameter limit
+        users.extend(User.query.filter(User.id.in_(user_ids[start:start + 900])).all())
+    profiles = [{'target_calories': u.metrics()['target_daily_calories'], 'diet_preference': u.diet_preference, 'preferred_cuisines': u.preferred_cuisines}
+                for u in users]
+    results = generate_weekly_diet_plans_batch(profiles, num_options_per_meal_per_day=1)
+
+    found_ids = {u.id for u in users}
+    return jsonify({
+        "plans": {str(u.id): result for u, result in zip(users, results)},
+        "missing_user_ids": [uid for uid in user_ids if uid not in found_ids]
+    }), 200
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@login_required
+def list_request_profiles():
+    if not current_user.is_admin_user: return jsonify({"message": "Admin access required."}), 403
+    return jsonify({"profiles": request_profiles.list()}), 200
+
+@app.route('/api/admin/profiles/<int:profile_id>', methods=['GET'])
+@login_required
+def download_request_profile(profile_id):
+    # Raw pstats data (pstats.Stats / snakeviz can open the file), or ?format=text for the top functions by cumulative time
+    if not current_user.is_admin_user: return jsonify({"message": "Admin access required."}), 403
+    entry = request_profiles.get(profile_id)
+    if entry is None: return jsonify({"message": "Profile not found (it may have been evicted)."}), 404
+    if request.args.get('format') == 'text':
+        return Response(ProfileStore.as_text(entry, sort=request.args.get('sort', 'cumulative')), mimetype='text/plain')
+    return Response(entry['data'], mimetype='application/octet-stream',
+                    headers={"Content-Disposition": f"attachment; filename=profile-{profile_id}-{entry['endpoint']}.prof"})
+
+@app.route('/api/admin/profiles/plan_flame', methods=['GET', 'DELETE'])
+@login_required
+def plan_flame_data():
+    # Collapsed stacks sampled from plan generation on live traffic (flamegraph.pl / speedscope input); DELETE clears them
+    if not current_user.is_admin_user: return jsonify({"message": "Admin access required."}), 403
+    if not plan_sampler.enabled: return jsonify({"message": "Plan sampling is disabled (set PLAN_SAMPLER_INTERVAL_MS)."}), 404
+    if request.method == 'DELETE': plan_sampler.reset(); return jsonify({"message": "Plan flame data cleared."}), 200
+    since = request.args.get('since_seconds', type=int)
+    return Response(''.join(f"{stack} {count}\n" for stack, count in plan_sampler.collapsed(since)), mimetype='text/plain')
 
 @app.route('/api/workout_recommendations', methods=['GET'])
 @login_required
 def get_workout_recommendations():
     user = current_user
-    bmi = calculate_bmi(user.weight_kg, user.height_cm); bmi_category = get_bmi_category(bmi)
-    workouts = recommend_workouts_logic(user.goals, bmi_category)
+    workouts = recommend_workouts_logic(user.goals, user.metrics()['bmi_category'], user.gender, user.age, user.weight_kg)
     return jsonify({"goal": user.goals, "workouts": workouts}), 200
 
 # --- Workout Log API Endpoints ---
-@app.route('/api/workout_logs', methods=['POST'])
-@login_required
-def log_workout():
-    data = request.get_json()
-    if not data: return jsonify({"message": "No data provided for workout log"}), 400
+MAX_BULK_WORKOUT_LOGS = 5000
 
+def _parse_workout_log(data):
+    # Validation shared by the single and bulk endpoints: (column values, None) or (None, error message)
+    if not isinstance(data, dict): return None, "Each workout entry must be a JSON object."
     exercise_name = data.get('exercise_name')
     duration_minutes_str = data.get('duration_minutes')
     calories_burned_str = data.get('calories_burned')
     log_date_str = data.get('log_date') # Expect YYYY-MM-DD from frontend
     feedback = data.get('feedback')
+    idempotency_key = data.get('idempotency_key')
 
-    if not exercise_name or not exercise_name.strip() or duration_minutes_str is None:
-        return jsonify({"message": "Exercise name and duration are required"}), 400
+    if not isinstance(exercise_name, str) or not exercise_name.strip() or duration_minutes_str is None:
+        return None, "Exercise name and duration are required"
+    if idempotency_key is not None and (not isinstance(idempotency_key, str) or not 0 < len(idempotency_key) <= 100):
+        return None, "idempotency_key must be a non-empty string of at most 100 characters."
 
     try:
         duration_minutes = int(duration_minutes_str)
         calories_burned = int(calories_burned_str) if calories_burned_str is not None else None
+    except (ValueError, TypeError): return None, "Invalid data type for duration or calories (must be numbers)."
+
+    log_date_to_save = date.today() # Default
+    if log_date_str:
+        try: log_date_to_save = datetime.strptime(log_date_str, '%Y-%m-%d').date()
+        except (ValueError, TypeError): app.logger.warning(f"Invalid date format '{log_date_str}' for workout log. Defaulting to today.")
+
+    if duration_minutes <= 0: return None, "Duration must be a positive number."
+    if calories_burned is not None and calories_burned < 0: return None, "Calories burned cannot be negative."
+    return {
+        'exercise_name': exercise_name.strip(), 'duration_minutes': duration_minutes, 'calories_burned': calories_burned,
+        'log_date': log_date_to_save, 'feedback': feedback.strip() if isinstance(feedback, str) and feedback else None,
+        'idempotency_key': idempotency_key
+    }, None
+
+def _already_logged_response(idempotency_key):
+    # The 200 for a retried entry whose idempotency_key is already stored, or None
+    existing = WorkoutLog.query.filter_by(user_id=current_user.id, idempotency_key=idempotency_key).first()
+    return (jsonify({"message": "Workout already logged.", "log": _workout_log_dict(existing)}), 200) if existing else None
+
+@app.route('/api/workout_logs', methods=['POST'])
+@login_required
+def log_workout():
+    data = request.get_json()
+    if not data: return jsonify({"message": "No data provided for workout log"}), 400
+
+    values, error = _parse_workout_log(data)
+    if error: return jsonify({"message": error}), 400
+    if values['calories_burned'] is None: _, values['calories_burned'] = estimate_workout_calories(current_user, values['exercise_name'], values['duration_minutes'])
+    if values['idempotency_key']: # A retry of an entry we already stored: return the original
+        already_logged = _already_logged_response(values['idempotency_key'])
+        if already_logged: return already_logged
 
-        log_date_to_save = date.today() # Default
-        if log_date_str:
-            try: log_date_to_save = datetime.strptime(log_date_str, '%Y-%m-%d').date()
-            except ValueError: app.logger.warning(f"Invalid date format '{log_date_str}' for workout log. Defaulting to today.")
-
-        if duration_minutes <= 0: return jsonify({"message": "Duration must be a positive number."}), 400
-        if calories_burned is not None and calories_burned < 0: return jsonify({"message": "Calories burned cannot be negative."}), 400
-
-        new_log = WorkoutLog(
-            user_id=current_user.id, exercise_name=exercise_name.strip(),
-            duration_minutes=duration_minutes, calories_burned=calories_burned,
-            log_date=log_date_to_save, feedback=feedback.strip() if feedback else None
-        )
-        db.session.add(new_log); db.session.commit()
-        app.logger.info(f"Workout logged for user {current_user.username}: {exercise_name}")
+    try:
+        if write_queue is not None: # Committed together with other requests' writes
+            new_log = WorkoutLog(id=_insert_with_version(WorkoutLog.__table__, dict(values, user_id=current_user.id), current_user.id, 'workout_logs'), user_id=current_user.id, **values)
+        else:
+            new_log = WorkoutLog(user_id=current_user.id, **values)
+            db.session.add(new_log); bump_data_version(current_user.id, 'workout_logs'); db.session.commit()
+        app.logger.info(f"Workout logged for user {current_user.username}: {values['exercise_name']}")
         return jsonify({
             "message": "Workout logged successfully!",
-            "log": {
-                "id": new_log.id, "exercise_name": new_log.exercise_name,
-                "duration_minutes": new_log.duration_minutes, "calories_burned": new_log.calories_burned,
-                "log_date": new_log.log_date.isoformat(), "feedback": new_log.feedback
-            }
+            "log": _workout_log_dict(new_log)
         }), 201
-    except ValueError: return jsonify({"message": "Invalid data type for duration or calories (must be numbers)."}), 400
+    except IntegrityError as e: # A concurrent retry with the same idempotency_key won the unique index race
+        db.session.rollback()
+        already_logged = _already_logged_response(values['idempotency_key']) if values['idempotency_key'] else None
+        if already_logged: return already_logged
+        app.logger.error(f"Error logging workout for user {current_user.username}: {e}", exc_info=True)
+        return jsonify({"message": "Failed to log workout due to a server error."}), 500
     except Exception as e:
         db.session.rollback()
         app.logger.error(f"Error logging workout for user {current_user.username}: {e}", exc_info=True)
         return jsonify({"message": "Failed to log workout due to a server error."}), 500
 
+def _read_bulk_entries(max_entries):
+    # JSON array, {"entries": [...]}, or NDJSON (one object per line). Unparseable NDJSON lines come
+    # back as None so they can be reported per row.
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        entries = []
+        for line in request.stream:
+            line = line.strip()
+            if not line: continue
+            try: entries.append(json.loads(line))
+            except ValueError: entries.append(None)
+            if len(entries) > max_entries: break
+        return entries
+    data = request.get_json(silent=True)
+    if isinstance(data, dict): data = data.get('entries')
+    return data if isinstance(data, list) else None
+
+@app.route('/api/workout_logs/bulk', methods=['POST'])
+@login_required
+def log_workouts_bulk():
+    # Replays from wearables/offline clients: every valid entry is inserted in one executemany and one
+    # commit; invalid entries are reported per row without failing the rest of the batch.
+    entries = _read_bulk_entries(MAX_BULK_WORKOUT_LOGS)
+    if entries is None: return jsonify({"message": "Expected a JSON array of workout entries or an NDJSON body."}), 400
+    if len(entries) > MAX_BULK_WORKOUT_LOGS: return jsonify({"message": f"At most {MAX_BULK_WORKOUT_LOGS} entries per request."}), 400
+
+    results = [None] * len(entries); rows = []; row_indexes = []
+    for index, entry in enumerate(entries):
+        values, error = _parse_workout_log(entry) if entry is not None else (None, "Invalid JSON.")
+        if error: results[index] = {"index": index, "status": "error", "message": error}; continue
+        if values['calories_burned'] is None: _, values['calories_burned'] = estimate_workout_calories(current_user, values['exercise_name'], values['duration_minutes'])
+        rows.append(dict(values, user_id=current_user.id)); row_indexes.append(index)
+
+    for attempt in range(2): # A concurrent retry of the same sync can win the unique index race once
+        keys = list({row['idempotency_key'] for row in rows if row['idempotency_key']})
+        seen_keys = set()
+        for start in range(0, len(keys), 900):
+            seen_keys.update(key for (key,) in db.session.query(WorkoutLog.idempotency_key).filter(
+                WorkoutLog.user_id == current_user.id, WorkoutLog.idempotency_key.in_(keys[start:start + 900])))
+        to_insert = []
+        for row, index in zip(rows, row_indexes):
+            key = row['idempotency_key']
+            if key and key in seen_keys: results[index] = {"index": index, "status": "duplicate"}; continue
+            if key: seen_keys.add(key)
+            to_insert.append(row); results[index] = {"index": index, "status": "created"}
+        try:
+            if to_insert: db.session.execute(WorkoutLog.__table__.insert(), to_insert); bump_data_version(current_user.id, 'workout_logs')
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt: return jsonify({"message": "Conflicting concurrent sync; please retry."}), 409
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error bulk logging workouts for user {current_user.username}: {e}", exc_info=True)
+            return jsonify({"message": "Failed to log workouts due to a server error."}), 500
+
+    summary = {status: sum(1 for r in results if r["status"] == status) for status in ("created", "duplicate", "error")}
+    app.logger.info(f"Bulk workout log for user {current_user.username}: {summary}")
+    return jsonify({"message": "Bulk workout log processed.", **summary, "results": results}), 200
+
+@app.route('/api/workout_estimate', methods=['GET'])
+@login_required
+def get_workout_estimate():
+    # What log_workout would fill in for calories_burned, so the form can show it before saving
+    exercise_name = (request.args.get('exercise_name') or '').strip()
+    duration_minutes = request.args.get('duration_minutes', type=int)
+    if not exercise_name or not duration_minutes or duration_minutes <= 0:
+        return jsonify({"message": "exercise_name and a positive duration_minutes are required."}), 400
+    workout_type, calories = estimate_workout_calories(current_user, exercise_name, duration_minutes)
+    return jsonify({"exercise_name": exercise_name, "workout_type": workout_type, "duration_minutes": duration_minutes, "estimated_calories_burned": calories}), 200
+
+WORKOUT_LOGS_DEFAULT_LIMIT = 100
+WORKOUT_LOGS_MAX_LIMIT = 1000
+
+def _workout_log_dict(log):
+    return {
+        "id": log.id, "exercise_name": log.exercise_name,
+        "duration_minutes": log.duration_minutes, "calories_burned": log.calories_burned,
+        "log_date": log.log_date.isoformat(), "feedback": log.feedback
+    }
+
+# GET /api/workout_logs selects just these columns and encodes the tuples directly; same JSON as _workout_log_dict
+WORKOUT_LOG_COLUMNS = tuple(WorkoutLog.__table__.c[name] for name in ('id', 'exercise_name', 'duration_minutes', 'calories_burned', 'log_date', 'feedback'))
+workout_log_rows = RowEncoder(WORKOUT_LOG_COLUMNS)
+
+def _workout_logs_response(rows):
+    if not plain_json_settings(app): return jsonify([_workout_log_dict(row) for row in rows])
+    return json_text_response(app, workout_log_rows.encode(rows))
+
+def _parse_iso_date(value): return datetime.strptime(value, '%Y-%m-%d').date()
+
+# Keyset cursor over (log_date desc, id desc): "<last log_date>.<last id>" of the previous page
+def _encode_log_cursor(log): return f"{log.log_date.isoformat()}.{log.id}"
+def _decode_log_cursor(cursor):
+    cursor_date, cursor_id = cursor.split('.'); return _parse_iso_date(cursor_date), int(cursor_id)
+
+def _stream_workout_logs(query, chunk_rows=500):
+    # Same body as the non-streamed response, written out in chunks while rows are fetched
+    yield '['
+    rows = iter(query.yield_per(chunk_rows)); first = True
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk: break
+        yield ('' if first else ',') + workout_log_rows.encode_items(chunk); first = False
+    yield ']\n'
+
 @app.route('/api/workout_logs', methods=['GET'])
 @login_required
+@conditional_get('workout_logs', vary_on_query=True)
 def get_workout_logs():
+    # Filters: from/to (YYYY-MM-DD, inclusive) or the older year/month[/day]; all become plain
+    # log_date range predicates so SQLite can use the (user_id, log_date, ...) index.
+    # Pagination: limit + cursor (next page cursor in the X-Next-Cursor header). export=1 streams everything.
     try:
         year = request.args.get('year', type=int); month = request.args.get('month', type=int); day = request.args.get('day', type=int)
-        query = WorkoutLog.query.filter_by(user_id=current_user.id)
+        date_from = date_to = None
         if year and month and day:
             if not (1 <= month <= 12 and 1 <= day <= 31): return jsonify({"message": "Invalid month or day parameter."}), 400
-            try: specific_date = date(year, month, day); query = query.filter(WorkoutLog.log_date == specific_date)
+            try: date_from = date_to = date(year, month, day)
             except ValueError: return jsonify({"message": "Invalid date constructed from year, month, day."}), 400
         elif year and month:
             if not (1 <= month <= 12): return jsonify({"message": "Invalid month parameter."}), 400
-            query = query.filter(db.extract('year', WorkoutLog.log_date) == year, db.extract('month', WorkoutLog.log_date) == month)
-
-        user_logs = query.order_by(WorkoutLog.log_date.desc(), WorkoutLog.id.desc()).all()
-        logs_data = [{
-            "id": log.id, "exercise_name": log.exercise_name,
-            "duration_minutes": log.duration_minutes, "calories_burned": log.calories_burned,
-            "log_date": log.log_date.isoformat(), "feedback": log.feedback
-        } for log in user_logs]
-        return jsonify(logs_data), 200
+            try: date_from = date(year, month, 1); date_to = (date_from + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            except (ValueError, OverflowError): return jsonify({"message": "Invalid year parameter."}), 400
+        try:
+            if request.args.get('from'): date_from = _parse_iso_date(request.args['from'])
+            if request.args.get('to'): date_to = _parse_iso_date(request.args['to'])
+        except ValueError: return jsonify({"message": "Invalid date format for from/to (expected YYYY-MM-DD)."}), 400
+
+        query = WorkoutLog.query.filter_by(user_id=current_user.id)
+        if date_from and date_to: query = query.filter(WorkoutLog.log_date.between(date_from, date_to))
+        elif date_from: query = query.filter(WorkoutLog.log_date >= date_from)
+        elif date_to: query = query.filter(WorkoutLog.log_date <= date_to)
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            try: cursor_date, cursor_id = _decode_log_cursor(cursor)
+            except ValueError: return jsonify({"message": "Invalid cursor."}), 400
+            # The leading log_date <= bound keeps this an index range scan; a bare OR is not sargable with bound params
+            query = query.filter(WorkoutLog.log_date <= cursor_date, db.or_(WorkoutLog.log_date < cursor_date, WorkoutLog.id < cursor_id))
+        query = query.order_by(WorkoutLog.log_date.desc(), WorkoutLog.id.desc()).with_entities(*WORKOUT_LOG_COLUMNS)
+
+        if request.args.get('export', '').lower() in ('1', 'true', 'yes'):
+            return Response(stream_with_context(_stream_workout_logs(query)), mimetype='application/json')
+
+        limit = request.args.get('limit', type=int)
+        if limit is None and not cursor: # Unpaginated, as the frontend has always requested it
+            return _workout_logs_response(query.all()), 200
+
+        limit = min(max(limit or WORKOUT_LOGS_DEFAULT_LIMIT, 1), WORKOUT_LOGS_MAX_LIMIT)
+        user_logs = query.limit(limit + 1).all()
+        response = _workout_logs_response(user_logs[:limit])
+        if len(user_logs) > limit: response.headers['X-Next-Cursor'] = _encode_log_cursor(user_logs[limit - 1])
+        return response, 200
     except Exception as e:
         app.logger.error(f"Error fetching workout logs for user {current_user.username}: {e}", exc_info=True)
         return jsonify({"message": "Failed to fetch workout logs due to a server error."}), 500
 
+WORKOUT_STATS_PERIODS = ('daily', 'weekly', 'monthly')
+# Period bucket per dialect, as text: YYYY-MM-DD for days and weeks (the Monday starting it), YYYY-MM for months
+WORKOUT_STATS_BUCKETS = {
+    'sqlite': {
+        'daily': lambda col: db.func.date(col),
+        'weekly': lambda col: db.func.date(col, 'weekday 0', '-6 days'),
+        'monthly': lambda col: db.func.strftime('%Y-%m', col),
+    },
+    'postgresql': {
+        'daily': lambda col: db.func.to_char(col, 'YYYY-MM-DD'),
+        'weekly': lambda col: db.func.to_char(db.func.date_trunc('week', col), 'YYYY-MM-DD'),
+        'monthly': lambda col: db.func.to_char(col, 'YYYY-MM'),
+    },
+}
+
+@app.route('/api/workout_stats', methods=['GET'])
+@login_required
+def get_workout_stats():
+    # Totals per day/week/month computed by SQL GROUP BY, instead of shipping every log to the client
+    period = request.args.get('period', 'weekly').lower()
+    if period not in WORKOUT_STATS_PERIODS: return jsonify({"message": f"Period must be one of: {', '.join(WORKOUT_STATS_PERIODS)}."}), 400
+    try:
+        date_from = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+        date_to = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+    except ValueError: return jsonify({"message": "Invalid date format for from/to (expected YYYY-MM-DD)."}), 400
+    buckets = WORKOUT_STATS_BUCKETS.get(db.engine.dialect.name)
+    if buckets is None: return jsonify({"message": f"Workout stats are not available on {db.engine.dialect.name} databases."}), 501
+
+    try:
+        bucket = buckets[period](WorkoutLog.log_date).label('period')
+        filters = [WorkoutLog.user_id == current_user.id]
+        if date_from: filters.append(WorkoutLog.log_date >= date_from)
+        if date_to: filters.append(WorkoutLog.log_date <= date_to)
+        aggregates = [db.func.sum(WorkoutLog.duration_minutes), db.func.coalesce(db.func.sum(WorkoutLog.calories_burned), 0), db.func.count()]
+
+        totals = db.session.query(bucket, *aggregates).filter(*filters).group_by(bucket).order_by(bucket.desc()).all()
+        by_exercise = (db.session.query(bucket, WorkoutLog.exercise_name, *aggregates).filter(*filters)
+                       .group_by(bucket, WorkoutLog.exercise_name).order_by(bucket.desc(), WorkoutLog.exercise_name).all())
+        return jsonify({
+            "period": period,
+            "from": date_from.isoformat() if date_from else None, "to": date_to.isoformat() if date_to else None,
+            "totals": [{"period": p, "total_minutes": int(minutes or 0), "total_calories": int(calories), "sessions": sessions}
+                       for p, minutes, calories, sessions in totals],
+            "by_exercise": [{"period": p, "exercise_name": name, "total_minutes": int(minutes or 0), "total_calories": int(calories), "sessions": sessions}
+                            for p, name, minutes, calories, sessions in by_exercise]
+        }), 200
+    except Exception as e:
+        app.logger.error(f"Error computing workout stats for user {current_user.username}: {e}", exc_info=True)
+        return jsonify({"message": "Failed to compute workout stats due to a server error."}), 500
+
+# --- Diet Log API Endpoints ---
+DIET_LOG_MEAL_TYPES = ('breakfast', 'lunch', 'dinner', 'snack')
+MAX_DIET_LOG_ITEMS = 50
+MAX_BULK_DIET_LOGS = 5000
+DAILY_NUTRITION_FIELDS = ('calories', 'protein', 'carbs', 'fat', 'meal_count')
+
+def _parse_diet_log(data):
+    # (column values, None) or (None, error message). Food items are meal entries as weekly plans show them
+    # (name, cuisine, calories, protein, carbs, fat) plus servings, matched against the diet catalog; name and
+    # nutrients are copied in so old logs survive dataset changes.
+    diet_catalog = catalogs.diet_catalog
+    if not isinstance(data, dict): return None, "Each diet entry must be a JSON object."
+    meal_type = str(data.get('meal_type') or '').strip().lower()
+    if meal_type not in DIET_LOG_MEAL_TYPES: return None, f"meal_type must be one of: {', '.join(DIET_LOG_MEAL_TYPES)}."
+    items = data.get('food_items')
+    if not isinstance(items, list) or not items: return None, "food_items must be a non-empty list of plan meal entries with servings."
+    if len(items) > MAX_DIET_LOG_ITEMS: return None, f"At most {MAX_DIET_LOG_ITEMS} food items per log."
+
+    log_date = date.today()
+    if data.get('log_date'):
+        try: log_date = _parse_iso_date(data['log_date'])
+        except (ValueError, TypeError): return None, "Invalid log_date (expected YYYY-MM-DD)."
+
+    food_items = []; totals = dict.fromkeys(('calories', 'protein', 'carbs', 'fat'), 0)
+    for item in items:
+        if not isinstance(item, dict): return None, "Each food item must be a JSON object."
+        try: servings = float(item.get('servings', 1))
+        except (TypeError, ValueError): return None, "servings must be a number."
+        recipe_id = diet_catalog.find_entry(item)
+        if recipe_id is None: return None, f"Unknown recipe {str(item.get('name'))[:100]!r}: send name, cuisine, calories, protein, carbs and fat as the plan shows them."
+        if not 0 < servings <= 20: return None, "servings must be greater than 0 and at most 20."
+        entry = diet_catalog.meal_entry(recipe_id); del entry['cuisine']
+        for nutrient in totals: entry[nutrient] = int(round(entry[nutrient] * servings)); totals[nutrient] += entry[nutrient]
+        entry['servings'] = servings; food_items.append(entry)
+    return {
+        'log_date': log_date, 'meal_type': meal_type, 'food_items': json.dumps(food_items),
+        'total_calories': totals['calories'], 'total_protein': totals['protein'], 'total_carbs': totals['carbs'], 'total_fat': totals['fat']
+    }, None
+
+def _add_to_daily_nutrition(user_id, log_rows):
+    # Folds newly written diet logs into DailyNutrition with one upsert per touched day (an
+    # executemany of INSERT ... ON CONFLICT DO UPDATE); runs inside the caller's transaction. Dialects
+    # without that get an UPDATE per day and an INSERT for days with no row yet (a concurrent first
+    # log of the same day then fails on the primary key, like any other write conflict).
+    deltas = {}
+    for row in log_rows:
+        delta = deltas.setdefault(row['log_date'], {'user_id': user_id, 'log_date': row['log_date'], **dict.fromkeys(DAILY_NUTRITION_FIELDS, 0)})
+        delta['calories'] += row['total_calories']; delta['protein'] += row['total_protein']
+        delta['carbs'] += row['total_carbs']; delta['fat'] += row['total_fat']; delta['meal_count'] += 1
+    if not deltas: return
+    table = DailyNutrition.__table__
+    if upsert_insert is None:
+        for delta in deltas.values():
+            day = table.update().where(table.c.user_id == user_id, table.c.log_date == delta['log_date'])
+            if not db.session.execute(day.values({field: table.c[field] + delta[field] for field in DAILY_NUTRITION_FIELDS})).rowcount:
+                db.session.execute(table.insert(), [delta])
+        return
+    statement = upsert_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.log_date],
+        set_={field: table.c[field] + statement.excluded[field] for field in DAILY_NUTRITION_FIELDS})
+    db.session.execute(statement, list(deltas.values()))
+
+DIET_LOGS_DEFAULT_LIMIT = 100
+DIET_LOGS_MAX_LIMIT = 1000
+
+def _diet_log_dict(log):
+    return {
+        "id": log.id, "log_date": log.log_date.isoformat(), "meal_type": log.meal_type,
+        "food_items": json.loads(log.food_items) if log.food_items else [],
+        "total_calories": log.total_calories, "total_protein": log.total_protein,
+        "total_carbs": log.total_carbs, "total_fat": log.total_fat
+    }
+
+@app.route('/api/diet_logs', methods=['POST'])
+@login_required
+def log_diet():
+    data = request.get_json(silent=True)
+    if not data: return jsonify({"message": "No data provided for diet log"}), 400
+    values, error = _parse_diet_log(data)
+    if error: return jsonify({"message": error}), 400
+    try:
+        new_log = DietLog(user_id=current_user.id, **values)
+        db.session.add(new_log); _add_to_daily_nutrition(current_user.id, [values]); db.session.commit()
+        app.logger.info(f"Diet logged for user {current_user.username}: {values['meal_type']} ({values['total_calories']} kcal)")
+        return jsonify({"message": "Meal logged successfully!", "log": _diet_log_dict(new_log)}), 201
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error logging diet for user {current_user.username}: {e}", exc_info=True)
+        return jsonify({"message": "Failed to log meal due to a server error."}), 500
+
+@app.route('/api/diet_logs/bulk', methods=['POST'])
+@login_required
+def log_diet_bulk():
+    # Same contract as /api/workout_logs/bulk: one executemany insert plus one rollup upsert, one commit
+    entries = _read_bulk_entries(MAX_BULK_DIET_LOGS)
+    if entries is None: return jsonify({"message": "Expected a JSON array of diet entries or an NDJSON body."}), 400
+    if len(entries) > MAX_BULK_DIET_LOGS: return jsonify({"message": f"At most {MAX_BULK_DIET_LOGS} entries per request."}), 400
+
+    results = []; rows = []
+    for index, entry in enumerate(entries):
+        values, error = _parse_diet_log(entry) if entry is not None else (None, "Invalid JSON.")
+        if error: results.append({"index": index, "status": "error", "message": error})
+        else: rows.append(dict(values, user_id=current_user.id)); results.append({"index": index, "status": "created"})
+    try:
+        if rows: db.session.execute(DietLog.__table__.insert(), rows); _add_to_daily_nutrition(current_user.id, rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error bulk logging diet for user {current_user.username}: {e}", exc_info=True)
+        return jsonify({"message": "Failed to log meals due to a server error."}), 500
+    app.logger.info(f"Bulk diet log for user {current_user.username}: {len(rows)} created, {len(entries) - len(rows)} errors")
+    return jsonify({"message": "Bulk diet log processed.", "created": len(rows), "error": len(entries) - len(rows), "results": results}), 200
+
+@app.route('/api/diet_logs', methods=['GET'])
+@login_required
+def get_diet_logs():
+    # from/to (YYYY-MM-DD, inclusive) range over the (user_id, log_date) index, newest first
+    try:
+        date_from = _parse_iso_date(request.args['from']) if request.args.get('from') else None
+        date_to = _parse_iso_date(request.args['to']) if request.args.get('to') else None
+    except ValueError: return jsonify({"message": "Invalid date format for from/to (expected YYYY-MM-DD)."}), 400
+    limit = min(max(request.args.get('limit', DIET_LOGS_DEFAULT_LIMIT, type=int), 1), DIET_LOGS_MAX_LIMIT)
+    try:
+        query = DietLog.query.filter_by(user_id=current_user.id)
+        if date_from: query = query.filter(DietLog.log_date >= date_from)
+        if date_to: query = query.filter(DietLog.log_date <= date_to)
+        user_logs = query.order_by(DietLog.log_date.desc(), DietLog.id.desc()).limit(limit).all()
+        return jsonify([_diet_log_dict(log) for log in user_logs]), 200
+    except Exception as e:
+        app.logger.error(f"Error fetching diet logs for user {current_user.username}: {e}", exc_info=True)
+        return jsonify({"message": "Failed to fetch diet logs due to a server error."}), 500
+
+@app.route('/api/diet_summary', methods=['GET'])
+@login_required
+def get_diet_summary():
+    # Intake for one day (default today) against the profile's target calories
+    user = current_user
+    try: day = _parse_iso_date(request.args['date']) if request.args.get('date') else date.today()
+    except ValueError: return jsonify({"message": "Invalid date (expected YYYY-MM-DD)."}), 400
+    totals = db.session.get(DailyNutrition, (user.id, day))
+    consumed = {field: getattr(totals, field) if totals else 0 for field in DAILY_NUTRITION_FIELDS}
+    target_calories = user.metrics()['target_daily_calories']
+    return jsonify({
+        "date": day.isoformat(), "target_calories": target_calories, "consumed": consumed,
+        "remaining_calories": target_calories - consumed['calories']
+    }), 200
+
 # --- To-Do List API Endpoints ---
 @app.route('/api/todos', methods=['GET'])
 @login_required
+@conditional_get('todos')
 def get_todos():
     user_todos = Todo.query.filter_by(user_id=current_user.id).order_by(Todo.created_at.asc()).all()
     return jsonify([{"id": todo.id, "task": todo.task, "completed": todo.completed} for todo in user_todos]), 200
@@ -639,7 +1751,8 @@ def add_todo():
         return jsonify({"message": "Task content is required and cannot be empty"}), 400
     new_todo = Todo(user_id=current_user.id, task=data['task'].strip(), completed=False)
     try:
-        db.session.add(new_todo); db.session.commit()
+        if write_queue is not None: new_todo.id = _insert_with_version(Todo.__table__, {'user_id': new_todo.user_id, 'task': new_todo.task, 'completed': False}, current_user.id, 'todos')
+        else: db.session.add(new_todo); bump_data_version(current_user.id, 'todos'); db.session.commit()
         app.logger.info(f"Todo '{new_todo.task}' added for user {current_user.username}")
         return jsonify({"id": new_todo.id, "task": new_todo.task, "completed": new_todo.completed}), 201
     except Exception as e:
@@ -672,7 +1785,7 @@ def update_todo(todo_id):
 
     if updated:
         try:
-            db.session.commit()
+            bump_data_version(current_user.id, 'todos'); db.session.commit()
             app.logger.info(f"Todo ID {todo_id} updated for user {current_user.username}")
         except Exception as e:
             db.session.rollback()
@@ -687,7 +1800,7 @@ def delete_todo_item(todo_id):
     todo = Todo.query.get_or_404(todo_id)
     if todo.user_id != current_user.id: return jsonify({"message": "Unauthorized to delete this todo"}), 403
     try:
-        db.session.delete(todo); db.session.commit()
+        db.session.delete(todo); bump_data_version(current_user.id, 'todos'); db.session.commit()
         app.logger.info(f"Todo ID {todo_id} deleted for user {current_user.username}")
         return jsonify({"message": "Todo deleted successfully"}), 200 # 200 with message is fine
     except Exception as e:
@@ -717,6 +1830,21 @@ def forbidden_api_error(error):
     app.logger.warning(f"Forbidden access: {request.path} by user {current_user.username if current_user.is_authenticated else 'Anonymous'} (Origin: {request.headers.get('Origin')})")
     return jsonify({"message": "Forbidden: You don't have permission to access this."}), 403
 
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy_error(error):
+    app.logger.warning(f"Password hashing queue full, rejecting {request.path}")
+    return jsonify({"message": "Too many sign-ins in progress. Please retry shortly."}), 503, {"Retry-After": "1"}
+
+@app.errorhandler(PlanJobsBusy)
+def plan_jobs_busy_error(error):
+    app.logger.warning(f"Plan job queue full, rejecting {request.path}")
+    return jsonify({"message": "Too many plans are being prepared. Please retry shortly."}), 503, {"Retry-After": "2"}
+
+@app.errorhandler(PlanPoolBusy)
+def plan_pool_busy_error(error):
+    app.logger.warning(f"Plan process pool rejected {request.path}: {error}")
+    return jsonify({"message": "Too many plans are being generated. Please retry shortly."}), 503, {"Retry-After": "1"}
+
 @app.errorhandler(400) # For general bad requests
 def bad_request_api_error(error):
     message = error.description if hasattr(error, 'description') and error.description else "Bad API request. Please check your input."
@@ -728,6 +1856,8 @@ if __name__ == '__main__':
     with app.app_context():
         app.logger.info(f"Checking database at: {db_path}")
         db.create_all() # Creates tables if they don't exist
+        upgrade_schema() # Adds columns and indexes missing from older databases
+        backfill_user_metrics() # Stored BMI/BMR/TDEE/target for users created before those columns
 
         # Ensure admin user "Mokshitha" exists
         admin_username = "Mokshitha"
@@ -0,0 +1,42 @@
+# backend/benchmarks/bench_batch_plans.py
+# N sequential GET /api/weekly_diet_plan calls vs. one POST /api/weekly_diet_plan/batch.
+#
+#   python benchmarks/bench_batch_plans.py [--users 500] [--recipes 1000]
+
+import argparse
+import tempfile
+import time
+
+from synthetic import client_for, load_app, seed_users
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--recipes', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        A = load_app(workdir, n_recipes=args.recipes)
+        user_ids = seed_users(A, args.users)
+        (admin_id,) = seed_users(A, 1, seed=1, is_admin_user=True)
+
+        clients = [client_for(A, uid) for uid in user_ids]
+        start = time.perf_counter()
+        for client in clients:
+            assert client.get('/api/weekly_diet_plan').status_code == 200
+        single_s = time.perf_counter() - start
+
+        admin = client_for(A, admin_id)
+        start = time.perf_counter()
+        response = admin.post('/api/weekly_diet_plan/batch', json={'user_ids': user_ids})
+        batch_s = time.perf_counter() - start
+        assert response.status_code == 200 and len(response.get_json()['plans']) == len(user_ids)
+
+    print(f"users={args.users} recipes={args.recipes}")
+    print(f"single requests: {single_s:8.3f}s total  {single_s / args.users * 1000:8.3f} ms/user")
+    print(f"batched request: {batch_s:8.3f}s total  {batch_s / args.users * 1000:8.3f} ms/user  ({single_s / batch_s:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# backend/benchmarks/bench_catalog_snapshot.py
+# Worker start-up cost of the recipe catalog: parsing the CSV (pd.read_csv + RecipeCatalog.from_dataframe)
+# vs. mapping a catalog_snapshot file, and the total memory (summed PSS from /proc/<pid>/smaps_rollup,
+# Linux only) of N concurrently running "workers" holding it.
+#
+#   python benchmarks/bench_catalog_snapshot.py [--sizes 100000,1000000] [--workers 4]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import BACKEND_DIR, write_diet_csv
+
+import pandas as pd
+from catalog_snapshot import write_snapshot
+from recipe_catalog import RecipeCatalog
+
+WORKER = r'''
+import sys, time, json
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+if sys.argv[2] == 'csv':
+    import pandas as pd
+    from recipe_catalog import RecipeCatalog
+    catalog = RecipeCatalog.from_dataframe(pd.read_csv(sys.argv[3]))
+else:
+    from catalog_snapshot import load_snapshot
+    catalog = load_snapshot(sys.argv[3])
+int(catalog.calories.sum()); catalog.matcher('vegetarian', 'Indian, Italian') # Touch the columns like a warm worker would
+load_s = time.perf_counter() - start
+print('loaded', flush=True); sys.stdin.readline()
+fields = dict(line.split(':', 1) for line in open('/proc/self/smaps_rollup').readlines()[1:]) # First line is the address range
+print(json.dumps({'load_s': load_s, 'rss_kb': int(fields['Rss'].split()[0]), 'pss_kb': int(fields['Pss'].split()[0])}), flush=True)
+'''
+
+
+def run_workers(mode, path, n_workers):
+    workers = [subprocess.Popen([sys.executable, '-c', WORKER, BACKEND_DIR, mode, path], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+               for _ in range(n_workers)]
+    for worker in workers: assert worker.stdout.readline().strip() == 'loaded'
+    results = []
+    for worker in workers: # Everyone is loaded (and mapping the file) before anyone measures
+        worker.stdin.write('\n'); worker.stdin.flush()
+    for worker in workers: results.append(json.loads(worker.stdout.readline())); worker.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='100000,1000000')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    if not os.path.exists('/proc/self/smaps_rollup'): sys.exit("Needs Linux /proc/<pid>/smaps_rollup")
+
+    print(f"{'recipes':>10} {'format':>8} {'file MB':>8} {'load s':>8} {'RSS MB/worker':>14} {'total PSS MB':>13}")
+    for n in [int(s) for s in args.sizes.split(',')]:
+        with tempfile.TemporaryDirectory() as workdir:
+            csv_path = write_diet_csv(os.path.join(workdir, 'diet.csv'), n)
+            start = time.perf_counter()
+            snapshot_path = write_snapshot(RecipeCatalog.from_dataframe(pd.read_csv(csv_path)), os.path.join(workdir, 'diet.rcat'), csv_path)
+            print(f"{n:>10} snapshot built in {time.perf_counter() - start:.2f}s")
+            for mode, path in (('csv', csv_path), ('snapshot', snapshot_path)):
+                results = run_workers(mode, path, args.workers)
+                load_s = sorted(r['load_s'] for r in results)[len(results) // 2]
+                rss_mb = sum(r['rss_kb'] for r in results) / len(results) / 1024; pss_mb = sum(r['pss_kb'] for r in results) / 1024
+                print(f"{n:>10} {mode:>8} {os.path.getsize(path) / 2**20:>8.1f} {load_s:>8.3f} {rss_mb:>14.1f} {pss_mb:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# backend/benchmarks/bench_conditional_get.py
+# Repeat GETs of /api/workout_logs, /api/todos and /api/user_profile for one user with --rows logs and
+# todos: a full 200 each time vs. revalidating with If-None-Match and getting a 304. Reports median
+# latency, SQL statements per request and body bytes for both.
+#
+#   python benchmarks/bench_conditional_get.py [--rows 2000] [--repeat 50]
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import event
+
+from synthetic import client_for, load_app, seed_todos, seed_users, seed_workout_logs
+
+PATHS = ['/api/workout_logs', '/api/todos', '/api/user_profile']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        A = load_app(workdir)
+        (user_id,) = seed_users(A, 1); seed_workout_logs(A, [user_id], args.rows); seed_todos(A, [user_id], args.rows)
+        statements = [0]
+        with A.app.app_context(): event.listen(A.db.engine, 'before_cursor_execute', lambda *_: statements.__setitem__(0, statements[0] + 1))
+        client = client_for(A, user_id)
+
+        def measure(path, headers, status):
+            times = []; counts = []
+            for _ in range(args.repeat):
+                statements[0] = 0; start = time.perf_counter(); response = client.get(path, headers=headers)
+                times.append(time.perf_counter() - start); counts.append(statements[0])
+                assert response.status_code == status, (path, response.status_code)
+            return float(np.median(times)) * 1000, float(np.median(counts)), len(response.data)
+
+        print(f"rows={args.rows} repeat={args.repeat} (median)")
+        print(f"{'path':>20} {'200 ms':>8} {'304 ms':>8} {'200 SQL':>8} {'304 SQL':>8} {'200 bytes':>10} {'304 bytes':>10}")
+        for path in PATHS:
+            full_ms, full_sql, full_bytes = measure(path, {}, 200)
+            etag = client.get(path).headers['ETag']
+            cond_ms, cond_sql, cond_bytes = measure(path, {'If-None-Match': etag}, 304)
+            print(f"{path:>20} {full_ms:>8.2f} {cond_ms:>8.2f} {full_sql:>8.0f} {cond_sql:>8.0f} {full_bytes:>10} {cond_bytes:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# backend/benchmarks/bench_exercise_catalog.py
+# Per-call cost of recommend_workouts_logic: the old rebuild-and-filter list of dicts vs. the
+# pre-partitioned ExerciseCatalog, as the exercise catalog grows.
+#
+#   python benchmarks/bench_exercise_catalog.py [--sizes 19,1000,10000,100000]
+
+import argparse
+import random
+import time
+
+from synthetic import make_exercise_rows
+from exercise_catalog import DEFAULT_EXERCISES, Exercise, ExerciseCatalog
+
+GOALS = ['muscle_gain', 'weight_loss', 'endurance', 'maintenance']
+FIELDS = ('name', 'type', 'target', 'duration_suggestion', 'difficulty')
+
+
+def legacy_recommend(rows, user_goal):
+    # What recommend_workouts_logic used to do on every call
+    all_workouts_full = [dict(zip(FIELDS, row)) for row in rows]
+    recommendations = []; goal_lower = user_goal.lower() if user_goal else "maintenance"
+    if goal_lower == 'muscle_gain':
+        strength_workouts = [w for w in all_workouts_full if w['type'] == 'strength']
+        core_workouts = [w for w in all_workouts_full if w['type'] == 'core']
+        if strength_workouts: recommendations.extend(random.sample(strength_workouts, k=min(3, len(strength_workouts))))
+        if core_workouts: recommendations.extend(random.sample(core_workouts, k=min(2, len(core_workouts))))
+    elif goal_lower == 'weight_loss':
+        cardio_workouts = [w for w in all_workouts_full if w['type'] == 'cardio']
+        strength_core_workouts = [w for w in all_workouts_full if w['type'] in ['strength', 'core']]
+        if cardio_workouts: recommendations.extend(random.sample(cardio_workouts, k=min(2, len(cardio_workouts))))
+        if strength_core_workouts: recommendations.extend(random.sample(strength_core_workouts, k=min(3, len(strength_core_workouts))))
+    elif goal_lower == 'endurance':
+        cardio_workouts = [w for w in all_workouts_full if w['type'] == 'cardio']
+        if cardio_workouts: recommendations.extend(random.sample(cardio_workouts, k=min(4, len(cardio_workouts))))
+        core_w = next((w for w in all_workouts_full if w['type'] == 'core'), None)
+        if core_w and len(recommendations) < 5: recommendations.append(core_w)
+    else:
+        if all_workouts_full: recommendations = random.sample(all_workouts_full, k=min(5, len(all_workouts_full)))
+    seen_names = set(); unique_recs = []
+    for rec in recommendations:
+        if rec['name'] not in seen_names: unique_recs.append(rec); seen_names.add(rec['name'])
+    final_recs = unique_recs[:5]
+    if len(final_recs) < 3 and len(all_workouts_full) >= 3:
+        general_fill = [w for w in all_workouts_full if w['name'] not in seen_names]
+        if general_fill: final_recs.extend(random.sample(general_fill, k=min(3 - len(final_recs), len(general_fill))))
+    return final_recs
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for i in range(repeat): fn(GOALS[i % len(GOALS)])
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def check_identical(rows, catalog, trials=200):
+    for i in range(trials):
+        goal = GOALS[i % len(GOALS)]
+        random.seed(i); expected = legacy_recommend(rows, goal)
+        random.seed(i); assert catalog.recommend(goal) == expected, f"responses differ for {goal!r} (seed {i})"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='19,1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'exercises':>10} {'build ms':>10} {'legacy us/call':>15} {'catalog us/call':>16} {'speedup':>9}")
+    for n in [int(s) for s in args.sizes.split(',')]:
+        rows = DEFAULT_EXERCISES if n == len(DEFAULT_EXERCISES) else make_exercise_rows(n)
+        start = time.perf_counter(); catalog = ExerciseCatalog(Exercise(*row) for row in rows); build_ms = (time.perf_counter() - start) * 1000
+        check_identical(rows, catalog)
+        legacy_us = per_call_us(lambda goal: legacy_recommend(rows, goal), max(8, args.repeat * 100 // n))
+        catalog_us = per_call_us(catalog.recommend, args.repeat)
+        print(f"{n:>10} {build_ms:>10.1f} {legacy_us:>15.1f} {catalog_us:>16.2f} {legacy_us / catalog_us:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# backend/benchmarks/bench_json.py
+# GET /api/workout_logs for one user with --rows logs, split into query and serialization time:
+# the old path (ORM objects -> _workout_log_dict -> jsonify on the stdlib provider) vs. the current
+# one (column tuples -> RowEncoder). Also times jsonify over the same rows as plain dicts, with and
+# without nulls, on the json module and on orjson through FastJSONProvider (a body with nulls costs a
+# NaN/Infinity search of the rows too). Every variant's bytes are checked against the json module.
+#
+#   python benchmarks/bench_json.py [--rows 10000] [--repeat 20]
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+from synthetic import client_for, load_app, seed_users, seed_workout_logs
+from serialization import FastJSONProvider
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter(); result = fn(); times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        A = load_app(workdir)
+        (user_id,) = seed_users(A, 1); seed_workout_logs(A, [user_id], args.rows)
+        stdlib = DefaultJSONProvider(A.app); fast = FastJSONProvider(A.app, backend='orjson')
+        with A.app.test_request_context():
+            query = A.WorkoutLog.query.filter_by(user_id=user_id).order_by(A.WorkoutLog.log_date.desc(), A.WorkoutLog.id.desc())
+            orm_ms, logs = best_ms(lambda: query.all(), args.repeat)
+            tuple_ms, rows = best_ms(lambda: query.with_entities(*A.WORKOUT_LOG_COLUMNS).all(), args.repeat)
+            old_ms, old_body = best_ms(lambda: stdlib.response([A._workout_log_dict(log) for log in logs]).get_data(), args.repeat)
+            new_ms, new_body = best_ms(lambda: A._workout_logs_response(rows).get_data(), args.repeat)
+            assert new_body == old_body, "RowEncoder output differs from jsonify"
+
+            timings = {}
+            for label, dicts in (('no nulls', [dict(A._workout_log_dict(log), feedback="ok") for log in logs]),
+                                 ('nulls', [A._workout_log_dict(log) for log in logs])):
+                json_ms, json_body = best_ms(lambda: stdlib.response(dicts).get_data(), args.repeat)
+                orjson_ms, orjson_body = best_ms(lambda: fast.response(dicts).get_data(), args.repeat) if fast.backend == 'orjson' else (float('nan'), json_body)
+                assert orjson_body == json_body, f"orjson output differs from the json module's ({label})"
+                timings[label] = json_ms, orjson_ms
+
+        client = client_for(A, user_id)
+        http_ms, _ = best_ms(lambda: client.get('/api/workout_logs').data, args.repeat)
+
+    print(f"rows={args.rows} repeat={args.repeat} (median ms) body={len(new_body) / 1024:.0f} KiB")
+    print(f"{'path':>34} {'query':>8} {'serialize':>10} {'total':>8}")
+    print(f"{'ORM + dicts + jsonify (old)':>34} {orm_ms:>8.2f} {old_ms:>10.2f} {orm_ms + old_ms:>8.2f}")
+    print(f"{'tuples + RowEncoder (current)':>34} {tuple_ms:>8.2f} {new_ms:>10.2f} {tuple_ms + new_ms:>8.2f}")
+    print(f"{'GET /api/workout_logs':>34} {'':>8} {'':>10} {http_ms:>8.2f}")
+    for label, (json_ms, orjson_ms) in timings.items():
+        print(f"{f'jsonify(dicts, {label}), json':>34} {'':>8} {json_ms:>10.2f}")
+        print(f"{f'jsonify(dicts, {label}), orjson':>34} {'':>8} {orjson_ms:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# backend/benchmarks/bench_login.py
+# Login storm: --clients threads POST /api/login back to back while one probe thread keeps calling
+# GET /api/todos, for each password-hashing pool size. Reports login throughput/latency and the
+# probe's latency (how much the storm slows everything else). A pool as large as --clients
+# behaves like the old hash-in-the-request-thread code.
+#
+#   python benchmarks/bench_login.py [--clients 16] [--duration 5] [--rounds 12] [--workers 1,2,16]
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from synthetic import client_for, load_app, seed_users
+
+
+def storm(A, user_ids, n_clients, duration):
+    login_times = []; probe_times = []; statuses = []; deadline = time.perf_counter() + duration
+    usernames = {}
+    with A.app.app_context():
+        for user in A.User.query.filter(A.User.id.in_(user_ids)): usernames[user.id] = user.username
+
+    def login_loop(i):
+        client = A.app.test_client(); body = {'username': usernames[user_ids[i % len(user_ids)]], 'password': 'benchpass'}
+        while time.perf_counter() < deadline:
+            start = time.perf_counter(); status = client.post('/api/login', json=body).status_code
+            login_times.append(time.perf_counter() - start); statuses.append(status)
+
+    def probe_loop():
+        client = client_for(A, user_ids[0])
+        while time.perf_counter() < deadline:
+            start = time.perf_counter(); assert client.get('/api/todos').status_code == 200
+            probe_times.append(time.perf_counter() - start); time.sleep(0.01)
+
+    threads = [threading.Thread(target=login_loop, args=(i,)) for i in range(n_clients)] + [threading.Thread(target=probe_loop)]
+    start = time.perf_counter()
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    return login_times, probe_times, statuses, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--workers', default='1,2,16')
+    args = parser.parse_args()
+
+    os.environ['BCRYPT_LOG_ROUNDS'] = str(args.rounds)
+    with tempfile.TemporaryDirectory() as workdir:
+        A = load_app(workdir)
+        from password_hashing import PasswordHasher
+        user_ids = seed_users(A, args.clients)
+
+        print(f"clients={args.clients} rounds={args.rounds} duration={args.duration}s cpus={os.cpu_count()}")
+        print(f"{'workers':>8} {'logins/s':>9} {'login p50 ms':>13} {'login p95 ms':>13} {'503s':>5} {'probe p50 ms':>13} {'probe p95 ms':>13}")
+        for workers in [int(w) for w in args.workers.split(',')]:
+            A.password_hasher = PasswordHasher(A.bcrypt, rounds=args.rounds, max_workers=workers, max_queue=args.clients, queue_timeout=60)
+            login_times, probe_times, statuses, elapsed = storm(A, user_ids, args.clients, args.duration)
+            A.password_hasher.shutdown()
+            ok = sum(1 for status in statuses if status == 200)
+            login_p50, login_p95 = np.percentile(np.array(login_times) * 1000, [50, 95])
+            probe_p50, probe_p95 = np.percentile(np.array(probe_times) * 1000, [50, 95])
+            print(f"{workers:>8} {ok / elapsed:>9.1f} {login_p50:>13.1f} {login_p95:>13.1f} {statuses.count(503):>5} {probe_p50:>13.1f} {probe_p95:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# backend/benchmarks/bench_plan_memory.py
+# Memory per weekly plan, rendered the old way (render_weekly_plan dicts, cached as dicts, then
+# jsonify) and the new way (plan id arrays cached, then render_weekly_plan_json from per-recipe JSON
+# fragments). Each mode runs in a fresh process that caches --plans distinct plans and serves each
+# one --repeat times. Reports objects held per rendered plan, tracemalloc peak per response, bytes
+# held by the plan cache, time per response and the process's peak RSS. Both modes produce the same
+# bytes (checked).
+#
+#   python benchmarks/bench_plan_memory.py [--plans 2000] [--repeat 3] [--recipes 20000]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+MODES = ['dicts', 'fragments']
+
+CHILD = r'''
+import json, resource, sys, time, tracemalloc
+import numpy as np
+sys.path.insert(0, sys.argv[1])
+from synthetic import load_app
+workdir, mode, n_plans, repeat, n_recipes = sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5]), int(sys.argv[6])
+A = load_app(workdir, n_recipes=n_recipes)
+A.catalogs.wait()
+from flask import jsonify
+plans = []
+for seed in range(n_plans):
+    profile = {'target_calories': 1500 + seed % 15 * 100, 'diet_preference': ['any', 'vegetarian', 'vegan', 'non-vegetarian'][seed % 4]}
+    plan_ids, _ = A.generate_weekly_plan_ids(profile, 1, seed); plan_ids.setflags(write=False); plans.append(plan_ids)
+cache_entry = (lambda plan_ids: A.render_weekly_plan(plan_ids)) if mode == 'dicts' else (lambda plan_ids: plan_ids.copy()) # As row.recipe_id_array() hands out
+respond = (lambda entry: jsonify(entry)) if mode == 'dicts' else (lambda entry: A.weekly_plan_response(entry)[0])
+render = A.render_weekly_plan if mode == 'dicts' else A.render_weekly_plan_json
+
+with A.app.test_request_context():
+    for plan_ids in plans: A.render_weekly_plan_json(plan_ids) # Warm the fragment cache (built once per recipe per process)
+    assert jsonify(A.render_weekly_plan(plans[0])).get_data() == A.weekly_plan_response(plans[0])[0].get_data()
+    objects = []
+    for plan_ids in plans[:50]:
+        before = sys.getallocatedblocks(); held = render(plan_ids); objects.append(sys.getallocatedblocks() - before); del held
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]; cache = [cache_entry(plan_ids) for plan_ids in plans]
+    cache_bytes = tracemalloc.get_traced_memory()[0] - before
+    peaks = []
+    for entry in cache[:50]:
+        tracemalloc.reset_peak(); base = tracemalloc.get_traced_memory()[0]
+        respond(entry).get_data(); peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for entry in cache: respond(entry).get_data()
+    elapsed = time.perf_counter() - start
+print(json.dumps({'objects': float(np.mean(objects)), 'peak_kib': float(np.mean(peaks)) / 1024, 'cache_kib_per_plan': cache_bytes / len(plans) / 1024,
+                  'us_per_response': elapsed / (repeat * len(plans)) * 1e6, 'max_rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plans', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--recipes', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"plans={args.plans} repeat={args.repeat} recipes={args.recipes}")
+    print(f"{'mode':>10} {'objects/plan':>13} {'peak KiB/resp':>14} {'cache KiB/plan':>15} {'us/resp':>8} {'max RSS MiB':>12}")
+    for mode in MODES:
+        with tempfile.TemporaryDirectory() as workdir:
+            out = subprocess.run([sys.executable, '-c', CHILD, os.path.dirname(os.path.abspath(__file__)), workdir, mode, str(args.plans), str(args.repeat), str(args.recipes)],
+                                 capture_output=True, text=True, check=True).stdout
+            row = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:>10} {row['objects']:>13.0f} {row['peak_kib']:>14.1f} {row['cache_kib_per_plan']:>15.2f} {row['us_per_response']:>8.1f} {row['max_rss_mib']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# backend/benchmarks/bench_plan_pool.py
+# Mixed traffic: --planners threads call GET /api/weekly_diet_plan?regenerate=1 back to back while one
+# probe thread keeps calling GET /api/todos, with plan generation in the request threads and on the
+# plan process pool. Reports plan throughput/latency, 503s shed by the pool's queue limit, and the
+# probe's latency. Each config runs in a fresh process because app.py reads the pool settings at import.
+# The gain needs spare cores: on one core the pool only moves the work, it can't run it alongside.
+#
+#   python benchmarks/bench_plan_pool.py [--planners 8] [--duration 5] [--recipes 20000] [--workers 0,2]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+CHILD = r'''
+import json, os, sys, threading, time
+import numpy as np
+sys.path.insert(0, sys.argv[1])
+workdir, planners, duration, n_recipes = sys.argv[2], int(sys.argv[3]), float(sys.argv[4]), int(sys.argv[5])
+os.environ['DIET_SNAPSHOT_PATH'] = os.path.join(workdir, 'diet.rcat')
+from synthetic import client_for, load_app, seed_users
+from catalog_snapshot import write_snapshot
+A = load_app(workdir, n_recipes=n_recipes)
+A.catalogs.wait(); write_snapshot(A.catalogs.diet_catalog, os.environ['DIET_SNAPSHOT_PATH']) # Workers map this instead of writing into instance/
+user_ids = seed_users(A, planners + 1)
+if A.get_plan_pool() is not None: A.get_plan_pool().generate({'target_calories': 2000}) # Workers start outside the timed window
+plan_times = []; probe_times = []; statuses = []; deadline = time.perf_counter() + duration
+
+def plan_loop(user_id):
+    client = client_for(A, user_id)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter(); status = client.get('/api/weekly_diet_plan?regenerate=1').status_code
+        statuses.append(status)
+        if status == 200: plan_times.append(time.perf_counter() - start)
+        elif status == 503: time.sleep(0.05) # Back off as Retry-After asks
+
+def probe_loop(user_id):
+    client = client_for(A, user_id)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter(); assert client.get('/api/todos').status_code == 200
+        probe_times.append(time.perf_counter() - start); time.sleep(0.01)
+
+threads = [threading.Thread(target=plan_loop, args=(uid,)) for uid in user_ids[:planners]] + [threading.Thread(target=probe_loop, args=(user_ids[-1],))]
+start = time.perf_counter()
+for t in threads: t.start()
+for t in threads: t.join()
+elapsed = time.perf_counter() - start
+plan_p50, plan_p95 = np.percentile(np.array(plan_times) * 1000, [50, 95]) if plan_times else (float('nan'),) * 2
+probe_p50, probe_p95, probe_p99 = np.percentile(np.array(probe_times) * 1000, [50, 95, 99])
+print(json.dumps({'plans_per_s': len(plan_times) / elapsed, 'plan_p50': plan_p50, 'plan_p95': plan_p95, 'shed': statuses.count(503),
+                  'probe_p50': probe_p50, 'probe_p95': probe_p95, 'probe_p99': probe_p99}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--planners', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--recipes', type=int, default=20000)
+    parser.add_argument('--workers', default='0,2', help="Comma-separated PLAN_PROCESS_WORKERS values; 0 = in the request threads")
+    args = parser.parse_args()
+
+    print(f"planners={args.planners} duration={args.duration}s recipes={args.recipes} cpus={os.cpu_count()}")
+    print(f"{'workers':>8} {'plans/s':>8} {'plan p50':>9} {'plan p95':>9} {'503s':>6} {'probe p50':>10} {'probe p95':>10} {'probe p99':>10}")
+    for workers in [int(w) for w in args.workers.split(',')]:
+        with tempfile.TemporaryDirectory() as workdir:
+            out = subprocess.run([sys.executable, '-c', CHILD, os.path.dirname(os.path.abspath(__file__)), workdir, str(args.planners), str(args.duration), str(args.recipes)],
+                                 env=dict(os.environ, PLAN_PROCESS_WORKERS=str(workers)), capture_output=True, text=True, check=True).stdout
+            row = json.loads(out.strip().splitlines()[-1])
+        print(f"{workers or 'off':>8} {row['plans_per_s']:>8.1f} {row['plan_p50']:>9.1f} {row['plan_p95']:>9.1f} {row['shed']:>6} "
+              f"{row['probe_p50']:>10.2f} {row['probe_p95']:>10.2f} {row['probe_p99']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# backend/benchmarks/bench_recipe_catalog.py
+# Per-request cost of selecting a user's recipe pool: the old per-request DataFrame
+# cleaning/filtering vs. a RecipeCatalog lookup, as the catalog grows.
+#
+#   python benchmarks/bench_recipe_catalog.py [--sizes 1000,10000,100000,1000000]
+
+import argparse
+import time
+
+import pandas as pd
+
+from synthetic import make_diet_dataframe
+from recipe_catalog import RecipeCatalog
+
+PROFILES = [('vegetarian', 'Indian, Italian'), ('vegan', ''), ('non-vegetarian', 'Chinese'), ('any', 'Thai,Mexican')]
+
+
+def legacy_pool(diet_df, diet_pref, preferred_cuisines_str):
+    # The filtering that generate_weekly_diet_plan used to run on every request
+    base_df = diet_df.copy()
+    required_cols = ['Recipe_name', 'Calories', 'Protein', 'Carbs', 'Fat', 'Cuisine', 'Diet_type']
+    base_df.dropna(subset=required_cols, inplace=True)
+    for col in ['Calories', 'Protein', 'Carbs', 'Fat']:
+        base_df[col] = pd.to_numeric(base_df[col], errors='coerce').fillna(0).astype(int)
+    base_df = base_df[base_df['Calories'] > 50]
+    preferred_cuisines_list = [c.strip().lower() for c in preferred_cuisines_str.split(',') if c.strip()]
+    filtered_df = base_df.copy()
+    if diet_pref == 'vegetarian': filtered_df = filtered_df[filtered_df['Diet_type'].str.lower().isin(['vegetarian', 'vegan'])]
+    elif diet_pref == 'vegan': filtered_df = filtered_df[filtered_df['Diet_type'].str.lower() == 'vegan']
+    elif diet_pref == 'non-vegetarian': filtered_df = filtered_df[~filtered_df['Diet_type'].str.lower().isin(['vegetarian', 'vegan'])]
+    if filtered_df.empty: filtered_df = base_df.copy()
+    if preferred_cuisines_list:
+        cuisine_filtered = filtered_df[filtered_df['Cuisine'].notna() & filtered_df['Cuisine'].astype(str).str.lower().isin(preferred_cuisines_list)]
+        return cuisine_filtered.copy() if not cuisine_filtered.empty else filtered_df.copy()
+    return filtered_df.copy()
+
+
+def per_call_ms(fn, repeat):
+    start = time.perf_counter()
+    for i in range(repeat): fn(*PROFILES[i % len(PROFILES)])
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'recipes':>10} {'build ms':>10} {'legacy ms/req':>14} {'catalog ms/req':>15} {'speedup':>9}")
+    for n in [int(s) for s in args.sizes.split(',')]:
+        df = make_diet_dataframe(n)
+        start = time.perf_counter(); catalog = RecipeCatalog.from_dataframe(df); build_ms = (time.perf_counter() - start) * 1000
+        legacy_repeat = max(2, args.repeat * 1000 // n)
+        legacy_ms = per_call_ms(lambda d, c: legacy_pool(df, d, c), legacy_repeat)
+        # Cold lookups (cache cleared each time) so this measures the index path, not just the dict hit
+        def catalog_pool(d, c): catalog._combo_cache.clear(); return catalog.pool_indices(d, c)
+        catalog_ms = per_call_ms(catalog_pool, args.repeat * 50)
+        print(f"{n:>10} {build_ms:>10.1f} {legacy_ms:>14.3f} {catalog_ms:>15.4f} {legacy_ms / catalog_ms:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
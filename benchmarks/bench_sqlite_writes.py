@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_sqlite_writes.py
+# Concurrent small writes: --writers threads each POST /api/todos and /api/workout_logs back to back
+# for --duration seconds, with SQLite in its defaults (rollback journal, synchronous=FULL), in WAL
+# mode with synchronous=NORMAL, and in WAL mode with the group-commit writer. Each config runs in
+# a fresh process because app.py reads the storage settings at import.
+#
+#   python benchmarks/bench_sqlite_writes.py [--writers 16] [--duration 5]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+CONFIGS = [
+    ('default journal', {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_GROUP_COMMIT': '0'}),
+    ('wal', {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL', 'SQLITE_GROUP_COMMIT': '0'}),
+    ('wal + group commit', {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL', 'SQLITE_GROUP_COMMIT': '1'}),
+]
+
+CHILD = r'''
+import json, sys, threading, time
+import numpy as np
+sys.path.insert(0, sys.argv[1])
+from synthetic import client_for, load_app, seed_users
+workdir, writers, duration = sys.argv[2], int(sys.argv[3]), float(sys.argv[4])
+A = load_app(workdir)
+user_ids = seed_users(A, writers)
+latencies = []; failures = []; deadline = time.perf_counter() + duration
+
+def write_loop(user_id):
+    client = client_for(A, user_id); i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if i % 2: status = client.post('/api/todos', json={'task': f"Task {i}"}).status_code
+        else: status = client.post('/api/workout_logs', json={'exercise_name': 'Plank', 'duration_minutes': 10, 'calories_burned': 40}).status_code
+        latencies.append(time.perf_counter() - start); i += 1
+        if status != 201: failures.append(status)
+
+threads = [threading.Thread(target=write_loop, args=(uid,)) for uid in user_ids]
+start = time.perf_counter()
+for t in threads: t.start()
+for t in threads: t.join()
+elapsed = time.perf_counter() - start
+p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+print(json.dumps({'writes_per_s': len(latencies) / elapsed, 'p50': p50, 'p95': p95, 'p99': p99, 'failures': len(failures),
+                  'batches': A.write_queue.stats['batches'] if A.write_queue else None}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"writers={args.writers} duration={args.duration}s")
+    print(f"{'config':>20} {'writes/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'failed':>7} {'commits':>8}")
+    for name, env in CONFIGS:
+        with tempfile.TemporaryDirectory() as workdir:
+            out = subprocess.run([sys.executable, '-c', CHILD, os.path.dirname(os.path.abspath(__file__)), workdir, str(args.writers), str(args.duration)],
+                                 env=dict(os.environ, **env), capture_output=True, text=True, check=True).stdout
+            row = json.loads(out.strip().splitlines()[-1])
+        commits = row['batches'] if row['batches'] is not None else '1/write'
+        print(f"{name:>20} {row['writes_per_s']:>9.1f} {row['p50']:>8.2f} {row['p95']:>8.2f} {row['p99']:>8.2f} {row['failures']:>7} {commits:>8}")
+
+
+if __name__ == '__main__':
+    main()
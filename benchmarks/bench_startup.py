@@ -0,0 +1,60 @@
+# backend/benchmarks/bench_startup.py
+# Cold start: time from `import app` to the first served response (POST /api/login, which needs no
+# datasets) and to /api/ready, with the datasets loading in the background vs. waited for up front
+# (as the old import-time pd.read_csv did), for growing recipe CSVs. Each run is a fresh process.
+#
+#   python benchmarks/bench_startup.py [--sizes 1000,100000,1000000] [--runs 3]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from synthetic import BACKEND_DIR, write_diet_csv
+
+CHILD = r'''
+import json, logging, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import app as A
+imported = time.perf_counter()
+if sys.argv[2] == 'eager': A.catalogs.wait()
+logging.disable(logging.WARNING)
+response = A.app.test_client().post('/api/login', json={'username': 'nobody', 'password': 'wrong-password'})
+assert response.status_code == 401, response.status_code
+first_response = time.perf_counter()
+A.catalogs.wait(); assert A.catalogs.ready, A.catalogs.load_error
+ready = time.perf_counter()
+print(json.dumps({'import': imported - start, 'first_response': first_response - start, 'ready': ready - start}))
+'''
+
+
+def run_child(env, mode):
+    out = subprocess.run([sys.executable, '-c', CHILD, BACKEND_DIR, mode], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,100000,1000000')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'recipes':>10} {'mode':>6} {'import s':>9} {'first response s':>17} {'ready s':>8}")
+    for n in [int(s) for s in args.sizes.split(',')]:
+        with tempfile.TemporaryDirectory() as workdir:
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                       DIET_DATASET_PATH=write_diet_csv(os.path.join(workdir, 'diet.csv'), n))
+            subprocess.run([sys.executable, '-c', 'import sys; sys.path.insert(0, sys.argv[1]); import app as A\n'
+                            'with A.app.app_context(): A.db.create_all()', BACKEND_DIR], env=env, capture_output=True, check=True)
+            for mode in ('eager', 'lazy'):
+                runs = [run_child(env, mode) for _ in range(args.runs)]
+                median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+                print(f"{n:>10} {mode:>6} {median['import']:>9.3f} {median['first_response']:>17.3f} {median['ready']:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# backend/benchmarks/loadtest.py
+# HTTP load test: serves app.py from a child process (threaded werkzeug server) against a temporary
+# SQLite database seeded with synthetic users, workout logs and todos plus a synthetic recipe catalog,
+# then drives a weighted mix of API calls from concurrent logged-in clients for a fixed duration.
+# Reports throughput and p50/p95/p99 latency per operation, writes them as JSON, and can compare
+# against an earlier run's JSON (exit status 1 if any operation regressed past --threshold).
+#
+#   python benchmarks/loadtest.py [--users 200] [--logs-per-user 50] [--todos-per-user 10] [--recipes 1000]
+#                                 [--clients 16] [--duration 30] [--seed 0] [--out results.json]
+#                                 [--compare baseline.json] [--threshold 0.10]
+
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+
+from synthetic import BACKEND_DIR, load_app, seed_todos, seed_users, seed_workout_logs
+
+SERVER = r'''
+import logging, sys
+sys.path.insert(0, sys.argv[1])
+import app as A
+from werkzeug.serving import make_server
+logging.disable(logging.WARNING)
+make_server('127.0.0.1', int(sys.argv[2]), A.app, threaded=True).serve_forever()
+'''
+
+# (operation, weight, method, path, JSON body factory); each client picks operations by weight
+OPERATIONS = [
+    ('login', 1, 'POST', '/api/login', None), # Body filled in per client
+    ('weekly_diet_plan', 3, 'GET', '/api/weekly_diet_plan', None),
+    ('workout_logs.get', 3, 'GET', '/api/workout_logs?limit=50', None),
+    ('workout_logs.post', 2, 'POST', '/api/workout_logs', lambda rng: {'exercise_name': 'Burpees', 'duration_minutes': rng.randint(10, 60)}),
+    ('todos.get', 3, 'GET', '/api/todos', None),
+    ('todos.post', 1, 'POST', '/api/todos', lambda rng: {'task': f"Load test task {rng.randint(0, 10**6)}"}),
+    ('user_profile.get', 2, 'GET', '/api/user_profile', None),
+    ('user_profile.put', 1, 'PUT', '/api/user_profile', lambda rng: {'weight': rng.randint(60, 90)}),
+]
+
+
+def free_port():
+    with socket.socket() as s: s.bind(('127.0.0.1', 0)); return s.getsockname()[1]
+
+
+class Client:
+    # One browser-like session: its own cookie jar, logged in as one user
+    def __init__(self, base_url, username, password):
+        self.base_url = base_url; self.credentials = {'username': username, 'password': password}
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def call(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers={'Content-Type': 'application/json'} if data else {})
+        try:
+            with self.opener.open(req, timeout=60) as response: response.read(); return response.status
+        except urllib.error.HTTPError as e: e.read(); return e.code
+
+
+def run_client(client, seed, deadline, results):
+    rng = random.Random(seed)
+    ops = [op for op in OPERATIONS]; weights = [op[1] for op in ops]
+    while time.perf_counter() < deadline:
+        name, _, method, path, body = rng.choices(ops, weights)[0]
+        payload = client.credentials if name == 'login' else body(rng) if body else None
+        start = time.perf_counter()
+        try: status = client.call(method, path, payload)
+        except OSError: status = 0 # Connection-level failure
+        results.append((name, time.perf_counter() - start, status))
+
+
+def summarize(latencies, errors, duration):
+    latencies_ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies_ms) else (0.0, 0.0, 0.0)
+    return {'count': len(latencies), 'errors': errors, 'throughput_rps': round(len(latencies) / duration, 2),
+            'mean_ms': round(float(latencies_ms.mean()), 3) if len(latencies_ms) else 0.0,
+            'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3), 'p99_ms': round(float(p99), 3)}
+
+
+def git_revision():
+    try: return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return None
+
+
+def compare(current, baseline, threshold):
+    # Operations whose p95 rose or throughput fell by more than `threshold` (a fraction) vs. baseline
+    regressions = []
+    for name, now in current['operations'].items():
+        before = baseline.get('operations', {}).get(name)
+        if not before or not before['count'] or not now['count']: continue
+        if before['p95_ms'] and now['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f} -> {now['p95_ms']:.1f} ms")
+        if before['throughput_rps'] and now['throughput_rps'] < before['throughput_rps'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {before['throughput_rps']:.1f} -> {now['throughput_rps']:.1f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--logs-per-user', type=int, default=50)
+    parser.add_argument('--todos-per-user', type=int, default=10)
+    parser.add_argument('--recipes', type=int, default=1000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out')
+    parser.add_argument('--compare')
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        seed_start = time.perf_counter()
+        A = load_app(workdir, n_recipes=args.recipes, seed=args.seed)
+        user_ids = seed_users(A, args.users, seed=args.seed)
+        seed_workout_logs(A, user_ids, args.logs_per_user, seed=args.seed); seed_todos(A, user_ids, args.todos_per_user, seed=args.seed)
+        with A.app.app_context():
+            usernames = [u.username for u in A.User.query.filter(A.User.id.in_(user_ids[:args.clients])).order_by(A.User.id)]
+            A.db.engine.dispose() # The server process owns the database from here on
+        seed_seconds = time.perf_counter() - seed_start
+
+        port = free_port(); base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen([sys.executable, '-c', SERVER, BACKEND_DIR, str(port)], env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            probe = Client(base_url, None, None)
+            for _ in range(600): # Wait for the socket and the datasets
+                try:
+                    if probe.call('GET', '/api/ready') == 200: break
+                except OSError: pass
+                time.sleep(0.1)
+            else: raise SystemExit("Server did not become ready")
+
+            clients = [Client(base_url, usernames[i % len(usernames)], 'benchpass') for i in range(args.clients)]
+            for client in clients: assert client.call('POST', '/api/login', client.credentials) == 200
+            results = []; deadline = time.perf_counter() + args.duration
+            threads = [threading.Thread(target=run_client, args=(client, args.seed * 1000 + i, deadline, results)) for i, client in enumerate(clients)]
+            start = time.perf_counter()
+            for thread in threads: thread.start()
+            for thread in threads: thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            server.terminate(); server.wait()
+
+    by_op = {}
+    for name, seconds, status in results: by_op.setdefault(name, []).append((seconds, status))
+    report = {
+        'meta': {'timestamp': datetime.utcnow().isoformat() + 'Z', 'git_revision': git_revision(), 'python': platform.python_version(),
+                 'platform': platform.platform(), 'args': vars(args), 'seed_seconds': round(seed_seconds, 3), 'elapsed_seconds': round(elapsed, 3)},
+        'operations': {name: summarize([s for s, _ in samples], sum(1 for _, status in samples if not 200 <= status < 300), elapsed)
+                       for name, samples in sorted(by_op.items())},
+        'overall': summarize([seconds for _, seconds, _ in results], sum(1 for _, _, status in results if not 200 <= status < 300), elapsed),
+    }
+
+    print(f"users={args.users} logs/user={args.logs_per_user} todos/user={args.todos_per_user} recipes={args.recipes} clients={args.clients} duration={elapsed:.1f}s")
+    print(f"{'operation':>18} {'count':>7} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, row in list(report['operations'].items()) + [('overall', report['overall'])]:
+        print(f"{name:>18} {row['count']:>7} {row['errors']:>6} {row['throughput_rps']:>8.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}")
+
+    if args.out:
+        with open(args.out, 'w') as f: json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+    if args.compare:
+        with open(args.compare) as f: baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        print(f"Compared with {args.compare} ({baseline.get('meta', {}).get('git_revision')}): "
+              + ("no regressions" if not regressions else f"{len(regressions)} regression(s)"))
+        for line in regressions: print(f"  REGRESSION {line}")
+        if regressions: sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# backend/benchmarks/synthetic.py
+# Synthetic data shared by the benchmark scripts. Shapes and value ranges follow datasets/diet_dataset_1000.csv.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BACKEND_DIR not in sys.path: sys.path.insert(0, BACKEND_DIR)
+
+DIET_TYPES = ['Keto', 'Paleo', 'Vegan', 'Vegetarian', 'Mediterranean']
+CUISINES = ['Indian', 'Chinese', 'Italian', 'Mexican', 'American', 'Thai']
+
+
+def make_diet_dataframe(n_recipes, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Diet_type': rng.choice(DIET_TYPES, size=n_recipes),
+        'Recipe_name': [f"Recipe {i}" for i in range(n_recipes)],
+        'Calories': rng.integers(80, 1100, size=n_recipes),
+        'Protein': rng.integers(2, 60, size=n_recipes),
+        'Carbs': rng.integers(5, 120, size=n_recipes),
+        'Fat': rng.integers(1, 50, size=n_recipes),
+        'Cuisine': rng.choice(CUISINES, size=n_recipes),
+    })
+
+
+EXERCISE_TYPES = ['strength', 'core', 'cardio', 'flexibility']
+MUSCLES = ['Chest', 'Back', 'Shoulders', 'Biceps', 'Triceps', 'Core', 'Quads', 'Glutes', 'Hamstrings', 'Full Body']
+DIFFICULTIES = ['Beginner', 'Beginner-Intermediate', 'Intermediate', 'Advanced']
+
+
+def make_exercise_rows(n_exercises, seed=0):
+    # (name, type, target, duration_suggestion, difficulty) tuples, as in exercise_catalog.DEFAULT_EXERCISES
+    rng = np.random.default_rng(seed)
+    return [(f"Exercise {i}", str(rng.choice(EXERCISE_TYPES)), ', '.join(rng.choice(MUSCLES, size=int(rng.integers(1, 4)), replace=False)),
+             "3 sets of 10-12 reps", str(rng.choice(DIFFICULTIES))) for i in range(n_exercises)]
+
+
+def write_diet_csv(path, n_recipes, seed=0):
+    make_diet_dataframe(n_recipes, seed).to_csv(path, index=False)
+    return path
+
+
+def load_app(workdir, n_recipes=1000, seed=0):
+    # Import app.py against a throwaway SQLite file and a synthetic recipe CSV in `workdir`
+    import logging
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['DIET_DATASET_PATH'] = write_diet_csv(os.path.join(workdir, 'diet.csv'), n_recipes, seed)
+    import app as app_module
+    logging.disable(logging.WARNING) # app.py logs every request at DEBUG
+    app_module.login_manager.session_protection = None # Benchmarks reuse sessions across clients
+    with app_module.app.app_context(): app_module.db.create_all()
+    return app_module
+
+
+def seed_users(app_module, n_users, seed=0, is_admin_user=False):
+    # Bulk-insert synthetic users sharing one password hash ("benchpass"); returns their ids
+    rng = np.random.default_rng(seed)
+    A = app_module
+    with A.app.app_context():
+        password_hash = A.bcrypt.generate_password_hash('benchpass').decode('utf-8')
+        start = A.db.session.query(A.db.func.count(A.User.id)).scalar()
+        rows = [{
+            'username': f"bench_user_{start + i}", 'password_hash': password_hash,
+            'gender': str(rng.choice(['male', 'female', 'other'])), 'age': int(rng.integers(18, 70)),
+            'height_cm': float(rng.integers(150, 200)), 'weight_kg': float(rng.integers(50, 120)),
+            'diet_preference': str(rng.choice(['any', 'vegetarian', 'vegan', 'non-vegetarian'])),
+            'activity_level': str(rng.choice(['sedentary', 'light', 'moderate', 'active', 'very_active'])),
+            'goals': str(rng.choice(['weight_loss', 'muscle_gain', 'maintenance', 'endurance'])),
+            'preferred_cuisines': ', '.join(rng.choice(CUISINES, size=int(rng.integers(0, 3)), replace=False)),
+            'is_admin_user': is_admin_user,
+        } for i in range(n_users)]
+        A.db.session.execute(A.User.__table__.insert(), rows); A.db.session.commit()
+        A.backfill_user_metrics() # Core inserts skip the ORM hook that fills the stored metrics
+        return [uid for (uid,) in A.db.session.query(A.User.id).order_by(A.User.id.desc()).limit(n_users).all()][::-1]
+
+
+def client_for(app_module, user_id):
+    # Test client whose session is already logged in as user_id (skips bcrypt in /api/login)
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id); sess['_fresh'] = True
+    return client
+
+
+def seed_workout_logs(app_module, user_ids, per_user, seed=0, days=365):
+    # per_user WorkoutLog rows for each user, spread over the last `days` days
+    from exercise_catalog import DEFAULT_EXERCISES
+    from datetime import date, timedelta
+    rng = np.random.default_rng(seed); A = app_module; today = date.today()
+    names = [row[0] for row in DEFAULT_EXERCISES]
+    with A.app.app_context():
+        for start in range(0, len(user_ids), 1000): # Bounded batches keep memory flat at large scales
+            rows = [{
+                'user_id': uid, 'log_date': today - timedelta(days=int(offset)), 'exercise_name': names[int(name)],
+                'duration_minutes': int(duration), 'calories_burned': int(duration) * 8, 'feedback': None,
+            } for uid in user_ids[start:start + 1000]
+              for offset, name, duration in zip(rng.integers(0, days, per_user), rng.integers(0, len(names), per_user), rng.integers(10, 90, per_user))]
+            if rows: A.db.session.execute(A.WorkoutLog.__table__.insert(), rows)
+        A.db.session.commit()
+
+
+def seed_todos(app_module, user_ids, per_user, seed=0):
+    rng = np.random.default_rng(seed); A = app_module
+    with A.app.app_context():
+        for start in range(0, len(user_ids), 1000):
+            rows = [{'user_id': uid, 'task': f"Task {i}", 'completed': bool(done)}
+                    for uid in user_ids[start:start + 1000] for i, done in enumerate(rng.random(per_user) < 0.3)]
+            if rows: A.db.session.execute(A.Todo.__table__.insert(), rows)
+        A.db.session.commit()
@@ -0,0 +1,60 @@
+# backend/caching.py
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    # Thread-safe LRU cache with a per-entry time-to-live.
+    # Entries can carry tags (e.g. a user id) so everything for one tag can be dropped at once.
+
+    def __init__(self, maxsize=1024, ttl=3600, clock=time.monotonic):
+        self.maxsize = maxsize; self.ttl = ttl; self._clock = clock
+        self._data = OrderedDict() # key -> (expires_at, value, tags)
+        self._tags = {} # tag -> set of keys
+        self._lock = threading.Lock()
+        self.hits = 0; self.misses = 0
+
+    def __len__(self): return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None: self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            if key in self._data: self._remove(key)
+            self._data[key] = (self._clock() + self.ttl, value, tuple(tags))
+            for tag in tags: self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize: self._remove(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data: self._remove(key)
+
+    def invalidate_tag(self, tag):
+        with self._lock:
+            for key in list(self._tags.get(tag, ())): self._remove(key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / lookups, 4) if lookups else None}
+
+    def clear(self):
+        with self._lock: self._data.clear(); self._tags.clear()
+
+    def _remove(self, key):
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys: del self._tags[tag]
@@ -0,0 +1,45 @@
+# backend/catalog_service.py
+
+import threading
+import time
+
+
+class CatalogService:
+    # Holds the datasets built by `loader` (a function returning {name: value}). Loading happens once,
+    # on a background thread from start() or inline on first use; reading an attribute
+    # (service.diet_catalog) waits for it, so only requests that need the data ever block on it.
+
+    def __init__(self, loader, name='catalog-loader'):
+        self._loader = loader; self._name = name
+        self._values = {}; self._lock = threading.Lock(); self._loaded = threading.Event(); self._thread = None
+        self.load_error = None; self.load_seconds = None
+
+    @property
+    def ready(self): return self._loaded.is_set() and self.load_error is None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name=self._name, daemon=True); self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        self.start()
+        return self._loaded.wait(timeout)
+
+    def status(self):
+        return {"ready": self.ready, "loading": self._thread is not None and not self._loaded.is_set(),
+                "error": self.load_error, "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None}
+
+    def _load(self):
+        start = time.perf_counter()
+        try: self._values = dict(self._loader())
+        except Exception as e: self.load_error = f"{type(e).__name__}: {e}"
+        finally: self.load_seconds = time.perf_counter() - start; self._loaded.set()
+
+    def __getattr__(self, name):
+        if name.startswith('_'): raise AttributeError(name)
+        self.wait()
+        if self.load_error: raise RuntimeError(f"Datasets failed to load: {self.load_error}")
+        try: return self._values[name]
+        except KeyError: raise AttributeError(name) from None
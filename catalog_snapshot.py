@@ -0,0 +1,129 @@
+# backend/catalog_snapshot.py
+# Compiles the diet CSV into a binary RecipeCatalog snapshot that workers mmap read-only, so
+# startup skips CSV parsing and every process shares the same page-cache pages.
+#
+#   python catalog_snapshot.py ../datasets/diet_dataset_1000.csv [../datasets/diet_dataset_1000.rcat]
+#
+# Layout: MAGIC, little-endian uint64 header length, a JSON header (labels, fingerprint, source
+# CSV stat, array table), then 64-byte aligned fixed-width arrays. Recipe names are interned in a
+# string table (offsets + UTF-8 blob) indexed by name code.
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+from recipe_catalog import RecipeCatalog
+
+MAGIC = b'RCATSNP1'
+FORMAT_VERSION = 1
+ALIGN = 64
+
+
+class StringTable:
+    # Read-only sequence of strings stored as offsets[i]:offsets[i + 1] slices of a UTF-8 blob
+    __slots__ = ('offsets', 'blob')
+
+    def __init__(self, offsets, blob): self.offsets = offsets; self.blob = blob
+
+    def __len__(self): return len(self.offsets) - 1
+
+    def __getitem__(self, index): return self.blob[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+
+    @classmethod
+    def build(cls, strings):
+        encoded = [str(s).encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+
+def _source_stat(csv_path):
+    stat = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_snapshot(catalog, path, csv_path=None):
+    if catalog.error: raise ValueError(f"Refusing to snapshot an unusable catalog: {catalog.error}")
+    names = StringTable.build(catalog.name_labels)
+    arrays = {
+        'name_codes': catalog.name_codes, 'calories': catalog.calories, 'protein': catalog.protein,
+        'carbs': catalog.carbs, 'fat': catalog.fat, 'diet_codes': catalog.diet_codes, 'cuisine_codes': catalog.cuisine_codes,
+        'name_offsets': names.offsets, 'name_blob': names.blob,
+    }
+    for pref, (diet_ids, by_cuisine, offsets) in catalog.indexes.items():
+        arrays[f'index.{pref}.diet_ids'] = diet_ids; arrays[f'index.{pref}.by_cuisine'] = by_cuisine; arrays[f'index.{pref}.cuisine_offsets'] = offsets
+
+    table, offset = {}, 0
+    for key, array in arrays.items():
+        array = np.ascontiguousarray(array); arrays[key] = array
+        table[key] = {"dtype": array.dtype.str, "offset": offset, "count": len(array)}
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    header = {
+        "version": FORMAT_VERSION, "rows": len(catalog), "fingerprint": catalog.fingerprint,
+        "diet_labels": list(catalog.diet_labels), "cuisine_labels": list(catalog.cuisine_labels),
+        "index_prefs": list(catalog.indexes), "source": _source_stat(csv_path) if csv_path else None, "arrays": table,
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGN) * ALIGN
+
+    tmp_path = f"{path}.tmp{os.getpid()}" # Written aside then renamed, so mapped readers never see a partial file
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC); f.write(struct.pack('<Q', len(header_bytes))); f.write(header_bytes)
+        for key, array in arrays.items():
+            f.seek(data_start + table[key]["offset"]); f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC: raise ValueError(f"{path} is not a recipe catalog snapshot")
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len))
+    if header["version"] != FORMAT_VERSION: raise ValueError(f"Unsupported snapshot version {header['version']}")
+    header["data_start"] = -(-(len(MAGIC) + 8 + header_len) // ALIGN) * ALIGN
+    return header
+
+
+def snapshot_is_current(path, csv_path):
+    # True if the snapshot was built from csv_path as it is now (or the CSV is gone)
+    source = read_header(path)["source"]
+    if not os.path.exists(csv_path): return True
+    if source is None: return False
+    current = _source_stat(csv_path)
+    return (source["size"], source["mtime_ns"]) == (current["size"], current["mtime_ns"])
+
+
+def load_snapshot(path):
+    # RecipeCatalog whose arrays are read-only views into a shared mmap of the file
+    header = read_header(path)
+    with open(path, 'rb') as f: buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    def array(key):
+        spec = header["arrays"][key]
+        return np.frombuffer(buffer, dtype=np.dtype(spec["dtype"]), count=spec["count"], offset=header["data_start"] + spec["offset"])
+    indexes = {pref: (array(f'index.{pref}.diet_ids'), array(f'index.{pref}.by_cuisine'), array(f'index.{pref}.cuisine_offsets'))
+               for pref in header["index_prefs"]}
+    return RecipeCatalog(
+        name_codes=array('name_codes'), name_labels=StringTable(array('name_offsets'), array('name_blob')),
+        calories=array('calories'), protein=array('protein'), carbs=array('carbs'), fat=array('fat'),
+        diet_codes=array('diet_codes'), diet_labels=header["diet_labels"],
+        cuisine_codes=array('cuisine_codes'), cuisine_labels=header["cuisine_labels"],
+        fingerprint=header["fingerprint"], indexes=indexes,
+    )
+
+
+def default_snapshot_path(csv_path): return os.path.splitext(csv_path)[0] + '.rcat'
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3): sys.exit("usage: python catalog_snapshot.py <diet.csv> [<snapshot.rcat>]")
+    import pandas as pd
+    csv_path = sys.argv[1]; out_path = sys.argv[2] if len(sys.argv) == 3 else default_snapshot_path(csv_path)
+    catalog = RecipeCatalog.from_dataframe(pd.read_csv(csv_path))
+    write_snapshot(catalog, out_path, csv_path)
+    print(f"Wrote {out_path}: {len(catalog)} recipes, {len(catalog.name_labels)} distinct names, {os.path.getsize(out_path)} bytes, fingerprint {catalog.fingerprint}")
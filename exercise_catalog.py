@@ -0,0 +1,112 @@
+# backend/exercise_catalog.py
+
+import csv
+import random
+
+EXERCISE_COLUMNS = ('name', 'type', 'target', 'duration_suggestion', 'difficulty')
+
+# Built-in catalog, used unless EXERCISE_CATALOG_PATH points at a CSV with EXERCISE_COLUMNS
+DEFAULT_EXERCISES = [
+    ("Push-ups", "strength", "Chest, Shoulders, Triceps", "3 sets of AMRAP", "Intermediate"),
+    ("Squats (Bodyweight)", "strength", "Quads, Glutes, Hamstrings", "3 sets of 12-15 reps", "Beginner"),
+    ("Plank", "core", "Core", "3 sets, hold 30-60s", "Beginner"),
+    ("Lunges (Bodyweight)", "strength", "Quads, Glutes", "3 sets of 10-12 reps per leg", "Beginner"),
+    ("Burpees", "cardio", "Full Body", "3 sets of 8-12 reps", "Intermediate"),
+    ("Jumping Jacks", "cardio", "Full Body", "3-5 minutes", "Beginner"),
+    ("Running/Jogging (Moderate Pace)", "cardio", "Cardiovascular, Legs", "20-30 minutes", "Beginner-Intermediate"),
+    ("Cycling (Moderate Intensity)", "cardio", "Legs, Cardiovascular", "30-45 minutes", "Beginner-Intermediate"),
+    ("Bicep Curls (Dumbbells/Resistance Band)", "strength", "Biceps", "3 sets of 10-15 reps", "Beginner"),
+    ("Overhead Press (Dumbbells/Resistance Band)", "strength", "Shoulders, Triceps", "3 sets of 10-15 reps", "Beginner"),
+    ("Bent-Over Rows (Dumbbells/Resistance Band)", "strength", "Back, Biceps", "3 sets of 10-15 reps", "Beginner"),
+    ("Crunches", "core", "Upper Abs", "3 sets of 15-20 reps", "Beginner"),
+    ("Leg Raises (Lying)", "core", "Lower Abs", "3 sets of 15-20 reps", "Beginner"),
+    ("Bird-Dog", "core", "Core Stability, Back", "3 sets of 10-12 reps per side", "Beginner"),
+    ("Glute Bridges", "strength", "Glutes, Hamstrings", "3 sets of 15-20 reps", "Beginner"),
+    ("Yoga Flow (Beginner)", "flexibility", "Full Body", "20-30 minutes", "Beginner"),
+    ("Stretching Routine", "flexibility", "Major Muscle Groups", "10-15 minutes post-workout", "Beginner"),
+    ("High-Intensity Interval Training (HIIT) - Bodyweight", "cardio", "Full Body, Fat Loss", "15-20 mins (e.g., 30s work, 30s rest)", "Intermediate"),
+    ("Walking (Brisk)", "cardio", "General Fitness", "30-60 minutes", "Beginner"),
+]
+
+
+class Exercise:
+    __slots__ = ('name', 'type', 'target', 'duration_suggestion', 'difficulty', 'targets')
+
+    def __init__(self, name, type, target, duration_suggestion, difficulty):
+        self.name = name; self.type = type; self.target = target
+        self.duration_suggestion = duration_suggestion; self.difficulty = difficulty
+        self.targets = tuple(t.strip().lower() for t in target.split(',') if t.strip())
+
+    def as_dict(self):
+        return {"name": self.name, "type": self.type, "target": self.target, "duration_suggestion": self.duration_suggestion, "difficulty": self.difficulty}
+
+
+class ExerciseCatalog:
+    # Read-only exercise list, built once. Exercises are bucketed by type, target muscle and
+    # difficulty up front (each bucket keeps catalog order), so recommending is a random.sample
+    # over a prebuilt tuple whatever the catalog size.
+
+    def __init__(self, exercises):
+        self.exercises = tuple(exercises)
+        self.by_type = self._partition(lambda e: (e.type,))
+        self.by_target = self._partition(lambda e: e.targets)
+        self.by_difficulty = self._partition(lambda e: (e.difficulty.lower(),))
+        self.by_name = {e.name.lower(): e for e in self.exercises}
+        self._type_unions = {}
+
+    def __len__(self): return len(self.exercises)
+
+    @classmethod
+    def default(cls): return cls(Exercise(*row) for row in DEFAULT_EXERCISES)
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            return cls(Exercise(*(row[col].strip() for col in EXERCISE_COLUMNS)) for row in csv.DictReader(f))
+
+    def _partition(self, keys_of):
+        buckets = {}
+        for exercise in self.exercises:
+            for key in keys_of(exercise): buckets.setdefault(key, []).append(exercise)
+        return {key: tuple(bucket) for key, bucket in buckets.items()}
+
+    def of_types(self, *types):
+        # Exercises of any of `types`, in catalog order (what the old list comprehensions produced)
+        if len(types) == 1: return self.by_type.get(types[0], ())
+        bucket = self._type_unions.get(types)
+        if bucket is None:
+            wanted = set(types)
+            bucket = self._type_unions[types] = tuple(e for e in self.exercises if e.type in wanted)
+        return bucket
+
+    def recommend(self, user_goal, rng=random):
+        recommendations = []; goal_lower = user_goal.lower() if user_goal else "maintenance"
+
+        if goal_lower == 'muscle_gain':
+            strength_workouts = self.of_types('strength'); core_workouts = self.of_types('core')
+            if strength_workouts: recommendations.extend(rng.sample(strength_workouts, k=min(3, len(strength_workouts))))
+            if core_workouts: recommendations.extend(rng.sample(core_workouts, k=min(2, len(core_workouts))))
+        elif goal_lower == 'weight_loss':
+            cardio_workouts = self.of_types('cardio'); strength_core_workouts = self.of_types('strength', 'core')
+            if cardio_workouts: recommendations.extend(rng.sample(cardio_workouts, k=min(2, len(cardio_workouts))))
+            if strength_core_workouts: recommendations.extend(rng.sample(strength_core_workouts, k=min(3, len(strength_core_workouts))))
+        elif goal_lower == 'endurance':
+            cardio_workouts = self.of_types('cardio')
+            if cardio_workouts: recommendations.extend(rng.sample(cardio_workouts, k=min(4, len(cardio_workouts))))
+            core_workouts = self.of_types('core') # Add a core workout for endurance
+            if core_workouts and len(recommendations) < 5: recommendations.append(core_workouts[0])
+        else: # Maintenance or other
+            if self.exercises: recommendations = rng.sample(self.exercises, k=min(5, len(self.exercises)))
+
+        # Ensure uniqueness and limit to 5
+        seen_names = set(); final_recs = []
+        for rec in recommendations:
+            if rec.name not in seen_names: final_recs.append(rec); seen_names.add(rec.name)
+        final_recs = final_recs[:5]
+
+        # If less than 3, try to add some general ones to reach at least 3 if possible (only tiny catalogs get here)
+        if len(final_recs) < 3 and len(self.exercises) >= 3:
+            general_fill = [e for e in self.exercises if e.name not in seen_names]
+            if general_fill: final_recs.extend(rng.sample(general_fill, k=min(3 - len(final_recs), len(general_fill))))
+
+        return [rec.as_dict() for rec in final_recs]
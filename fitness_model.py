@@ -0,0 +1,111 @@
+# backend/fitness_model.py
+
+import bisect
+
+import numpy as np
+# pandas is imported inside from_dataframe only, so importing this module (and app.py) stays cheap
+
+REQUIRED_COLUMNS = ['Age', 'Gender', 'Height_cm', 'Weight_kg', 'Workout_type', 'Duration_min', 'Calories_burned']
+GENDERS = ('female', 'male') # Anything else uses the all-genders slot
+AGE_BAND_EDGES = (30, 40, 50) # <30, 30-39, 40-49, 50+
+BMI_CATEGORIES = ('Underweight', 'Normal weight', 'Overweight', 'Obesity') # Same labels as get_bmi_category
+MIN_SEGMENT_ROWS = 5 # Fewer rows than this and a cell borrows the estimate of the next coarser segment
+
+# Exercise-catalog types -> dataset workout types, for names that don't mention one directly
+EXERCISE_TYPE_WORKOUTS = {'strength': 'strength', 'cardio': 'cardio', 'core': 'pilates', 'flexibility': 'yoga'}
+CARDIO_KEYWORDS = ('run', 'jog', 'cycl', 'bike', 'walk', 'swim', 'rowing', 'jump', 'burpee', 'skip')
+
+
+def bmi_category_codes(weight_kg, height_cm):
+    # Index into BMI_CATEGORIES with get_bmi_category's thresholds (bmi rounded to 1 decimal); -1 for N/A
+    bmi = np.round(np.divide(weight_kg, (height_cm / 100) ** 2, out=np.zeros(len(weight_kg)), where=(weight_kg > 0) & (height_cm > 0)), 1)
+    return np.select([bmi == 0, bmi < 18.5, (bmi >= 18.5) & (bmi < 24.9), (bmi >= 25) & (bmi < 29.9)], [-1, 0, 1, 2], 3)
+
+
+class WorkoutCalorieModel:
+    # Calorie burn per minute per kg of body weight, by workout type and user segment (gender, age
+    # band, BMI category), averaged from the fitness dataset once at startup. Every axis has an extra
+    # trailing "any" slot; cells with too few rows are filled from coarser segments while building,
+    # so a lookup is a single index into `rates` and never touches pandas.
+
+    def __init__(self, workout_types, rates, counts, error=None):
+        self.workout_types = tuple(workout_types)
+        self.rates = rates # float64 [types + 1, genders + 1, age bands + 1, bmi categories + 1]
+        self.counts = counts # rows behind each cell before fallbacks
+        self.error = error
+        self._type_index = {name: i for i, name in enumerate(self.workout_types)}
+
+    @classmethod
+    def empty(cls, error):
+        return cls((), np.full((1, len(GENDERS) + 1, len(AGE_BAND_EDGES) + 2, len(BMI_CATEGORIES) + 1), np.nan), None, error=error)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        import pandas as pd
+        if df is None or df.empty: return cls.empty("Fitness data not available.")
+        missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        if missing: return cls.empty(f"Fitness data incomplete (missing: {', '.join(missing)}).")
+
+        clean = df[REQUIRED_COLUMNS].dropna()
+        numeric = {col: pd.to_numeric(clean[col], errors='coerce').to_numpy(dtype=float) for col in ('Age', 'Height_cm', 'Weight_kg', 'Duration_min', 'Calories_burned')}
+        keep = (numeric['Duration_min'] > 0) & (numeric['Weight_kg'] > 0) & (numeric['Calories_burned'] >= 0)
+        if not keep.any(): return cls.empty("No usable workouts in the fitness data.")
+
+        workout_cat = pd.Categorical(clean['Workout_type'].astype(str).str.strip().str.lower().to_numpy()[keep])
+        n_types = len(workout_cat.categories)
+        genders = clean['Gender'].astype(str).str.lower().to_numpy()[keep]
+        gender_codes = np.select([genders == g for g in GENDERS], list(range(len(GENDERS))), len(GENDERS))
+        axes = [
+            (workout_cat.codes.astype(np.int64), n_types),
+            (gender_codes, len(GENDERS)),
+            (np.digitize(numeric['Age'][keep], AGE_BAND_EDGES), len(AGE_BAND_EDGES) + 1),
+            (bmi_category_codes(numeric['Weight_kg'][keep], numeric['Height_cm'][keep]), len(BMI_CATEGORIES)),
+        ]
+        per_kg_minute = numeric['Calories_burned'][keep] / (numeric['Duration_min'][keep] * numeric['Weight_kg'][keep])
+
+        # Sum into every combination of "specific value" / "any" on each axis (2^4 passes of np.add.at)
+        shape = tuple(size + 1 for _, size in axes)
+        sums = np.zeros(shape); counts = np.zeros(shape, dtype=np.int64)
+        for mask in range(1 << len(axes)):
+            specific = [mask >> axis & 1 for axis in range(len(axes))]
+            rows = np.ones(len(per_kg_minute), dtype=bool) # Rows with a real value on every specific axis
+            for is_specific, (codes, size) in zip(specific, axes):
+                if is_specific: rows &= (codes >= 0) & (codes < size)
+            index = tuple(codes[rows] if is_specific else np.full(rows.sum(), size) for is_specific, (codes, size) in zip(specific, axes))
+            np.add.at(sums, index, per_kg_minute[rows]); np.add.at(counts, index, 1)
+        rates = np.divide(sums, counts, out=np.full(shape, np.nan), where=counts >= MIN_SEGMENT_ROWS)
+
+        # Thin cells fall back to dropping BMI, then age, then gender, then workout type
+        for axis in (3, 2, 1, 0):
+            coarser = np.take(rates, [-1], axis=axis)
+            rates = np.where(np.isnan(rates), coarser, rates)
+        return cls(workout_cat.categories, rates, counts)
+
+    def workout_type_index(self, workout_type):
+        return self._type_index.get((workout_type or '').lower(), len(self.workout_types))
+
+    def resolve_workout_type(self, exercise_name, exercise_type=None):
+        # Dataset workout type for a free-text exercise name (None -> the all-workouts average)
+        name = (exercise_name or '').lower()
+        for workout_type in self.workout_types:
+            if workout_type in name: return workout_type
+        if exercise_type in EXERCISE_TYPE_WORKOUTS and EXERCISE_TYPE_WORKOUTS[exercise_type] in self._type_index: return EXERCISE_TYPE_WORKOUTS[exercise_type]
+        if any(keyword in name for keyword in CARDIO_KEYWORDS) and 'cardio' in self._type_index: return 'cardio'
+        return None
+
+    @staticmethod
+    def segment(gender, age, bmi_category):
+        gender_l = gender.lower() if gender else ''
+        gender_code = GENDERS.index(gender_l) if gender_l in GENDERS else len(GENDERS)
+        age_band = bisect.bisect_right(AGE_BAND_EDGES, age) if age else len(AGE_BAND_EDGES) + 1
+        bmi_code = BMI_CATEGORIES.index(bmi_category) if bmi_category in BMI_CATEGORIES else len(BMI_CATEGORIES)
+        return gender_code, age_band, bmi_code
+
+    def calories_per_minute(self, workout_type, segment, weight_kg):
+        # None when there is no fitness data or no body weight to scale by
+        if self.error or not weight_kg: return None
+        return float(self.rates[(self.workout_type_index(workout_type),) + tuple(segment)] * weight_kg)
+
+    def estimate_calories(self, workout_type, segment, weight_kg, duration_minutes):
+        per_minute = self.calories_per_minute(workout_type, segment, weight_kg)
+        return None if per_minute is None else int(round(per_minute * duration_minutes))
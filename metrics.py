@@ -0,0 +1,133 @@
+# backend/metrics.py
+# In-process counters and fixed-bucket histograms, rendered in the Prometheus text exposition
+# format for /metrics. Values are per process: with several workers, scrape each one (or sum them).
+# A disabled Registry hands out one shared no-op instrument and timed() returns functions
+# unwrapped, so instrumented code costs nothing beyond a method call when metrics are off.
+
+import bisect
+import threading
+import time
+from functools import wraps
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+
+def _escape(value): return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra: pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value): return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name; self.help = help; self.labelnames = tuple(labelnames)
+        self._values = {}; self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock: self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()): return self._values.get(labels, 0)
+
+    def render(self):
+        with self._lock: values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name; self.help = help; self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {} # labels -> [per-bucket counts (last = +Inf)..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        slot = bisect.bisect_left(self.buckets, value) # le semantics: value == bound lands in that bucket
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None: series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[slot] += 1; series[-2] += value; series[-1] += 1
+
+    def snapshot(self, labels=()):
+        # {"buckets": cumulative counts by upper bound, "sum", "count"} for one label set
+        with self._lock: series = list(self._series.get(labels) or [0] * (len(self.buckets) + 1) + [0.0, 0])
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float('inf'),), series[:-2]): running += count; cumulative[bound] = running
+        return {"buckets": cumulative, "sum": series[-2], "count": series[-1]}
+
+    def render(self):
+        with self._lock: items = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = []
+        for labels, series in items:
+            running = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-2]):
+                running += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class CallbackMetric:
+    # Values read at scrape time from collect() -> {label tuple: value}, for counts another object already keeps
+    def __init__(self, name, help, kind, labelnames, collect):
+        self.name = name; self.help = help; self.kind = kind; self.labelnames = tuple(labelnames); self._collect = collect
+
+    def render(self):
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in sorted(self._collect().items())]
+
+
+class _NullMetric:
+    # Stands in for every instrument of a disabled Registry
+    def inc(self, labels=(), amount=1): pass
+
+    def observe(self, labels, value): pass
+
+
+NULL_METRIC = _NullMetric()
+
+
+class Registry:
+    def __init__(self, enabled=True):
+        self.enabled = enabled; self._metrics = []
+
+    def _register(self, metric):
+        if not self.enabled: return NULL_METRIC
+        if any(existing.name == metric.name for existing in self._metrics): raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics.append(metric); return metric
+
+    def counter(self, name, help, labelnames=()): return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS): return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, labelnames, collect, kind='gauge'): return self._register(CallbackMetric(name, help, kind, labelnames, collect))
+
+    def timed(self, histogram, *labels):
+        # Decorator observing the wall time of each call (including ones that raise) into histogram[labels]
+        def decorate(func):
+            if not self.enabled: return func
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try: return func(*args, **kwargs)
+                finally: histogram.observe(labels, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}"); lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,43 @@
+# backend/password_hashing.py
+# Runs bcrypt hashing/verification on a small fixed thread pool (bcrypt releases the GIL, so the
+# pool bounds how many cores a login burst can take). Callers wait for their result; at most
+# max_workers + max_queue operations are admitted at once and anything past that waits up to
+# queue_timeout for a slot, then gets PasswordHasherBusy (surfaced as 503 + Retry-After).
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, flask_bcrypt, rounds=12, max_workers=1, max_queue=32, queue_timeout=5.0):
+        self._bcrypt = flask_bcrypt; self.rounds = rounds; self.queue_timeout = queue_timeout
+        self.max_workers = max_workers; self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock(); self.stats = {'hashed': 0, 'verified': 0, 'rejected': 0}
+
+    def _run(self, stat, func, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock: self.stats['rejected'] += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+        try: result = self._executor.submit(func, *args).result()
+        finally: self._slots.release()
+        with self._lock: self.stats[stat] += 1
+        return result
+
+    def hash(self, password):
+        return self._run('hashed', self._bcrypt.generate_password_hash, password, self.rounds).decode('utf-8')
+
+    def verify(self, password_hash, password):
+        return self._run('verified', self._bcrypt.check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # True if the stored hash was made with a different cost than the configured one ($2b$<cost>$...)
+        try: return int(password_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError): return True
+
+    def shutdown(self): self._executor.shutdown(wait=True)
@@ -0,0 +1,56 @@
+# backend/plan_generator.py
+# The weekly diet plan algorithm on a RecipeCatalog, with no Flask/DB dependencies, so the plan
+# process pool (plan_pool.py) can run it in child processes. app.py wraps these with its logging,
+# metrics and storage.
+
+import numpy as np
+
+MEAL_CALORIE_DISTRIBUTION = {'breakfast': 0.25, 'lunch': 0.40, 'dinner': 0.35}
+MIN_POOL_RECIPES = 7 # Need some variety
+
+
+def plan_matcher(diet_catalog, user_profile_data):
+    # (CalorieMatcher, error) for a profile's recipe pool
+    if diet_catalog.error: return None, diet_catalog.error
+    matcher = diet_catalog.matcher(user_profile_data.get('diet_preference'), user_profile_data.get('preferred_cuisines'))
+    if len(matcher) < MIN_POOL_RECIPES: return None, "Not enough diverse food items for your preferences."
+    return matcher, None
+
+
+def pick_meal(matcher, target_meal_calories, used_names_this_day, used_names_for_week, num_options, rng):
+    # Prefer names not used this day or earlier this week, then not used this day, then anything
+    return (matcher.pick(target_meal_calories, used_names_this_day | used_names_for_week, num_options, rng)
+            or matcher.pick(target_meal_calories, used_names_this_day, num_options, rng)
+            or matcher.pick(target_meal_calories, np.zeros_like(used_names_this_day), num_options, rng))
+
+
+def generate_single_day(diet_catalog, matcher, target_calories_total, used_names_for_week, num_options_per_meal, rng):
+    # ([meals][options] recipe ids, -1 padded; name codes used this day)
+    day_ids = np.full((len(MEAL_CALORIE_DISTRIBUTION), num_options_per_meal), -1, dtype=np.int32)
+    used_names_this_day = np.zeros(len(diet_catalog.name_labels), dtype=bool)
+    for meal_num, proportion in enumerate(MEAL_CALORIE_DISTRIBUTION.values()):
+        chosen_ids = pick_meal(matcher, target_calories_total * proportion, used_names_this_day, used_names_for_week, num_options_per_meal, rng)
+        day_ids[meal_num, :len(chosen_ids)] = chosen_ids
+        used_names_this_day[diet_catalog.name_codes[chosen_ids]] = True
+    return day_ids, used_names_this_day
+
+
+def iter_plan_ids(n_names, single_day):
+    # Yields (day_num, day ids) for 7 days; single_day(used_names_for_week) picks one day, and
+    # names used earlier in the week stay blocked for the days after
+    used_names_overall = np.zeros(n_names, dtype=bool)
+    for day_num in range(7):
+        day_ids, names_this_day = single_day(used_names_overall)
+        used_names_overall |= names_this_day
+        yield day_num, day_ids
+
+
+def generate_plan_ids(diet_catalog, user_profile_data, num_options_per_meal_per_day=1, seed=None):
+    # (plan_ids [7][meals][options], error); same seed + same profile + same catalog -> same plan
+    matcher, error = plan_matcher(diet_catalog, user_profile_data)
+    if error: return None, error
+    rng = np.random.default_rng(seed); target = user_profile_data.get('target_calories', 2000)
+    plan_ids = np.full((7, len(MEAL_CALORIE_DISTRIBUTION), num_options_per_meal_per_day), -1, dtype=np.int32)
+    days = iter_plan_ids(len(diet_catalog.name_labels), lambda used: generate_single_day(diet_catalog, matcher, target, used, num_options_per_meal_per_day, rng))
+    for day_num, day_ids in days: plan_ids[day_num] = day_ids
+    return plan_ids, None
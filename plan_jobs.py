@@ -0,0 +1,135 @@
+# backend/plan_jobs.py
+# Background plan generation: submit() queues work on a small thread pool and returns a PlanJob at
+# once. The work function publishes each day with job.add_day() as it is computed, so clients can
+# poll the job or stream its days while it runs. Finished jobs are kept for `ttl` seconds.
+# With a store (save(job), load(job_id) -> state dict or None, purge(before)), every change is written
+# through and jobs started by other processes are read back from it, so any worker can answer for a job.
+# Store methods should not raise; logging a failed write is up to the store.
+
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PlanJobsBusy(Exception):
+    pass
+
+
+class PlanJob:
+    def __init__(self, owner, store=None):
+        self.id = secrets.token_urlsafe(12); self.owner = owner # Random ids, so other users' jobs can't be guessed
+        self.status = 'queued'; self.days = []; self.result = None; self.error = None
+        self.created_at = time.time(); self.finished_at = None
+        self._changed = threading.Condition(); self._store = store
+
+    @property
+    def finished(self): return self.status in ('done', 'error')
+
+    def state(self):
+        return {"id": self.id, "owner": self.owner, "status": self.status, "days": list(self.days), "result": self.result,
+                "error": self.error, "created_at": self.created_at, "finished_at": self.finished_at}
+
+    def add_day(self, day):
+        with self._changed: self.days.append(day); self._changed.notify_all()
+        self._save()
+
+    def _set_status(self, status):
+        with self._changed: self.status = status
+        self._save()
+
+    def _finish(self, status, result=None, error=None):
+        with self._changed:
+            self.status = status; self.result = result; self.error = error; self.finished_at = time.time()
+            self._changed.notify_all()
+        self._save()
+
+    def _save(self):
+        if self._store is not None: self._store.save(self)
+
+    def iter_days(self, timeout=None):
+        # Days in order as they are published; returns once the job has finished (or timeout
+        # seconds pass without news, raising TimeoutError)
+        sent = 0
+        while True:
+            with self._changed:
+                if sent == len(self.days) and not self.finished:
+                    if not self._changed.wait(timeout): raise TimeoutError(f"Plan job {self.id} made no progress in {timeout}s")
+                new_days = self.days[sent:]; finished = self.finished
+            for day in new_days: sent += 1; yield day
+            if finished and sent == len(self.days): return
+
+    def as_dict(self):
+        body = {"job_id": self.id, "status": self.status, "days_ready": len(self.days)}
+        if self.status == 'done': body.update(self.result)
+        if self.status == 'error': body["error"] = self.error
+        return body
+
+
+class StoredPlanJob(PlanJob):
+    # A job another process runs (or ran), rebuilt from its store state. iter_days polls the store
+    # every poll_interval seconds instead of waiting on the job's thread.
+
+    def __init__(self, state, store, poll_interval=0.25):
+        self.id = state['id']; self.owner = state['owner']; self._store = store; self.poll_interval = poll_interval
+        self._apply(state)
+
+    def _apply(self, state):
+        self.status = state['status']; self.days = list(state['days']); self.result = state['result']; self.error = state['error']
+        self.created_at = state['created_at']; self.finished_at = state['finished_at']
+
+    def add_day(self, day): raise RuntimeError("Stored plan jobs are read-only")
+
+    def iter_days(self, timeout=None):
+        sent = 0; last_news = time.monotonic()
+        while True:
+            new_days = self.days[sent:]; finished = self.finished
+            for day in new_days: sent += 1; yield day
+            if finished: return
+            if new_days: last_news = time.monotonic()
+            elif timeout is not None and time.monotonic() - last_news >= timeout: raise TimeoutError(f"Plan job {self.id} made no progress in {timeout}s")
+            time.sleep(self.poll_interval)
+            state = self._store.load(self.id)
+            if state is None: raise TimeoutError(f"Plan job {self.id} expired")
+            self._apply(state)
+
+
+class PlanJobRunner:
+    def __init__(self, max_workers=2, max_pending=100, ttl=600, name='plan-job', store=None):
+        self.max_pending = max_pending; self.ttl = ttl; self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs = {}; self._lock = threading.Lock(); self._pending = 0
+        self.stats = {'submitted': 0, 'done': 0, 'failed': 0, 'rejected': 0}
+
+    def submit(self, owner, work):
+        # work(job) runs on a worker and returns the finished result dict; an exception fails the job
+        with self._lock:
+            self._purge()
+            if self._pending >= self.max_pending:
+                self.stats['rejected'] += 1; raise PlanJobsBusy("Too many plan jobs queued")
+            job = PlanJob(owner, self.store); self._jobs[job.id] = job; self._pending += 1; self.stats['submitted'] += 1
+        if self.store is not None: self.store.purge(time.time() - self.ttl)
+        job._save()
+        self._executor.submit(self._run, job, work)
+        return job
+
+    def get(self, job_id, owner):
+        # This process's job, else one another process wrote to the store (None once past the ttl)
+        with self._lock: job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            state = self.store.load(job_id)
+            if state is not None and not (state['finished_at'] is not None and state['finished_at'] < time.time() - self.ttl): job = StoredPlanJob(state, self.store)
+        return job if job is not None and job.owner == owner else None
+
+    def _run(self, job, work):
+        job._set_status('running')
+        try: result = work(job)
+        except Exception as e: job._finish('error', error=str(e) or type(e).__name__); outcome = 'failed'
+        else:
+            if isinstance(result, dict) and 'error' in result: job._finish('error', error=result['error']); outcome = 'failed'
+            else: job._finish('done', result=result); outcome = 'done'
+        with self._lock: self._pending -= 1; self.stats[outcome] += 1
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]: del self._jobs[job_id]
@@ -0,0 +1,76 @@
+# backend/plan_pool.py
+# Runs plan generation in worker processes so it doesn't hold the request process's GIL. Workers
+# mmap the recipe catalog from a snapshot file (catalog_snapshot.py) instead of receiving it with
+# every task: all of them share the same page-cache pages, and a task ships only the profile in and
+# the small plan id array out. At most max_pending plans may be queued or running; past that, or when
+# a plan takes longer than `timeout` seconds, generate() raises PlanPoolBusy (surfaced as 503 +
+# Retry-After). A worker that dies breaks the executor: it is replaced and BrokenProcessPool re-raised,
+# so the caller can generate that plan itself and later plans use the new workers.
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from catalog_snapshot import load_snapshot
+from plan_generator import generate_plan_ids
+
+_worker_catalog = None
+
+
+def _init_worker(snapshot_path):
+    global _worker_catalog
+    _worker_catalog = load_snapshot(snapshot_path)
+
+
+def _generate_in_worker(user_profile_data, num_options_per_meal_per_day, seed):
+    plan_ids, error = generate_plan_ids(_worker_catalog, user_profile_data, num_options_per_meal_per_day, seed)
+    return plan_ids, error, _worker_catalog.fingerprint
+
+
+class PlanPoolBusy(Exception):
+    pass
+
+
+class PlanProcessPool:
+    def __init__(self, snapshot_path, fingerprint, max_workers=2, max_pending=8, start_method='spawn', timeout=30):
+        # fingerprint: the parent's catalog fingerprint; results from a worker holding another catalog are refused
+        self.snapshot_path = snapshot_path; self.fingerprint = fingerprint; self.max_pending = max_pending; self.timeout = timeout
+        self.max_workers = max_workers; self._mp_context = multiprocessing.get_context(start_method)
+        self._executor = self._new_executor()
+        self._lock = threading.Lock(); self._pending = 0
+        self.stats = {'completed': 0, 'rejected': 0, 'timed_out': 0, 'restarts': 0}
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._mp_context, initializer=_init_worker, initargs=(self.snapshot_path,))
+
+    def _replace_executor(self, broken):
+        with self._lock:
+            if self._executor is not broken: return # Another caller already replaced it
+            self._executor = self._new_executor(); self.stats['restarts'] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def generate(self, user_profile_data, num_options_per_meal_per_day=1, seed=None):
+        # (plan_ids, error) like plan_generator.generate_plan_ids; the calling thread waits without the GIL
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.stats['rejected'] += 1; raise PlanPoolBusy("Plan generation queue is full")
+            self._pending += 1
+        executor = self._executor; future = None
+        try:
+            future = executor.submit(_generate_in_worker, dict(user_profile_data), num_options_per_meal_per_day, seed)
+            plan_ids, error, fingerprint = future.result(timeout=self.timeout)
+        except BrokenProcessPool: self._replace_executor(executor); raise
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock: self.stats['timed_out'] += 1
+            raise PlanPoolBusy(f"Plan generation took longer than {self.timeout}s") from None
+        finally:
+            with self._lock: self._pending -= 1
+        if fingerprint != self.fingerprint: raise RuntimeError(f"Plan worker catalog {fingerprint} does not match {self.fingerprint}")
+        with self._lock: self.stats['completed'] += 1
+        return plan_ids, error
+
+    def shutdown(self):
+        with self._lock: executor = self._executor
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,123 @@
+# backend/profiling.py
+# Opt-in profiling for live traffic.
+#   ProfileStore keeps the last N per-request cProfile captures (pstats-compatible, downloadable).
+#   StackSampler aggregates collapsed stacks ("outer;inner;leaf count", the input format of
+#   flamegraph.pl and speedscope) for threads inside tracked functions, over a rolling window.
+# Both are inert unless app.py enables them; StackSampler.track returns functions unwrapped when off.
+
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from functools import wraps
+
+
+class _LoadedStats:
+    # Lets pstats.Stats read a marshalled stats dict without a file on disk
+    def __init__(self, stats): self.stats = stats
+
+    def create_stats(self): pass
+
+
+class ProfileStore:
+    def __init__(self, maxsize=50):
+        self._entries = deque(maxlen=maxsize); self._ids = itertools.count(1); self._lock = threading.Lock()
+
+    def add(self, profiler, **meta):
+        profiler.create_stats()
+        entry = dict(meta, id=next(self._ids), captured_at=datetime.utcnow().isoformat() + 'Z', data=marshal.dumps(profiler.stats))
+        with self._lock: self._entries.append(entry)
+        return entry['id']
+
+    def list(self):
+        with self._lock: return [{k: v for k, v in entry.items() if k != 'data'} for entry in reversed(self._entries)]
+
+    def get(self, profile_id):
+        with self._lock: return next((entry for entry in self._entries if entry['id'] == profile_id), None)
+
+    @staticmethod
+    def as_text(entry, sort='cumulative', limit=40):
+        out = io.StringIO()
+        pstats.Stats(_LoadedStats(marshal.loads(entry['data'])), stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+def start_profile():
+    profiler = cProfile.Profile(); profiler.enable(); return profiler
+
+
+def _frame_label(code): return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    # Every interval, snapshots the stacks of threads currently inside a track()ed function and
+    # counts them folded from that function down. Counts live in one Counter per bucket_seconds,
+    # and only the last window_seconds worth are kept.
+
+    def __init__(self, interval=0.01, window_seconds=600, bucket_seconds=60, enabled=True, name='stack-sampler'):
+        self.interval = interval; self.enabled = enabled; self._name = name
+        self.bucket_seconds = bucket_seconds
+        self._buckets = deque(maxlen=max(1, window_seconds // bucket_seconds)) # (bucket start, Counter)
+        self._active = {} # thread id -> entry code objects (nested tracked calls stack up)
+        self._lock = threading.Lock(); self._thread = None
+        self.samples = 0
+
+    def track(self, func):
+        if not self.enabled: return func
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            thread_id = threading.get_ident(); self._ensure_started()
+            with self._lock: self._active.setdefault(thread_id, []).append(func.__code__)
+            try: return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    entries = self._active[thread_id]; entries.pop()
+                    if not entries: del self._active[thread_id]
+        return wrapper
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self._name, daemon=True); self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock: thread_ids = list(self._active)
+            if thread_ids: self._sample(thread_ids)
+
+    def _sample(self, thread_ids):
+        frames = sys._current_frames(); folded = []
+        with self._lock: outermost = {thread_id: self._active[thread_id][0] for thread_id in thread_ids if thread_id in self._active}
+        for thread_id, root in outermost.items():
+            frame = frames.get(thread_id); stack = []
+            while frame is not None: # Leaf up to the outermost tracked call, skipping track()'s own wrappers
+                if frame.f_code.co_filename != __file__: stack.append(_frame_label(frame.f_code))
+                if frame.f_code is root: break
+                frame = frame.f_back
+            if frame is not None: folded.append(';'.join(reversed(stack))) # Threads that already left the tracked call are dropped
+        if not folded: return
+        bucket_start = int(time.time()) // self.bucket_seconds * self.bucket_seconds
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != bucket_start: self._buckets.append((bucket_start, Counter()))
+            self._buckets[-1][1].update(folded); self.samples += len(folded)
+
+    def collapsed(self, since_seconds=None):
+        # Folded stacks summed over the window (or the last since_seconds), hottest first
+        cutoff = time.time() - since_seconds if since_seconds else 0
+        total = Counter()
+        with self._lock:
+            for bucket_start, counts in self._buckets:
+                if bucket_start + self.bucket_seconds > cutoff: total.update(counts)
+        return total.most_common()
+
+    def reset(self):
+        with self._lock: self._buckets.clear(); self.samples = 0
@@ -0,0 +1,259 @@
+# backend/recipe_catalog.py
+
+import hashlib
+import json
+
+import numpy as np
+
+from caching import TTLCache
+# pandas is imported inside the builders only, so importing this module (and app.py) stays cheap
+
+RECIPE_NAME_COLUMN = 'Recipe_name'
+NUMERIC_COLUMNS = ['Calories', 'Protein', 'Carbs', 'Fat']
+REQUIRED_COLUMNS = [RECIPE_NAME_COLUMN, 'Calories', 'Protein', 'Carbs', 'Fat', 'Cuisine', 'Diet_type']
+MIN_RECIPE_CALORIES = 50
+MAX_CACHED_POOLS = 512 # (diet preference, cuisine codes) pools and matchers kept per catalog, least recently used dropped
+
+# diet_preference -> (mode, diet types). 'include' keeps only those types, 'exclude' drops them.
+# Any other preference (including 'any') applies no diet filter.
+DIET_PREFERENCE_RULES = {
+    'vegetarian': ('include', ('vegetarian', 'vegan')),
+    'vegan': ('include', ('vegan',)),
+    'non-vegetarian': ('exclude', ('vegetarian', 'vegan')),
+}
+
+
+def normalize_cuisines(preferred_cuisines):
+    # "Indian, italian ,," -> ('indian', 'italian'); order-insensitive so it can be used as a key
+    if not preferred_cuisines: return ()
+    return tuple(sorted({c.strip().lower() for c in preferred_cuisines.split(',') if c.strip()}))
+
+
+def normalize_diet_preference(diet_preference):
+    diet_pref = (diet_preference or 'any').lower()
+    return diet_pref if diet_pref in DIET_PREFERENCE_RULES else 'any'
+
+
+class RecipeCatalog:
+    # Cleaned, read-only view of the diet dataset, built once at startup.
+    # Numeric columns are typed arrays, Diet_type/Cuisine are categorical codes and the
+    # row ids for every (diet preference, cuisine) pair are prebuilt, so picking a
+    # user's recipe pool is a dict lookup rather than a chain of DataFrame filters.
+
+    def __init__(self, name_codes, name_labels, calories, protein, carbs, fat, diet_codes, diet_labels, cuisine_codes, cuisine_labels,
+                 error=None, fingerprint=None, indexes=None):
+        # Names can repeat across rows; "used" bookkeeping is per distinct name (name_labels[name_codes[row]]),
+        # as it always was. fingerprint/indexes are passed in when loading a prebuilt snapshot.
+        self.name_codes = name_codes; self.name_labels = name_labels
+        self.calories = calories; self.protein = protein; self.carbs = carbs; self.fat = fat
+        self.diet_codes = diet_codes; self.diet_labels = diet_labels
+        self.cuisine_codes = cuisine_codes; self.cuisine_labels = cuisine_labels
+        self.cuisine_display = np.array(cuisine_labels, dtype=object)
+        self.diet_display = np.array(diet_labels, dtype=object)
+        self.error = error
+        self.fingerprint = fingerprint or self._fingerprint()
+        self._cuisine_codes_by_name = {}
+        for code, label in enumerate(cuisine_labels): self._cuisine_codes_by_name.setdefault(label.lower(), []).append(code)
+        self.indexes = indexes if indexes is not None else self._compute_indexes()
+        self._diet_index = {pref: diet_ids for pref, (diet_ids, _, _) in self.indexes.items()}
+        # Row ids per (diet preference, cuisine code): slices of one cuisine-ordered array per preference
+        self._pool_index = {(pref, code): by_cuisine[offsets[code]:offsets[code + 1]]
+                            for pref, (_, by_cuisine, offsets) in self.indexes.items() for code in range(len(cuisine_labels))}
+        self._combo_cache = TTLCache(maxsize=MAX_CACHED_POOLS, ttl=float('inf'))
+        self._matcher_cache = TTLCache(maxsize=MAX_CACHED_POOLS, ttl=float('inf'))
+        self._meal_fragments = {}
+        self._ids_by_entry = None
+
+    def __len__(self): return len(self.calories)
+
+    @classmethod
+    def empty(cls, error):
+        z = np.zeros(0, dtype=np.int32)
+        return cls(z, np.zeros(0, dtype=object), z, z, z, z, np.zeros(0, dtype=np.int16), [], np.zeros(0, dtype=np.int16), [], error=error)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        import pandas as pd
+        if df is None or df.empty: return cls.empty("Diet data not available.")
+        missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        if missing: return cls.empty(f"Diet data incomplete (missing: {', '.join(missing)}).")
+
+        clean = df[REQUIRED_COLUMNS].dropna()
+        numeric = {col: pd.to_numeric(clean[col], errors='coerce').fillna(0).astype(np.int32).to_numpy() for col in NUMERIC_COLUMNS}
+        keep = numeric['Calories'] > MIN_RECIPE_CALORIES
+        if not keep.any(): return cls.empty("No suitable food items after cleaning.")
+
+        name_codes, name_labels = pd.factorize(clean[RECIPE_NAME_COLUMN].astype(str).to_numpy(dtype=object)[keep])
+        diet_cat = pd.Categorical(clean['Diet_type'].astype(str).str.lower().to_numpy()[keep])
+        cuisine_cat = pd.Categorical(clean['Cuisine'].astype(str).to_numpy()[keep])
+        return cls(
+            name_codes=name_codes.astype(np.int32), name_labels=name_labels,
+            calories=numeric['Calories'][keep], protein=numeric['Protein'][keep],
+            carbs=numeric['Carbs'][keep], fat=numeric['Fat'][keep],
+            diet_codes=diet_cat.codes.astype(np.int16), diet_labels=list(diet_cat.categories),
+            cuisine_codes=cuisine_cat.codes.astype(np.int16), cuisine_labels=list(cuisine_cat.categories),
+        )
+
+    def _fingerprint(self):
+        # Identifies this exact catalog; stored recipe ids are only valid against the same fingerprint
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update('\x1f'.join(self.name_labels[self.name_codes]).encode('utf-8'))
+        for column in (self.calories, self.protein, self.carbs, self.fat): digest.update(np.ascontiguousarray(column, dtype=np.int32).tobytes())
+        digest.update('\x1f'.join(self.cuisine_labels).encode('utf-8')); digest.update(self.cuisine_codes.tobytes())
+        return digest.hexdigest()
+
+    def _compute_indexes(self):
+        # pref -> (row ids allowed by the diet preference, the same ids ordered by cuisine code,
+        # cuisine_offsets) where cuisine c occupies by_cuisine[offsets[c]:offsets[c + 1]], ids ascending
+        all_ids = np.arange(len(self), dtype=np.int32)
+        diet_index = {'any': all_ids}
+        for pref, (mode, diet_types) in DIET_PREFERENCE_RULES.items():
+            codes = [code for code, label in enumerate(self.diet_labels) if label in diet_types]
+            mask = np.isin(self.diet_codes, codes)
+            ids = all_ids[mask if mode == 'include' else ~mask]
+            diet_index[pref] = ids if len(ids) else all_ids # Empty filter -> whole catalog
+        indexes = {}
+        for pref, diet_ids in diet_index.items():
+            diet_cuisines = self.cuisine_codes[diet_ids]
+            order = np.argsort(diet_cuisines, kind='stable')
+            offsets = np.searchsorted(diet_cuisines[order], np.arange(len(self.cuisine_labels) + 1)).astype(np.int64)
+            indexes[pref] = (diet_ids, diet_ids[order], offsets)
+        return indexes
+
+    @staticmethod
+    def pool_key(diet_preference, preferred_cuisines):
+        cuisines = preferred_cuisines if isinstance(preferred_cuisines, tuple) else normalize_cuisines(preferred_cuisines)
+        return normalize_diet_preference(diet_preference), cuisines
+
+    def _resolved_pool_key(self, diet_preference, preferred_cuisines):
+        # What a pool is built from: the diet preference and this catalog's cuisine codes. Cuisine names
+        # the catalog doesn't know resolve to nothing, so free-text profile values can't add cache entries.
+        diet_pref, cuisines = self.pool_key(diet_preference, preferred_cuisines)
+        return diet_pref, tuple(sorted({code for c in cuisines for code in self._cuisine_codes_by_name.get(c, ())}))
+
+    def _pool(self, key):
+        ids = self._combo_cache.get(key)
+        if ids is None:
+            diet_pref, codes = key
+            ids = self._diet_index[diet_pref]
+            if codes:
+                parts = [self._pool_index[(diet_pref, code)] for code in codes]
+                cuisine_ids = parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+                if len(cuisine_ids): ids = cuisine_ids
+            self._combo_cache.set(key, ids)
+        return ids
+
+    def pool_indices(self, diet_preference, preferred_cuisines):
+        # Row ids a user may be served, with the same fallbacks as the original DataFrame filters:
+        # unknown cuisines or an empty cuisine match fall back to the diet-preference pool.
+        return self._pool(self._resolved_pool_key(diet_preference, preferred_cuisines))
+
+    def matcher(self, diet_preference, preferred_cuisines):
+        key = self._resolved_pool_key(diet_preference, preferred_cuisines)
+        matcher = self._matcher_cache.get(key)
+        if matcher is None:
+            matcher = CalorieMatcher(self, self._pool(key)); self._matcher_cache.set(key, matcher)
+        return matcher
+
+    def meal_entry(self, recipe_id):
+        return {
+            "name": str(self.name_labels[self.name_codes[recipe_id]]),
+            "calories": int(self.calories[recipe_id]),
+            "protein": int(self.protein[recipe_id]),
+            "carbs": int(self.carbs[recipe_id]),
+            "fat": int(self.fat[recipe_id]),
+            "cuisine": str(self.cuisine_display[self.cuisine_codes[recipe_id]]),
+        }
+
+    def find_entry(self, entry):
+        # Row id of a recipe shown as meal_entry(...) (name, cuisine and nutrients), or None. Row ids move
+        # when the dataset is edited, so clients send back what they were shown; identical rows are interchangeable.
+        if self._ids_by_entry is None:
+            keys = zip(self.name_labels[self.name_codes].tolist(), self.cuisine_display[self.cuisine_codes].tolist(), self.calories.tolist(),
+                       self.protein.tolist(), self.carbs.tolist(), self.fat.tolist())
+            ids_by_entry = {}
+            for recipe_id, key in enumerate(keys): ids_by_entry.setdefault(key, recipe_id)
+            self._ids_by_entry = ids_by_entry
+        try: key = (str(entry['name']), str(entry['cuisine']), int(entry['calories']), int(entry['protein']), int(entry['carbs']), int(entry['fat']))
+        except (KeyError, TypeError, ValueError): return None
+        return self._ids_by_entry.get(key)
+
+    def meal_fragment(self, recipe_id):
+        # meal_entry(recipe_id) as compact, key-sorted, ASCII JSON (what jsonify emits outside debug
+        # mode), built on first use and kept; plan responses are assembled from these strings
+        fragment = self._meal_fragments.get(recipe_id)
+        if fragment is None:
+            fragment = self._meal_fragments[int(recipe_id)] = json.dumps(self.meal_entry(recipe_id), sort_keys=True, separators=(',', ':'))
+        return fragment
+
+
+class CalorieMatcher:
+    # One recipe pool sorted by calories. A meal target becomes a [lo, hi) window via binary
+    # search; recipes are picked uniformly inside the window, skipping names already used.
+    # "Used" state is a boolean mask over catalog.name_labels owned by the caller.
+
+    def __init__(self, catalog, pool_ids, tolerance=0.35):
+        order = np.argsort(catalog.calories[pool_ids], kind='stable')
+        self.ids = pool_ids[order]
+        self.calories = catalog.calories[self.ids]
+        self.name_codes = catalog.name_codes[self.ids]
+        self.n_names = len(catalog.name_labels)
+        self.tolerance = tolerance
+
+    def __len__(self): return len(self.ids)
+
+    def window(self, target_calories):
+        slack = target_calories * self.tolerance
+        lo = np.searchsorted(self.calories, target_calories - slack, side='left')
+        hi = np.searchsorted(self.calories, target_calories + slack, side='right')
+        return lo, hi
+
+    def pick(self, target_calories, blocked_names, k, rng):
+        # Up to k recipe ids with distinct, unblocked names: uniform inside the tolerance window,
+        # then topped up with the closest recipes outside it. Returns [] if every name is blocked.
+        lo, hi = self.window(target_calories)
+        in_window = np.flatnonzero(~blocked_names[self.name_codes[lo:hi]]) + lo
+        if k == 1 and len(in_window):
+            return [int(self.ids[in_window[rng.integers(len(in_window))]])]
+
+        picked, picked_names = [], set()
+        for pos in (rng.permutation(in_window) if len(in_window) > 1 else in_window):
+            code = self.name_codes[pos]
+            if code in picked_names: continue
+            picked.append(int(self.ids[pos])); picked_names.add(code)
+            if len(picked) == k: return picked
+
+        # Window exhausted: take the nearest remaining recipes by calorie distance
+        outside = np.flatnonzero(~blocked_names[self.name_codes])
+        outside = outside[(outside < lo) | (outside >= hi)]
+        if len(outside):
+            for pos in outside[np.argsort(np.abs(self.calories[outside] - target_calories), kind='stable')]:
+                code = self.name_codes[pos]
+                if code in picked_names: continue
+                picked.append(int(self.ids[pos])); picked_names.add(code)
+                if len(picked) == k: break
+        return picked
+
+    def pick_many(self, targets, used_codes, rng, attempts=4):
+        # One recipe per row of `targets` (shape [users]). used_codes holds each user's blocked
+        # name codes (shape [users, m], -1 padded), which stays small however big the catalog is.
+        # Windows come from one vectorized searchsorted and picks are uniform draws with rejection
+        # of blocked names; users still unresolved after a few attempts go through the exact
+        # scalar pick(). -1 marks users with nothing left.
+        slack = targets * self.tolerance
+        lo = np.searchsorted(self.calories, targets - slack, side='left')
+        hi = np.searchsorted(self.calories, targets + slack, side='right')
+        chosen = np.full(len(targets), -1, dtype=np.int64)
+        pending = np.flatnonzero(hi > lo)
+        for _ in range(attempts):
+            if not len(pending): break
+            pos = rng.integers(lo[pending], hi[pending])
+            ok = ~(used_codes[pending] == self.name_codes[pos][:, None]).any(axis=1)
+            chosen[pending[ok]] = self.ids[pos[ok]]
+            pending = pending[~ok]
+        for user in np.flatnonzero(chosen < 0):
+            blocked_names = np.zeros(self.n_names, dtype=bool)
+            blocked_names[used_codes[user][used_codes[user] >= 0]] = True
+            picked = self.pick(targets[user], blocked_names, 1, rng)
+            if picked: chosen[user] = picked[0]
+        return chosen
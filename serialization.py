@@ -0,0 +1,128 @@
+# backend/serialization.py
+# JSON encoding for responses, with the exact bytes Flask's DefaultJSONProvider writes today:
+#   FastJSONProvider - app.json; compact responses (the non-debug default) are encoded with orjson
+#                      when it is installed, the json module otherwise
+#   RowEncoder       - a JSON array of objects straight from query result tuples, no per-row dicts
+#   plain_json_settings / json_text_response - for routes that assemble prebuilt JSON fragments
+
+import math
+from datetime import date
+from json.encoder import encode_basestring_ascii
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError: # Optional; everything falls back to the json module
+    orjson = None
+
+JSON_BACKENDS = ('auto', 'json', 'orjson')
+
+
+def _has_non_finite_float(value):
+    # NaN/Infinity anywhere in a JSON-ready structure (orjson writes them as null, the json module doesn't)
+    kind = type(value)
+    if kind is float: return not math.isfinite(value)
+    if kind is dict: return any(map(_has_non_finite_float, value.values()))
+    if kind is list or kind is tuple: return any(map(_has_non_finite_float, value))
+    return False
+
+
+def _orjson_may_differ(body, obj):
+    # True if the json module might write this differently: non-ASCII or DEL (ensure_ascii escapes
+    # them), tiny floats (1e-05 vs 0.00001) and exponent floats (repr() gives 1e+16 and 2.5e-07, orjson
+    # 1e16 and 2.5e-7), found as a digit before an 'e'. Matches inside strings only cost a re-encode.
+    # Plain substring and numpy scans, a few ms per MB. A null is usually just None, so obj is only
+    # searched for NaN/Infinity when the body has one.
+    if not body.isascii() or b'\x7f' in body or b'0.0000' in body: return True
+    data = np.frombuffer(body, dtype=np.uint8); before_e = np.flatnonzero(data[1:] == ord('e'))
+    if ((data[before_e] - ord('0')) < 10).any(): return True
+    if b'null' not in body: return False
+    try: return _has_non_finite_float(obj)
+    except RecursionError: return True
+
+
+def plain_json_settings(app):
+    # True when app.json writes compact, key-sorted, ASCII JSON: the form fragments are prebuilt in
+    provider = app.json
+    compact = getattr(provider, 'compact', None)
+    if compact is None: compact = not app.debug
+    return bool(compact and getattr(provider, 'sort_keys', False) and getattr(provider, 'ensure_ascii', False))
+
+
+def json_text_response(app, text, status=200):
+    # A response whose body is already JSON text, written the way jsonify writes its own
+    return app.response_class(text + "\n", status=status, mimetype=app.json.mimetype)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    # backend: 'auto' (orjson when installed), 'json' or 'orjson'. Only response() changes; dumps()
+    # and loads() are DefaultJSONProvider's. orjson output is used when nothing in it could differ
+    # from the json module's, and anything orjson refuses (unknown types, big ints, non-str keys)
+    # goes through the json module too, so errors are unchanged.
+
+    def __init__(self, app, backend='auto'):
+        super().__init__(app)
+        if backend not in JSON_BACKENDS: raise ValueError(f"JSON backend must be one of: {', '.join(JSON_BACKENDS)}")
+        self.backend = 'orjson' if backend in ('auto', 'orjson') and orjson is not None else 'json'
+        self.stats = {'orjson': 0, 'fallback': 0}
+
+    def response(self, *args, **kwargs):
+        if self.backend != 'orjson' or not plain_json_settings(self._app): return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = orjson.dumps(obj, default=self.default, option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                                | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS)
+        except TypeError: body = None
+        if body is None or _orjson_may_differ(body, obj):
+            self.stats['fallback'] += 1
+            return self._app.response_class(f"{self.dumps(obj, separators=(',', ':'))}\n", mimetype=self.mimetype)
+        self.stats['orjson'] += 1
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def _encode_float(value):
+    # float.__repr__, with the json module's spelling of the non-finite values
+    if value != value: return 'NaN'
+    if value in (float('inf'), float('-inf')): return 'Infinity' if value > 0 else '-Infinity'
+    return repr(value)
+
+
+VALUE_ENCODERS = {
+    bool: lambda value: 'true' if value else 'false',
+    int: int.__repr__,
+    float: _encode_float,
+    str: encode_basestring_ascii,
+    date: lambda value: '"' + value.isoformat() + '"', # ISO dates, as the routes' dict helpers write them
+}
+
+
+class RowEncoder:
+    # columns: SQLAlchemy columns in the order the query selects them. Keys are the column keys;
+    # values are encoded a column at a time and each row becomes one %-format of a template with
+    # the keys already in sorted order. Same text as json.dumps(dicts, sort_keys=True,
+    # separators=(',', ':')) over the equivalent dicts.
+
+    def __init__(self, columns):
+        fields = []
+        for position, column in enumerate(columns):
+            python_type = column.type.python_type
+            encoder = next((encode for kind, encode in VALUE_ENCODERS.items() if issubclass(python_type, kind)), None)
+            if encoder is None: raise TypeError(f"No JSON row encoder for column {column.key} ({python_type.__name__})")
+            fields.append((column.key, position, encoder, column.nullable is not False))
+        fields.sort()
+        self._fields = [(position, encoder, nullable) for _, position, encoder, nullable in fields]
+        self._template = '{' + ','.join(encode_basestring_ascii(key).replace('%', '%%') + ':%s' for key, _, _, _ in fields) + '}'
+
+    def encode_items(self, rows):
+        # The comma-separated objects, without the enclosing brackets (for streaming in chunks)
+        if not rows: return ''
+        columns = list(zip(*rows)); encoded = []
+        for position, encoder, nullable in self._fields:
+            values = columns[position]
+            encoded.append(['null' if value is None else encoder(value) for value in values] if nullable else list(map(encoder, values)))
+        template = self._template
+        return ','.join([template % row for row in zip(*encoded)])
+
+    def encode(self, rows): return '[' + self.encode_items(rows) + ']'
@@ -0,0 +1,101 @@
+# backend/storage.py
+# SQLite tuning for app.py's database:
+#   sqlite_engine_options() - pool settings (and a busy timeout) for SQLALCHEMY_ENGINE_OPTIONS
+#   install_sqlite_pragmas() - journal_mode/synchronous/cache_size/mmap_size/... on every new connection
+#   GroupCommitQueue        - optional single writer thread that runs small writes submitted by many
+#                             requests in one transaction (one commit, one WAL sync) per batch
+# Non-SQLite and in-memory databases are left alone.
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:') and not url.database.startswith('file::memory:')
+
+
+def sqlite_engine_options(uri, pool_size=10, max_overflow=20, pool_timeout=30, busy_timeout_ms=5000):
+    if not is_sqlite_file(uri): return {}
+    return {
+        'pool_size': pool_size, 'max_overflow': max_overflow, 'pool_timeout': pool_timeout,
+        'pool_pre_ping': False, # Local file: a pooled connection can't go stale
+        # The timeout makes a writer wait for the lock instead of failing with "database is locked";
+        # check_same_thread=False because pooled connections move between request threads
+        'connect_args': {'timeout': busy_timeout_ms / 1000, 'check_same_thread': False},
+    }
+
+
+def install_sqlite_pragmas(engine, journal_mode='WAL', synchronous='NORMAL', cache_size_kb=65536, mmap_size=256 * 1024 * 1024, busy_timeout_ms=5000):
+    # journal_mode persists in the file; the rest are per connection, so they run on every connect
+    if engine.dialect.name != 'sqlite' or not is_sqlite_file(str(engine.url)): return False
+    pragmas = [f"PRAGMA journal_mode={journal_mode}", f"PRAGMA synchronous={synchronous}", f"PRAGMA cache_size=-{int(cache_size_kb)}",
+               f"PRAGMA mmap_size={int(mmap_size)}", f"PRAGMA busy_timeout={int(busy_timeout_ms)}", "PRAGMA temp_store=MEMORY"]
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas: cursor.execute(pragma)
+        finally: cursor.close()
+    return True
+
+
+class GroupCommitQueue:
+    # submit(job) queues job(connection) for the writer thread and waits for its return value. The
+    # writer takes whatever is queued (up to max_batch, waiting at most max_delay for more after the
+    # first job) and runs the batch in one transaction. If the batch fails, each job is retried in its
+    # own transaction so only the failing job's caller sees the exception.
+
+    def __init__(self, engine, max_batch=256, max_delay=0.002, name='group-commit'):
+        self._engine = engine; self.max_batch = max_batch; self.max_delay = max_delay; self._name = name
+        self._queue = queue.Queue(); self._thread = None; self._lock = threading.Lock()
+        self.stats = {'jobs': 0, 'batches': 0, 'retried_batches': 0}
+
+    def submit(self, job):
+        self._ensure_started()
+        future = Future(); self._queue.put((job, future))
+        return future.result()
+
+    def insert(self, table, values):
+        # INSERT one row; returns its primary key
+        return self.submit(lambda connection: connection.execute(table.insert().values(**values)).inserted_primary_key[0])
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self._name, daemon=True); self._thread.start()
+
+    def _take_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch:
+            try: batch.append(self._queue.get(timeout=max(0.0, deadline - time.perf_counter())))
+            except queue.Empty: break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            try:
+                results = []
+                with self._engine.begin() as connection:
+                    for job, _ in batch: results.append(job(connection))
+            except Exception:
+                self.stats['retried_batches'] += 1
+                for job, future in batch: self._run_alone(job, future)
+            else:
+                for (_, future), result in zip(batch, results): future.set_result(result)
+            self.stats['jobs'] += len(batch); self.stats['batches'] += 1
+
+    def _run_alone(self, job, future):
+        try:
+            with self._engine.begin() as connection: result = job(connection)
+        except Exception as e: future.set_exception(e)
+        else: future.set_result(result)